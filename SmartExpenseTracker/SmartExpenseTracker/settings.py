@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Secrets such as MONGO_URI live in .env at the repository root
+load_dotenv(BASE_DIR.parent / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -44,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the session/auth lookups of the others
+    'transactions.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,7 +66,8 @@ ROOT_URLCONF = 'SmartExpenseTracker.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, plus render timing for the instrumentation middleware
+        'BACKEND': 'transactions.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'transactions.context_processors.currency',
             ],
         },
     },
@@ -75,12 +86,79 @@ WSGI_APPLICATION = 'SmartExpenseTracker.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# DB_ENGINE picks the profile.  "sqlite" (the default) is db.sqlite3 next to
+# manage.py, for development and single-server deployments.  "postgresql" is
+# for several gunicorn/uvicorn workers writing at once, which SQLite's single
+# writer lock would serialize.  The app's queries run unchanged on both.
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # A psycopg connection pool per worker process when DB_POOL_MAX_SIZE is
+    # set (the choice under uvicorn, where persistent connections are not
+    # reused across requests), else one persistent connection per thread
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '0'))
+    DB_POOL = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),  # seconds to wait for a free connection
     }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'smartexpensetracker'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+            # Django refuses persistent connections on top of a pool
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            # A persistent connection the server dropped while idle is
+            # replaced before the next request uses it
+            'CONN_HEALTH_CHECKS': True,
+            # QuerySet.iterator() (the export, rollup rebuilds) streams rows
+            # through a server-side cursor.  Turn this on behind PgBouncer in
+            # transaction pooling mode, which cannot keep such a cursor open.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+                'application_name': 'SmartExpenseTracker',
+                **({'pool': DB_POOL} if DB_POOL_MAX_SIZE else {}),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    # WAL mode, the busy timeout and the rest are SQLITE_PRAGMAS below
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # Take the write lock at BEGIN: a transaction that read first
+                # and wants it later fails at once instead of waiting for it
+                'transaction_mode': 'IMMEDIATE',
+            },
+            # A file rather than memory, so that the concurrency tests'
+            # threads share the database through separate connections
+            'TEST': {'NAME': os.getenv('DB_TEST_NAME', str(BASE_DIR / 'test_db.sqlite3'))},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
+
+# PRAGMAs run on every new SQLite connection (transactions/pragmas.py), over
+# pragmas.DEFAULTS; None drops one.  `manage.py sqlite_maintenance` runs
+# PRAGMA optimize and a WAL checkpoint; schedule it, e.g. hourly.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # How long a writer waits for the lock before "database is locked", in
+    # milliseconds (DB_BUSY_TIMEOUT is in seconds)
+    'busy_timeout': int(os.getenv('DB_BUSY_TIMEOUT', '20')) * 1000,
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KIB', '64000')),  # negative means KiB
+    'mmap_size': int(os.getenv('SQLITE_MMAP_MIB', '256')) * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -123,4 +201,61 @@ STATICFILES_DIRS = [BASE_DIR / 'static']  # for development only, in production
 
 LOGIN_URL = 'accounts:login_view'  # URL to redirect to for login_required decorator
 LOGIN_REDIRECT_URL = 'dashboard:dashboard_view'
-LOGOUT_REDIRECT_URL = 'core:landing'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'core:landing'
+# Per-user dashboard/report payload cache (transactions/caching.py).
+# "locmem" is an in-process LRU; "django" uses CACHES[ALIAS] instead.
+TRANSACTIONS_PAYLOAD_CACHE = {
+    'BACKEND': 'locmem',
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TTL': 300,  # seconds
+}
+
+# Rows per bulk_create / transaction in the CSV importer (transactions/importer.py)
+TRANSACTIONS_IMPORT_BATCH_SIZE = 2000
+
+# MongoDB mirror client (transactions/mongo.py); unset keys use mongo.DEFAULTS
+MONGO = {
+    'URI': os.getenv('MONGO_URI'),
+    'DB_NAME': 'SmartExpenseTracker',
+    'MAX_POOL_SIZE': int(os.getenv('MONGO_MAX_POOL_SIZE', '20')),
+    'MIN_POOL_SIZE': 0,
+    'CONNECT_TIMEOUT_MS': 5000,
+    'SOCKET_TIMEOUT_MS': 10000,
+    'SERVER_SELECTION_TIMEOUT_MS': 5000,
+    'WAIT_QUEUE_TIMEOUT_MS': 5000,
+    'COMPRESSORS': ['zlib'],
+    'WRITE_CONCERN': {'w': 'majority', 'wtimeout': 5000},
+    # Open the first connection as each gunicorn worker starts (gunicorn.conf.py)
+    # instead of on first use; MONGO_WARM_UP=0 turns it off
+    'WARM_UP': os.getenv('MONGO_WARM_UP', '1') == '1',
+    'EVENT_LISTENERS': ['transactions.instrumentation.MongoCommandTimer'],
+}
+
+# Per-request SQL/Mongo/template timings (transactions/instrumentation.py).
+# QUERY_BUDGETS caps SQL queries per URL name; over budget logs a warning,
+# or raises when ENFORCE_BUDGETS is on (the test suite turns it on).
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    # Worst case per view, GET or POST, including the session/user lookups,
+    # on a user's first request creating their DataVersion row, budget
+    # upkeep (writes update them, the dashboard re-bases ended periods) and
+    # one foreign currency (the check that it has rates, and reading them);
+    # a search (q=) also reads the user's category names on SQLite
+    'QUERY_BUDGETS': {
+        'dashboard:dashboard_view': 16,
+        'transactions:reports': 11,
+        'transactions:transactions': 6,
+        'transactions:history_api': 4,
+        'transactions:add_transaction': 18,
+        'transactions:edit_transaction': 22,
+    },
+    'ENFORCE_BUDGETS': False,
+}
+
+# Totals are shown in HOME_CURRENCY; expenses in other currencies are
+# converted with the FxRate table, which `manage.py load_fx_rates` fills
+# from FX_RATES_FILE (transactions/fx.py)
+HOME_CURRENCY = os.getenv('HOME_CURRENCY', 'INR')
+FX_RATES_FILE = os.getenv('FX_RATES_FILE', str(BASE_DIR / 'fx_rates.csv'))
@@ -0,0 +1,150 @@
+"""Vectorized insights against the per-row ORM loop they replace.
+
+    python -m benchmarks.analytics --rows 100000 1000000 --json analytics.json
+
+For each size one user gets a synthetic history (transactions/synthetic.py)
+and the reports-page insights (monthly totals and month-over-month change,
+7/30-day means, per-category burn rate and month-end projection) are
+computed three ways:
+
+* ``loop``: iterate the Expense rows of the window through the ORM and
+  fold them into dicts keyed by ``strftime`` labels,
+* ``numpy (expenses)``: the same rows via values_list() into NumPy and
+  analytics.compute_insights(), which isolates the vectorization, and
+* ``numpy (daily)``: analytics.insights(), which reads DailyTotal.
+
+The three must agree on the headline numbers; the run stops otherwise.
+"""
+import argparse
+from datetime import date, timedelta
+
+from benchmarks.common import scratch_database, setup_django, summarize, time_call, write_json
+
+
+def loop_insights(user, today):
+    from transactions import analytics
+    from transactions.models import Expense
+    from transactions.rollups import month_end
+
+    start, end = analytics.history_window(today)
+    burn_start = today - timedelta(days=analytics.BURN_DAYS - 1)
+    week_start = today - timedelta(days=6)
+    this_month = today.strftime("%Y-%m")
+    last_month = (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+    monthly, burn, month_to_date = {}, {}, {}
+    week = 0.0
+    rows = (
+        Expense.objects.filter(user=user, transaction_type="expense", date__gte=start, date__lte=end)
+        .values_list("date", "category", "amount")
+        .iterator(chunk_size=5000)
+    )
+    for day, category, amount in rows:
+        amount = float(amount)
+        label = day.strftime("%Y-%m")
+        monthly[label] = monthly.get(label, 0.0) + amount
+        if label == this_month:
+            month_to_date[category] = month_to_date.get(category, 0.0) + amount
+        if day >= burn_start:
+            burn[category] = burn.get(category, 0.0) + amount
+        if day >= week_start:
+            week += amount
+
+    labels = sorted(monthly)
+    changes = {b: monthly[b] - monthly[a] for a, b in zip(labels, labels[1:])}
+    remaining = (month_end(today) - today).days
+    projected = sum(
+        month_to_date.get(c, 0.0) + burn.get(c, 0.0) / analytics.BURN_DAYS * remaining
+        for c in set(burn) | set(month_to_date)
+    )
+    return {
+        "month_to_date": round(monthly.get(this_month, 0.0), 2),
+        "last_month": round(monthly.get(last_month, 0.0), 2),
+        "last_change": round(changes.get(last_month, 0.0), 2),
+        "projected": round(projected, 2),
+        "avg_7": round(week / 7, 2),
+        "avg_30": round(sum(burn.values()) / analytics.BURN_DAYS, 2),
+    }
+
+
+def expense_frame(user, today):
+    """A DailyFrame built from raw Expense rows instead of DailyTotal."""
+    import numpy as np
+
+    from transactions.analytics import DailyFrame, history_window
+    from transactions.models import Expense
+
+    start, end = history_window(today)
+    days = (end - start).days + 1
+    rows = list(
+        Expense.objects.filter(user=user, transaction_type="expense", date__gte=start, date__lte=end)
+        .order_by().values_list("date", "category", "amount")
+    )
+    dates, names, amounts = zip(*rows)
+    offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.intp)
+    categories, index = np.unique(np.array(names), return_inverse=True)
+    # Many rows share a (category, day) cell here, so sum with bincount
+    cells = np.bincount(index * days + offsets, weights=np.array(amounts, dtype=np.float64),
+                        minlength=len(categories) * days)
+    return DailyFrame(start, categories, cells.reshape(len(categories), days), np.zeros(days))
+
+
+def _headline(insights):
+    return {
+        "month_to_date": insights.month_to_date,
+        "last_month": insights.last_month,
+        "last_change": insights.months[-1].change or 0.0,
+        "projected": insights.projected,
+        "avg_7": insights.avg_7,
+        "avg_30": insights.avg_30,
+    }
+
+
+def _agree(a, b):
+    return all(abs(a[key] - b[key]) <= 0.05 for key in a)
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+
+    from transactions import analytics, synthetic
+
+    today = date.today()
+    variants = [
+        ("loop", loop_insights),
+        ("numpy (expenses)", lambda u, t: _headline(analytics.compute_insights(expense_frame(u, t), t))),
+        ("numpy (daily)", lambda u, t: _headline(analytics.insights(u, t))),
+    ]
+    results = []
+    with scratch_database():
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            synthetic.populate(user, rows, end=today)
+
+            expected = loop_insights(user, today)
+            for name, fn in variants:
+                got = fn(user, today)
+                if not _agree(expected, got):
+                    raise SystemExit(f"{name} disagrees with the loop: {got} != {expected}")
+                stats = summarize(time_call(lambda: fn(user, today), repeat))
+                results.append({"rows": rows, "variant": name, **stats})
+                print(f"{rows:>9} {name:<18} p50={stats['p50_ms']:>10.2f}ms "
+                      f"p95={stats['p95_ms']:>10.2f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.repeat)
+    if args.json:
+        write_json(args.json, {"benchmark": "analytics", "results": results})
+
+
+if __name__ == "__main__":
+    main()
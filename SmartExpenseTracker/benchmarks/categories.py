@@ -0,0 +1,115 @@
+"""Renaming a category used by many transactions, by name column and by key.
+
+    python -m benchmarks.categories --rows 100000 1000000 --json categories.json
+
+For each size one user gets that many rows, all in one category, and the
+category is renamed back and forth two ways:
+
+* ``name column``: the layout before categories were foreign keys.  The
+  rows are copied into a scratch table that keeps the name on every row
+  (with the old (user, category) index) and the rename is the UPDATE of
+  all of them.  The old path also rewrote the rollups, the daily totals
+  and the search index, so this is a lower bound on what it cost.
+* ``foreign key``: what edit_category does now, saving the Category row
+  and queueing the Mongo rename in one transaction.
+"""
+import argparse
+
+from benchmarks.common import scratch_database, setup_django, summarize, time_call, write_json
+
+LEGACY_TABLE = "bench_legacy_expense"
+
+
+def _legacy_table(connection, user):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {LEGACY_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {LEGACY_TABLE} AS "
+            "SELECT e.id, e.user_id, e.transaction_type, e.payment_mode, e.amount, "
+            "c.name AS category, e.description, e.date, e.created_at "
+            "FROM transactions_expense e JOIN transactions_category c ON c.id = e.category_id "
+            "WHERE e.user_id = %s",
+            [user.pk],
+        )
+        cursor.execute(f"CREATE INDEX {LEGACY_TABLE}_user_category ON {LEGACY_TABLE} (user_id, category)")
+
+
+def _toggle(names):
+    """Alternate between two names so every run is a real rename."""
+    state = {"index": 0}
+
+    def step():
+        old, new = names[state["index"] % 2], names[(state["index"] + 1) % 2]
+        state["index"] += 1
+        return old, new
+
+    return step
+
+
+def rename_column(connection, user, step):
+    from django.db import transaction
+
+    old, new = step()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {LEGACY_TABLE} SET category = %s WHERE user_id = %s AND category = %s",
+                       [new, user.pk, old])
+
+
+def rename_key(category, step):
+    from django.db import transaction
+
+    from transactions import outbox
+
+    old, new = step()
+    with transaction.atomic():
+        category.name = new
+        category.save()
+        outbox.enqueue_rename(category.user, category.type, old, new)
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+
+    from transactions.models import Category, Expense
+
+    results = []
+    with scratch_database() as connection:
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            category = Category.objects.create(user=user, name="Food", type="expense")
+            batch = []
+            for n in range(rows):
+                batch.append(Expense(user=user, amount="10.00", category=category,
+                                     description="Lunch", date="2026-01-01"))
+                if len(batch) >= 10_000 or n == rows - 1:
+                    Expense.objects.bulk_create(batch)
+                    batch = []
+            _legacy_table(connection, user)
+
+            variants = [
+                ("name column", lambda step: rename_column(connection, user, step)),
+                ("foreign key", lambda step: rename_key(category, step)),
+            ]
+            for name, fn in variants:
+                step = _toggle(["Food", "Meals"])
+                stats = summarize(time_call(lambda: fn(step), repeat - repeat % 2))
+                results.append({"rows": rows, "variant": name, **stats})
+                print(f"{rows:>9} {name:<12} p50={stats['p50_ms']:>10.3f}ms p95={stats['p95_ms']:>10.3f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=6, help="Renames per variant (rounded down to even).")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.repeat)
+    if args.json:
+        write_json(args.json, {"benchmark": "categories", "results": results})
+
+
+if __name__ == "__main__":
+    main()
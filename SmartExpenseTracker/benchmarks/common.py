@@ -0,0 +1,107 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run from the project directory as modules, for example::
+
+    python -m benchmarks.search --rows 100000 1000000
+
+Each one builds a throwaway test database, so db.sqlite3 is never touched.
+"""
+import json
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import django
+
+DESCRIPTIONS = [
+    "Weekly groceries", "Dinner with friends", "Taxi to airport", "Monthly rent",
+    "Electricity bill", "Movie tickets", "Coffee", "Pharmacy", "Online course",
+    "Train pass", "Birthday gift", "Gym membership", "Mobile recharge", "Lunch",
+    "Uber ride", "Book store", "Concert", "Water bill", "Internet bill", "Snacks",
+]
+EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment",
+                      "Rent", "Travel", "Health", "Education"]
+INCOME_CATEGORIES = ["Salary", "Freelance", "Bonus", "Investment", "Gift"]
+PAYMENT_MODES = ["Cash", "UPI", "Debit Card", "Credit Card", "Net Banking"]
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SmartExpenseTracker.settings")
+    django.setup()
+
+
+@contextmanager
+def scratch_database(keepdb=False):
+    """Create the test database for the duration of a benchmark run."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def seed_expenses(user, rows, batch_size=5000, days=730, seed=0):
+    """Bulk-insert ``rows`` random transactions for ``user``."""
+    from transactions import categories
+    from transactions.models import Expense
+
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=days)
+    known = categories.resolve(user, [(name, "income") for name in INCOME_CATEGORIES]
+                               + [(name, "expense") for name in EXPENSE_CATEGORIES])
+    batch = []
+    for _ in range(rows):
+        is_income = rng.random() < 0.1
+        batch.append(Expense(
+            user=user,
+            transaction_type="income" if is_income else "expense",
+            amount=f"{rng.uniform(10, 5000):.2f}",
+            category=known[
+                rng.choice(INCOME_CATEGORIES if is_income else EXPENSE_CATEGORIES),
+                "income" if is_income else "expense",
+            ],
+            payment_mode=rng.choice(PAYMENT_MODES),
+            description=rng.choice(DESCRIPTIONS),
+            date=start + timedelta(days=rng.randrange(days)),
+        ))
+        if len(batch) >= batch_size:
+            Expense.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Expense.objects.bulk_create(batch)
+
+
+def time_call(fn, repeat=20):
+    """Run ``fn`` ``repeat`` times and return the wall-clock samples in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+    }
+
+
+def write_json(path, payload):
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2, default=str)
@@ -0,0 +1,85 @@
+"""Throughput and memory of the streaming transactions export.
+
+    python -m benchmarks.export --rows 100000 1000000 --json export.json
+
+For each size, one user gets that many rows and the export view is
+consumed end to end for every format (CSV, JSONL, each plain and
+gzipped).  Reported per run: rows/sec, output bytes, the Python heap
+peak while streaming (tracemalloc, a separate pass) and the process's
+peak RSS so far.  A flat heap peak across sizes is the point.
+"""
+import argparse
+import resource
+import time
+import tracemalloc
+
+from benchmarks.common import scratch_database, seed_expenses, setup_django, write_json
+
+VARIANTS = [("csv", False), ("csv", True), ("jsonl", False), ("jsonl", True)]
+
+
+def _consume(view, factory, user, fmt, compress):
+    params = {"format": fmt}
+    if compress:
+        params["compress"] = "gzip"
+    request = factory.get("/transactions/export/", params)
+    request.user = user
+    size = 0
+    for chunk in view(request).streaming_content:
+        size += len(chunk)
+    return size
+
+
+def run(rows_list):
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+
+    from transactions.views import export_transactions
+
+    factory = RequestFactory()
+    results = []
+    with scratch_database():
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            seed_expenses(user, rows)
+            for fmt, compress in VARIANTS:
+                start = time.perf_counter()
+                size = _consume(export_transactions, factory, user, fmt, compress)
+                elapsed = time.perf_counter() - start
+
+                tracemalloc.start()
+                _consume(export_transactions, factory, user, fmt, compress)
+                _, heap_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                row = {
+                    "rows": rows,
+                    "format": fmt + (".gz" if compress else ""),
+                    "seconds": round(elapsed, 3),
+                    "rows_per_sec": round(rows / elapsed),
+                    "bytes": size,
+                    "heap_peak_kib": heap_peak // 1024,
+                    # ru_maxrss is in KiB on Linux
+                    "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                }
+                results.append(row)
+                print(f"{rows:>9} {row['format']:<9} {row['rows_per_sec']:>9} rows/s "
+                      f"{size / 1e6:>9.1f} MB heap_peak={row['heap_peak_kib']} KiB "
+                      f"max_rss={row['max_rss_kib']} KiB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows)
+    if args.json:
+        write_json(args.json, {"benchmark": "export", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput of the CSV import pipeline.
+
+    python -m benchmarks.imports --rows 100000 --batch-size 1000 2000 5000
+
+For each size a CSV is generated in memory (with a handful of new
+categories and about 1% invalid rows) and imported for a fresh user.
+The target is 100k rows in a few seconds on SQLite.
+"""
+import argparse
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+from benchmarks.common import (
+    DESCRIPTIONS, EXPENSE_CATEGORIES, INCOME_CATEGORIES, PAYMENT_MODES,
+    scratch_database, setup_django, write_json,
+)
+
+
+def make_csv(rows, days=730, seed=0):
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=days)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["date", "type", "amount", "category", "description", "payment"])
+    for _ in range(rows):
+        is_income = rng.random() < 0.1
+        amount = f"{rng.uniform(10, 5000):.2f}" if rng.random() > 0.01 else "-1"
+        writer.writerow([
+            (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "income" if is_income else "expense",
+            amount,
+            rng.choice(INCOME_CATEGORIES if is_income else EXPENSE_CATEGORIES),
+            rng.choice(DESCRIPTIONS),
+            rng.choice(PAYMENT_MODES),
+        ])
+    return buffer.getvalue()
+
+
+def run(rows_list, batch_sizes):
+    from django.contrib.auth.models import User
+
+    from transactions import importer
+
+    results = []
+    with scratch_database():
+        for rows in rows_list:
+            text = make_csv(rows)
+            for batch_size in batch_sizes:
+                user = User.objects.create_user(username=f"bench{rows}-{batch_size}")
+                result = importer.import_csv(user, io.StringIO(text), batch_size=batch_size)
+                row = {
+                    "rows": rows,
+                    "batch_size": batch_size,
+                    "imported": result.imported,
+                    "skipped": result.skipped,
+                    "seconds": round(result.elapsed, 3),
+                    "rows_per_sec": round(result.rows_per_second),
+                }
+                results.append(row)
+                print(f"{rows:>9} batch={batch_size:<6} {row['seconds']:>8.2f}s "
+                      f"{row['rows_per_sec']:>9} rows/s (skipped {result.skipped})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1000, 2000, 5000])
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.batch_size)
+    if args.json:
+        write_json(args.json, {"benchmark": "imports", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Load test of the hot pages under WSGI (gunicorn) and ASGI (uvicorn).
+
+    python -m benchmarks.load --users 200 --duration 30 --rows 20000
+
+A throwaway SQLite database is created in a temporary directory and
+seeded with one user's transactions; both servers are started against it
+in turn through a generated settings module that imports the configured
+one, so db.sqlite3 is never touched.  Each simulated user holds a
+keep-alive connection and requests the dashboard, reports and history
+pages round-robin as fast as responses come back.  Reports requests/sec
+and p50/p99 latency per server and per page.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import seed_expenses, summarize, write_json
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETTINGS_TEMPLATE = """\
+from {base} import *  # noqa
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+# Keep the profile's OPTIONS and pragmas; only the file changes
+DATABASES["default"]["NAME"] = {db_path!r}
+"""
+
+
+def server_commands(port, workers, threads):
+    return {
+        "wsgi": [
+            sys.executable, "-m", "gunicorn", "SmartExpenseTracker.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--log-level", "warning",
+        ],
+        "asgi": [
+            sys.executable, "-m", "uvicorn", "SmartExpenseTracker.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--no-access-log", "--log-level", "warning",
+        ],
+    }
+
+
+def prepare(tmpdir, rows):
+    """Write the settings module, migrate, seed; returns (env, session cookie)."""
+    base = os.environ.get("DJANGO_SETTINGS_MODULE", "SmartExpenseTracker.settings")
+    with open(os.path.join(tmpdir, "loadtest_settings.py"), "w") as fh:
+        fh.write(SETTINGS_TEMPLATE.format(base=base, db_path=os.path.join(tmpdir, "load.sqlite3")))
+
+    env = dict(os.environ)
+    env["DJANGO_SETTINGS_MODULE"] = "loadtest_settings"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [tmpdir, PROJECT_DIR, env.get("PYTHONPATH")]))
+    os.environ.update(env)
+    sys.path.insert(0, tmpdir)
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+
+    from benchmarks.common import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+    from transactions import rollups
+    from transactions.models import Category
+
+    call_command("migrate", verbosity=0)
+    user = User.objects.create_user(username="loadtest", password="loadtest")
+    Category.objects.bulk_create(
+        [Category(user=user, name=name, type="expense") for name in EXPENSE_CATEGORIES]
+        + [Category(user=user, name=name, type="income") for name in INCOME_CATEGORIES]
+    )
+    seed_expenses(user, rows)
+    rollups.rebuild([user.pk])
+
+    # The same session a login would create
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return env, f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+
+def page_paths():
+    from django.urls import reverse
+
+    return [
+        reverse("dashboard:dashboard_view"),
+        reverse("transactions:reports"),
+        reverse("transactions:transactions"),
+    ]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection") != "close"
+
+
+async def _user_loop(port, paths, cookie, offset, stop_at, record):
+    reader = writer = None
+    i = offset
+    while time.monotonic() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        if writer is None:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+            f"Cookie: {cookie}\r\nConnection: keep-alive\r\n\r\n"
+        ).encode()
+        started = time.perf_counter()
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status, keep_alive = None, False
+        record(path, status, (time.perf_counter() - started) * 1000)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, paths, cookie, users, duration, warmup):
+    """Run ``users`` concurrent loops; returns {path: (samples_ms, errors)}."""
+    results = {path: ([], 0) for path in paths}
+    measuring = False
+
+    def record(path, status, elapsed_ms):
+        if not measuring:
+            return
+        samples, errors = results[path]
+        if status == 200:
+            samples.append(elapsed_ms)
+        else:
+            results[path] = (samples, errors + 1)
+
+    stop_at = time.monotonic() + warmup + duration
+    tasks = [
+        asyncio.create_task(_user_loop(port, paths, cookie, n, stop_at, record))
+        for n in range(users)
+    ]
+    await asyncio.sleep(warmup)
+    measuring = True
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    return results, time.monotonic() - started
+
+
+def run(servers, users, duration, warmup, rows, workers, threads):
+    rows_out = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env, cookie = prepare(tmpdir, rows)
+        paths = page_paths()
+        for server in servers:
+            port = free_port()
+            proc = subprocess.Popen(server_commands(port, workers, threads)[server], cwd=PROJECT_DIR, env=env)
+            try:
+                wait_for_port(port)
+                results, elapsed = asyncio.run(drive(port, paths, cookie, users, duration, warmup))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+            every = [ms for samples, _ in results.values() for ms in samples]
+            for path, (samples, errors) in [("all", (every, sum(e for _, e in results.values())))] + list(results.items()):
+                row = {"server": server, "path": path, "errors": errors,
+                       "rps": round(len(samples) / elapsed, 1)}
+                if samples:
+                    row.update(summarize(samples))
+                rows_out.append(row)
+                print(f"{server:5} {path:40} {row['rps']:>8} req/s  "
+                      f"p50 {row.get('p50_ms', '-'):>9} ms  p99 {row.get('p99_ms', '-'):>9} ms  "
+                      f"errors {errors}")
+    return rows_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", choices=["wsgi", "asgi"], default=["wsgi", "asgi"])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per server")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker (WSGI)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.servers, args.users, args.duration, args.warmup,
+                  args.rows, args.workers, args.threads)
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
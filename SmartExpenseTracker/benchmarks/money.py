@@ -0,0 +1,120 @@
+"""Amounts stored as integer minor units against the decimal column they replace.
+
+    python -m benchmarks.money --rows 100000 1000000 --json money.json
+
+For each size one user gets that many rows, and the amounts are also
+copied into a scratch table that keeps them in a ``decimal`` column, the
+layout before transactions.fields.MoneyField.  Timed per layout:
+
+* ``iterate``: every amount of the user through values_list().iterator(),
+  which is what the export does,
+* ``aggregate``: per-month totals of the user through Sum(), serialized
+  with json.dumps the way the chart views do.
+
+The ``money`` rows read the new column as Decimals through the field;
+the ``minor`` rows wrap it in fields.minor() and stay integer until
+serialization.  The aggregates must agree to the paisa.
+"""
+import argparse
+import json
+
+from benchmarks.common import scratch_database, seed_expenses, setup_django, summarize, time_call, write_json
+
+DECIMAL_TABLE = "bench_decimal_expense"
+
+
+def _decimal_model():
+    from django.db import models
+
+    class DecimalExpense(models.Model):
+        user_id = models.IntegerField()
+        amount = models.DecimalField(max_digits=10, decimal_places=2)
+        date = models.DateField()
+
+        class Meta:
+            app_label = "transactions"
+            db_table = DECIMAL_TABLE
+            managed = False
+
+    return DecimalExpense
+
+
+def _decimal_table(connection, user):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {DECIMAL_TABLE}")
+        cursor.execute(f"CREATE TABLE {DECIMAL_TABLE} (id integer PRIMARY KEY, user_id integer NOT NULL, "
+                       "amount decimal NOT NULL, date date NOT NULL)")
+        cursor.execute(f"INSERT INTO {DECIMAL_TABLE} SELECT id, user_id, amount / 100.0, date "
+                       "FROM transactions_expense WHERE user_id = %s", [user.pk])
+        cursor.execute(f"CREATE INDEX {DECIMAL_TABLE}_user_date ON {DECIMAL_TABLE} (user_id, date)")
+
+
+def iterate(qs, column):
+    total = 0
+    for (amount,) in qs.values_list(column).iterator(chunk_size=2000):
+        total += amount
+    return total
+
+
+def monthly(qs, total, scale=None):
+    from django.db.models.functions import TruncMonth
+
+    rows = qs.annotate(month=TruncMonth("date")).values("month").annotate(total=total).order_by("month")
+    values = [row["total"] / scale if scale else float(row["total"]) for row in rows]
+    json.dumps(values)
+    return values
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+    from django.db.models import Sum
+
+    from transactions.fields import MINOR_UNITS, minor
+    from transactions.models import Expense
+
+    DecimalExpense = _decimal_model()
+    results = []
+    with scratch_database() as connection:
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            seed_expenses(user, rows)
+            _decimal_table(connection, user)
+            old = DecimalExpense.objects.filter(user_id=user.pk)
+            new = Expense.objects.filter(user=user)
+
+            variants = [
+                ("iterate", "decimal", lambda: iterate(old, "amount")),
+                ("iterate", "money", lambda: iterate(new, "amount")),
+                ("iterate", "minor", lambda: iterate(new, minor("amount"))),
+                ("aggregate", "decimal", lambda: monthly(old, Sum("amount"))),
+                ("aggregate", "money", lambda: monthly(new, Sum("amount"))),
+                ("aggregate", "minor", lambda: monthly(new, minor(Sum("amount")), MINOR_UNITS)),
+            ]
+            totals = [round(sum(monthly(qs, Sum("amount"))), 2) for qs in (old, new)]
+            if totals[0] != totals[1]:
+                raise SystemExit(f"decimal and minor-unit totals disagree: {totals}")
+            for task, layout, fn in variants:
+                stats = summarize(time_call(fn, repeat))
+                results.append({"rows": rows, "task": task, "layout": layout, **stats})
+                print(f"{rows:>9} {task:<9} {layout:<8} p50={stats['p50_ms']:>10.2f}ms "
+                      f"p95={stats['p95_ms']:>10.2f}ms")
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {DECIMAL_TABLE}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.repeat)
+    if args.json:
+        write_json(args.json, {"benchmark": "money", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Search latency for the transactions history at increasing table sizes.
+
+    python -m benchmarks.search --rows 100000 1000000 --json search.json
+
+For each size, one user gets that many rows. The first history page is
+then fetched for a set of queries through both the FTS5 and the
+``icontains`` backend, which is the work transactions_view does per
+request.
+"""
+import argparse
+
+from benchmarks.common import (
+    scratch_database, seed_expenses, setup_django, summarize, time_call, write_json,
+)
+
+QUERIES = ["gro", "groceries", "dinner friends", "taxi", "bill", "upi", "zzz"]
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+
+    from transactions import pagination
+    from transactions.search import SEARCH_ORDERING, SimpleSearchBackend, SQLiteFTSBackend
+    from transactions.models import Expense
+
+    results = []
+    with scratch_database():
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            seed_expenses(user, rows)
+            base = Expense.objects.filter(user=user)
+            for backend in (SQLiteFTSBackend(), SimpleSearchBackend()):
+                for query in QUERIES:
+                    qs = backend.search(base, query, user)
+                    stats = summarize(time_call(
+                        lambda: pagination.keyset_page(qs, None, 50, SEARCH_ORDERING),
+                        repeat,
+                    ))
+                    row = {"rows": rows, "backend": type(backend).__name__, "query": query, **stats}
+                    results.append(row)
+                    print(f"{rows:>9} {row['backend']:<20} {query!r:<18} "
+                          f"p50={stats['p50_ms']:>9.2f}ms p95={stats['p95_ms']:>9.2f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.repeat)
+    if args.json:
+        write_json(args.json, {"benchmark": "search", "results": results})
+
+
+if __name__ == "__main__":
+    main()
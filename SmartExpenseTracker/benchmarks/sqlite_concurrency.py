@@ -0,0 +1,173 @@
+"""Concurrent reads and writes on SQLite, with and without the connection tuning.
+
+    python -m benchmarks.sqlite_concurrency --writers 4 --readers 4 --seconds 10 --rows 100000 --json sqlite.json
+
+One user gets ``--rows`` transactions, then writer threads add
+transactions through the add view while reader threads load the
+dashboard, all through the test client as fast as responses come back,
+for ``--seconds`` per profile:
+
+* ``rollback journal``: Django's stock SQLite settings (DELETE journal,
+  synchronous=FULL, deferred transactions, a 5 s busy timeout),
+* ``tuned``: the configured profile, i.e. the OPTIONS of settings.DATABASES
+  and the PRAGMAs of settings.SQLITE_PRAGMAS.
+
+Reports operations per second, p50/p95 latency and the "database is
+locked" failures per profile and role.  Only meaningful when the
+configured database is SQLite.
+"""
+import argparse
+import logging
+import threading
+import time
+
+from benchmarks.common import scratch_database, seed_expenses, setup_django, summarize, write_json
+
+BASELINE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout": 5000,
+    "cache_size": None,
+    "mmap_size": None,
+    "temp_store": None,
+}
+
+
+def _profiles():
+    from django.conf import settings
+    from django.db import connections
+
+    options = connections.settings["default"].setdefault("OPTIONS", {})
+    tuned_options, tuned_pragmas = dict(options), getattr(settings, "SQLITE_PRAGMAS", {})
+    baseline_options = {k: v for k, v in options.items() if k != "transaction_mode"}
+    return [
+        ("rollback journal", baseline_options, BASELINE_PRAGMAS),
+        ("tuned", tuned_options, tuned_pragmas),
+    ]
+
+
+def _use(options, pragmas):
+    """Make new connections open with ``options`` and ``pragmas``."""
+    from django.conf import settings
+    from django.db import connections
+
+    connections.close_all()
+    settings_dict = connections.settings["default"]
+    settings_dict["OPTIONS"].clear()
+    settings_dict["OPTIONS"].update(options)
+    settings.SQLITE_PRAGMAS = pragmas
+    # journal_mode is stored in the file; open once so it is switched before the threads start
+    connections["default"].ensure_connection()
+    connections.close_all()
+
+
+def _worker(cookies, request, deadline, out):
+    from django.db import OperationalError, connections
+    from django.test import Client
+
+    client = Client()
+    client.cookies = cookies
+    samples, failures, n = [], 0, 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = request(client, n)
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                failures += 1
+            else:
+                if response.status_code >= 400:
+                    raise RuntimeError(f"request failed with {response.status_code}")
+                samples.append((time.perf_counter() - start) * 1000)
+            n += 1
+    finally:
+        connections.close_all()
+    out.append((samples, failures))
+
+
+def add(client, n):
+    from datetime import date
+
+    from django.urls import reverse
+
+    return client.post(reverse("transactions:add_transaction"), {
+        "type": "expense", "amount": f"{n % 500 + 1}.25", "category": "Food",
+        "description": f"benchmark #{n}", "date": date.today().isoformat(), "payment": "UPI",
+    })
+
+
+def dashboard(client, n):
+    from django.urls import reverse
+
+    return client.get(reverse("dashboard:dashboard_view"))
+
+
+def run(writers, readers, seconds, rows):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    if connection.vendor != "sqlite":
+        raise SystemExit("The configured database is not SQLite.")
+    setup_test_environment()
+    logging.getLogger("transactions.instrumentation").setLevel(logging.ERROR)
+    # Lock failures are counted, not logged as server errors
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    results = []
+    with scratch_database():
+        user = User.objects.create_user(username="bench")
+        seed_expenses(user, rows)
+        client = Client()
+        client.force_login(user)
+        profiles = _profiles()
+        try:
+            for profile, options, pragmas in profiles:
+                _use(options, pragmas)
+                deadline = time.perf_counter() + seconds
+                outputs = {"write": [], "read": []}
+                threads = [
+                    threading.Thread(target=_worker, args=(client.cookies, add, deadline, outputs["write"]))
+                    for _ in range(writers)
+                ] + [
+                    threading.Thread(target=_worker, args=(client.cookies, dashboard, deadline, outputs["read"]))
+                    for _ in range(readers)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                for role, output in outputs.items():
+                    samples = [ms for thread_samples, _ in output for ms in thread_samples]
+                    locked = sum(failures for _, failures in output)
+                    stats = summarize(samples) if samples else {"n": 0, "p50_ms": 0.0, "p95_ms": 0.0}
+                    ops = round(len(samples) / seconds, 1)
+                    results.append({"profile": profile, "role": role, "ops_per_s": ops, "locked": locked, **stats})
+                    print(f"{profile:<17} {role:<5} {ops:>8.1f} ops/s p50={stats['p50_ms']:>9.2f}ms "
+                          f"p95={stats['p95_ms']:>9.2f}ms locked={locked}")
+        finally:
+            _use(*profiles[-1][1:])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.writers, args.readers, args.seconds, args.rows)
+    if args.json:
+        write_json(args.json, {"benchmark": "sqlite_concurrency", "writers": args.writers,
+                               "readers": args.readers, "seconds": args.seconds, "rows": args.rows,
+                               "results": results})
+
+
+if __name__ == "__main__":
+    main()
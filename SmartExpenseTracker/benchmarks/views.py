@@ -0,0 +1,195 @@
+"""Latency and query counts of the expense views, for regression tracking.
+
+    python -m benchmarks.views --rows 1000 100000 --json views.json
+    python -m benchmarks.views --rows 1000 --compare views.json
+
+For each size one user gets a synthetic history (transactions/synthetic.py)
+and every scenario is requested through the test client: the dashboard,
+the reports page with and without filters, the transactions list with
+every combination of its filters, adding a transaction and renaming a
+category.  Cached pages are measured cold (payload cache cleared before
+each request) and warm.
+
+The JSON output carries the git revision and library versions.  Given
+``--compare``, p50 latency and query counts are checked against an older
+run; the exit status is 1 if a scenario got slower than ``--tolerance``
+or runs more queries.
+"""
+import argparse
+import itertools
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import scratch_database, setup_django, summarize, write_json
+
+TRANSACTION_FILTERS = {
+    "q": {"q": "groceries"},
+    "category": {"category": "Food"},
+    "type": {"type": "expense"},
+    "range": {"from": (date.today() - timedelta(days=90)).isoformat(), "to": date.today().isoformat()},
+}
+REPORT_FILTERS = {
+    "range": TRANSACTION_FILTERS["range"],
+    "category": TRANSACTION_FILTERS["category"],
+}
+
+
+def _combinations(filters):
+    """Every subset of ``filters`` as (label, query params), the empty one first."""
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            params = {}
+            for name in names:
+                params.update(filters[name])
+            yield "+".join(names) or "none", params
+
+
+def scenarios(user):
+    """(name, request function, clear cache first) for every measured request."""
+    from django.urls import reverse
+
+    from transactions.models import Category
+
+    out = [
+        ("dashboard", lambda c: c.get(reverse("dashboard:dashboard_view")), True),
+        ("dashboard (cached)", lambda c: c.get(reverse("dashboard:dashboard_view")), False),
+        ("reports (cached)", lambda c: c.get(reverse("transactions:reports")), False),
+    ]
+    for label, params in _combinations(REPORT_FILTERS):
+        out.append((f"reports [{label}]",
+                    lambda c, p=params: c.get(reverse("transactions:reports"), p), True))
+    for label, params in _combinations(TRANSACTION_FILTERS):
+        out.append((f"transactions [{label}]",
+                    lambda c, p=params: c.get(reverse("transactions:transactions"), p), False))
+
+    counter = itertools.count()
+    out.append(("add_expense", lambda c: c.post(reverse("transactions:add_transaction"), {
+        "type": "expense", "amount": f"{100 + next(counter) % 50}.00", "category": "Food",
+        "description": "Benchmark lunch", "date": date.today().isoformat(), "payment": "UPI",
+    }), False))
+
+    category = Category.objects.get(user=user, name="Entertainment", type="expense")
+    names = itertools.cycle(["Leisure", "Entertainment"])
+    out.append(("edit_category", lambda c: c.post(
+        reverse("transactions:edit_category", args=[category.pk]), {"name": next(names)},
+    ), False))
+    return out
+
+
+def measure(client, request, clear_cache, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from transactions.caching import get_payload_cache
+
+    samples, queries = [], []
+    for i in range(repeat + 1):
+        if clear_cache:
+            get_payload_cache().clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = request(client)
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"request failed with {response.status_code}")
+        if i:  # the first run only warms up
+            samples.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+    return samples, queries
+
+
+def run(rows_list, repeat):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from transactions import synthetic
+
+    setup_test_environment()
+    # Query counts are reported per scenario; skip the per-request budget warnings
+    logging.getLogger("transactions.instrumentation").setLevel(logging.ERROR)
+    results = []
+    with scratch_database():
+        for rows in rows_list:
+            user = User.objects.create_user(username=f"bench{rows}")
+            synthetic.populate(user, rows)
+            client = Client()
+            client.force_login(user)
+            for name, request, clear_cache in scenarios(user):
+                samples, queries = measure(client, request, clear_cache, repeat)
+                stats = summarize(samples)
+                row = {"rows": rows, "scenario": name, **stats,
+                       "queries": max(queries), "queries_min": min(queries)}
+                results.append(row)
+                print(f"{rows:>9} {name:<44} p50={stats['p50_ms']:>9.2f}ms "
+                      f"p95={stats['p95_ms']:>9.2f}ms p99={stats['p99_ms']:>9.2f}ms "
+                      f"queries={row['queries']}")
+    return results
+
+
+def metadata():
+    import django
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print regressions against ``baseline_path``; returns how many were found."""
+    with open(baseline_path) as fh:
+        baseline = {(r["rows"], r["scenario"]): r for r in json.load(fh)["results"]}
+    regressions = 0
+    for row in results:
+        old = baseline.get((row["rows"], row["scenario"]))
+        if old is None:
+            continue
+        ratio = row["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+        problems = []
+        if ratio > 1 + tolerance:
+            problems.append(f"p50 {old['p50_ms']:.2f} -> {row['p50_ms']:.2f}ms (x{ratio:.2f})")
+        if row["queries"] > old["queries"]:
+            problems.append(f"queries {old['queries']} -> {row['queries']}")
+        if problems:
+            regressions += 1
+            print(f"REGRESSION {row['rows']:>9} {row['scenario']}: {'; '.join(problems)}")
+    print(f"{regressions} regression(s) against {baseline_path}.")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Check for regressions against an earlier --json file.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative p50 slowdown before --compare reports it.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.rows, args.repeat)
+    if args.json:
+        write_json(args.json, {"benchmark": "views", "meta": metadata(), "results": results})
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
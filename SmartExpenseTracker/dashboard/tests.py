@@ -1,3 +1,32 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from transactions import rollups
+from transactions.models import Category, Expense
+
+
+class DashboardViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.client.force_login(self.user)
+
+    def test_totals_and_charts_come_from_rollup(self):
+        Expense.objects.create(user=self.user, transaction_type="income", amount="900",
+                               category=Category.objects.create(user=self.user, name="Salary", type="income"),
+                               date=date(2026, 1, 1))
+        Expense.objects.create(user=self.user, transaction_type="expense", amount="150",
+                               category=Category.objects.create(user=self.user, name="Rent", type="expense"),
+                               date=date(2026, 2, 1))
+        rollups.rebuild([self.user.id])
+
+        response = self.client.get(reverse("dashboard:dashboard_view"))
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["balance"], Decimal("750"))
+        self.assertEqual(response.context["pie_labels"], '["Rent"]')
+        self.assertEqual(response.context["line_labels"], '["Jan 2026", "Feb 2026"]')
+        self.assertEqual(response.context["line_expense"], "[0.0, 150.0]")
@@ -1,87 +1,55 @@
+import asyncio
 import json
+from datetime import date
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from transactions.models import Expense
-from django.db.models import Sum
-from django.db.models.functions import TruncMonth
-
-
-@login_required
-def dashboard_view(request):
-    user = request.user
-
-    # ── Summary totals ──
-    income_total = Expense.objects.filter(
-        user=user, transaction_type__iexact="income"
-    ).aggregate(total=Sum("amount"))["total"] or 0
-
-    expense_total = Expense.objects.filter(
-        user=user, transaction_type__iexact="expense"
-    ).aggregate(total=Sum("amount"))["total"] or 0
-
-    balance = income_total - expense_total
-
-    # ── Recent 5 transactions ──
-    recent_transactions = Expense.objects.filter(user=user).order_by("-date", "-created_at")[:5]
-
-    # ── Pie chart: Expense by category ──
-    category_data = (
-        Expense.objects.filter(user=user, transaction_type__iexact="expense")
-        .values("category")
-        .annotate(total=Sum("amount"))
-        .order_by("-total")
+from transactions import budgets, reports
+from transactions.caching import get_payload_cache
+
+
+async def _dashboard_payload(user, today):
+    # The report, the recent list and the budgets are independent, so run them side by side
+    report, recent_transactions, budget_status = await asyncio.gather(
+        sync_to_async(reports.build_report)(user),
+        # ── Recent 5 transactions ──
+        _recent_transactions(user),
+        # ── Budgets: running totals, no SUM over expenses ──
+        sync_to_async(budgets.status)(user, today),
     )
-    pie_labels = [item["category"] for item in category_data]
-    pie_values = [float(item["total"]) for item in category_data]
 
     # ── Line chart: Monthly income vs expense (last 6 months) ──
-    monthly_income = (
-        Expense.objects.filter(user=user, transaction_type__iexact="income")
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total=Sum("amount"))
-        .order_by("month")
-    )
-    monthly_expense = (
-        Expense.objects.filter(user=user, transaction_type__iexact="expense")
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total=Sum("amount"))
-        .order_by("month")
-    )
+    months = report.months[-6:]
 
-    # Build a merged set of months
-    all_months: set = set()
-    income_map: dict = {}
-    expense_map: dict = {}
+    return {
+        "income_total": report.total_income,
+        "expense_total": report.total_expense,
+        "balance": report.net,
+        "recent_transactions": recent_transactions,
+        "budgets": budget_status,
+        # Chart data as JSON
+        "pie_labels": json.dumps([c.name for c in report.categories]),
+        "pie_values": json.dumps([float(c.total) for c in report.categories]),
+        "line_labels": json.dumps([m.month.strftime("%b %Y") for m in months]),
+        "line_income": json.dumps([float(m.income) for m in months]),
+        "line_expense": json.dumps([float(m.expense) for m in months]),
+    }
 
-    for item in monthly_income:
-        month_str = item["month"].strftime("%b %Y")
-        income_map[month_str] = float(item["total"])
-        all_months.add(item["month"])
 
-    for item in monthly_expense:
-        month_str = item["month"].strftime("%b %Y")
-        expense_map[month_str] = float(item["total"])
-        all_months.add(item["month"])
+async def _recent_transactions(user):
+    qs = Expense.objects.filter(user=user).select_related("category").order_by("-date", "-created_at")
+    return [txn async for txn in qs[:5]]
 
-    sorted_all = sorted(all_months)
-    sorted_months = sorted_all[-6:] if len(sorted_all) > 6 else sorted_all  # last 6 months
-    line_labels = [m.strftime("%b %Y") for m in sorted_months]
-    line_income = [income_map.get(label, 0) for label in line_labels]
-    line_expense = [expense_map.get(label, 0) for label in line_labels]
 
-    context = {
-        "active_page": "dashboard",
-        "income_total": income_total,
-        "expense_total": expense_total,
-        "balance": balance,
-        "recent_transactions": recent_transactions,
-        # Chart data as JSON
-        "pie_labels": json.dumps(pie_labels),
-        "pie_values": json.dumps(pie_values),
-        "line_labels": json.dumps(line_labels),
-        "line_income": json.dumps(line_income),
-        "line_expense": json.dumps(line_expense),
-    }
-    return render(request, "dashboard/dashboard.html", context)
\ No newline at end of file
+@login_required
+async def dashboard_view(request):
+    user = await request.auser()
+    # Budget periods move with the calendar, so today is part of the key
+    today = date.today()
+    payload = await get_payload_cache().aget_or_compute(
+        "dashboard", user.pk, {"today": today}, lambda: _dashboard_payload(user, today),
+    )
+    context = {"active_page": "dashboard", **payload}
+    # Rendering may touch request.user (context processors), which is sync-only
+    return await sync_to_async(render)(request, "dashboard/dashboard.html", context)
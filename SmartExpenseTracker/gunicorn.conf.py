@@ -0,0 +1,15 @@
+"""Gunicorn settings, read from the project directory by default:
+
+    gunicorn SmartExpenseTracker.wsgi
+
+The hooks also apply to the ASGI app served through a uvicorn worker class.
+"""
+
+
+def post_worker_init(worker):
+    # The one place the Mongo client is warmed up: in each worker, once it
+    # has loaded the app (with or without --preload), never in the master
+    # and never in manage.py commands.
+    from transactions import mongo
+
+    mongo.start_warm_up()
@@ -1,7 +1,10 @@
 from django.contrib import admin
 
-from .models import Expense,Category
+from .models import Expense,Category,MongoOutbox,Budget,RecurringRule,FxRate
 
 admin.site.register(Expense)
 admin.site.register(Category)
-
+admin.site.register(MongoOutbox)
+admin.site.register(Budget)
+admin.site.register(RecurringRule)
+admin.site.register(FxRate)
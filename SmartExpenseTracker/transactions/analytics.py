@@ -0,0 +1,190 @@
+"""Vectorized spending insights for the reports page.
+
+load_daily() reads a user's DailyTotal rows for a window with one
+values_list() query and lays them out as NumPy arrays: a category x day
+expense matrix and a per-day income vector.  compute_insights() is array
+arithmetic on that frame:
+
+* monthly expense with month-over-month deltas and a 3-month rolling mean,
+* trailing 7- and 30-day mean daily spend,
+* per-category burn rate (mean daily spend over the trailing 30 days) and
+  an end-of-month projection from it.
+
+Amounts are read as integer minor units and become float64 rupees here;
+rows in a foreign currency are scaled by their month's rate (see
+transactions.fx) on the way in.
+Insights are rounded for display and never written back, so exact
+totals stay with the report engine.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+from . import fx
+from .fields import MINOR_UNITS, minor
+from .models import DailyTotal
+from .rollups import month_end, month_start
+
+HISTORY_MONTHS = 12  # completed months shown before the current one
+BURN_DAYS = 30
+ROLLING_MONTHS = 3
+
+
+@dataclass
+class DailyFrame:
+    start: date
+    categories: np.ndarray  # names, one per expense row
+    expense: np.ndarray  # (categories, days)
+    income: np.ndarray  # (days,)
+
+    @property
+    def days(self):
+        return self.income.shape[0]
+
+
+@dataclass
+class MonthInsight:
+    month: date
+    expense: float
+    change: float | None  # against the previous month
+    change_pct: float | None  # None when the previous month had no spending
+    rolling_mean: float
+
+
+@dataclass
+class CategoryBurn:
+    name: str
+    month_to_date: float
+    burn_rate: float  # per day, over the trailing BURN_DAYS
+    projected: float
+    last_month: float
+
+
+@dataclass
+class Insights:
+    month_to_date: float = 0.0
+    projected: float = 0.0
+    last_month: float = 0.0
+    avg_7: float = 0.0
+    avg_30: float = 0.0
+    # Oldest first, completed months only
+    months: list[MonthInsight] = field(default_factory=list)
+    # Largest projection first
+    categories: list[CategoryBurn] = field(default_factory=list)
+
+    @property
+    def projected_change_pct(self):
+        if not self.last_month:
+            return None
+        return round((self.projected - self.last_month) / self.last_month * 100, 1)
+
+
+def _months_back(month, count):
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def load_daily(user, start, end, category=None):
+    """``user``'s DailyTotal rows from ``start`` to ``end`` as a DailyFrame."""
+    days = (end - start).days + 1
+    qs = DailyTotal.objects.filter(user=user, date__gte=start, date__lte=end)
+    if category:
+        qs = qs.filter(category__name=category)
+    rows = list(qs.order_by().values_list(
+        "date", "category", "category__name", "currency", minor("income"), minor("expense"),
+    ))
+    if not rows:
+        return DailyFrame(start, np.array([], dtype=str), np.zeros((0, days)), np.zeros(days))
+
+    dates, ids, names, currencies, income, expense = zip(*rows)
+    offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.intp)
+    scale = np.full(len(rows), 1 / MINOR_UNITS)
+    converter = fx.Converter(fx.home_currency(user))
+    for n, (day, currency) in enumerate(zip(dates, currencies)):
+        if currency != converter.home:
+            scale[n] = float(converter.factor(currency, day)) / MINOR_UNITS
+    # Rows are keyed on the category id: an income and an expense category
+    # may share a name
+    category_ids, rows_index = np.unique(np.array(ids), return_inverse=True)
+    name_of = dict(zip(ids, names))
+    matrix = np.zeros((len(category_ids), days))
+    # A (date, category) cell has a row per currency, so they are added up
+    np.add.at(matrix, (rows_index, offsets), np.array(expense, dtype=np.float64) * scale)
+    income = np.bincount(offsets, weights=np.array(income, dtype=np.float64) * scale, minlength=days)
+    return DailyFrame(start, np.array([name_of[i] for i in category_ids]), matrix, income)
+
+
+def compute_insights(frame, today):
+    """Insights as of ``today`` from a frame that ends on ``today``.
+
+    The frame should start HISTORY_MONTHS + 1 months before the current
+    one, so the oldest shown month has a previous month to compare with.
+    """
+    first = np.datetime64(frame.start, "M")
+    month_starts = np.arange(first, np.datetime64(today, "M") + 1)
+    boundaries = (month_starts.astype("datetime64[D]") - np.datetime64(frame.start, "D")).astype(np.intp)
+
+    by_category = np.add.reduceat(frame.expense, boundaries, axis=1)
+    monthly = by_category.sum(axis=0)
+    daily = frame.expense.sum(axis=0)
+
+    # Month-over-month deltas and rolling means of the completed months
+    completed = monthly[:-1]
+    previous = np.concatenate(([np.nan], completed[:-1]))
+    change = completed - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(previous > 0, change / previous * 100, np.nan)
+    sums = np.concatenate(([0.0], np.cumsum(completed)))
+    index = np.arange(len(completed))
+    lo = np.maximum(index - ROLLING_MONTHS + 1, 0)
+    rolling = (sums[index + 1] - sums[lo]) / (index + 1 - lo)
+
+    # Burn rate and projection for the current month
+    remaining = (month_end(today) - today).days
+    burn = frame.expense[:, -BURN_DAYS:].sum(axis=1) / BURN_DAYS
+    month_to_date = by_category[:, -1]
+    projected = month_to_date + burn * remaining
+    last_month = by_category[:, -2]
+
+    order = np.argsort(-projected, kind="stable")
+    active = (month_to_date > 0) | (burn > 0) | (last_month > 0)
+    return Insights(
+        month_to_date=round(float(monthly[-1]), 2),
+        projected=round(float(projected.sum()), 2),
+        last_month=round(float(last_month.sum()), 2),
+        avg_7=round(float(daily[-7:].mean()), 2),
+        avg_30=round(float(daily[-30:].mean()), 2),
+        months=[
+            MonthInsight(
+                month=month_starts[i].astype("datetime64[D]").item(),
+                expense=round(float(completed[i]), 2),
+                change=None if np.isnan(change[i]) else round(float(change[i]), 2),
+                change_pct=None if np.isnan(change_pct[i]) else round(float(change_pct[i]), 1),
+                rolling_mean=round(float(rolling[i]), 2),
+            )
+            for i in range(1, len(completed))
+        ],
+        categories=[
+            CategoryBurn(
+                name=str(frame.categories[i]),
+                month_to_date=round(float(month_to_date[i]), 2),
+                burn_rate=round(float(burn[i]), 2),
+                projected=round(float(projected[i]), 2),
+                last_month=round(float(last_month[i]), 2),
+            )
+            for i in order if active[i]
+        ],
+    )
+
+
+def history_window(today):
+    """``(start, end)`` of the days compute_insights() needs as of ``today``."""
+    return _months_back(month_start(today), HISTORY_MONTHS + 1), today
+
+
+def insights(user, today=None, category=None):
+    """Spending insights for ``user`` as of ``today``, from one query."""
+    today = today or date.today()
+    start, end = history_window(today)
+    return compute_insights(load_daily(user, start, end, category), today)
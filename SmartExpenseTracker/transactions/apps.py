@@ -1,5 +1,23 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class TransactionsConfig(AppConfig):
     name = 'transactions'
+
+    def ready(self):
+        from . import signals
+        post_migrate.connect(signals.ensure_search_index, sender=self)
+
+        # WAL and the other SQLITE_PRAGMAS on every new SQLite connection
+        from . import pragmas
+        connection_created.connect(pragmas.apply_pragmas)
+
+        # Time every SQL query for the instrumentation middleware
+        from . import instrumentation
+        connection_created.connect(instrumentation.install_sql_timer)
+        for connection in connections.all(initialized_only=True):
+            instrumentation.install_sql_timer(connection=connection)
+
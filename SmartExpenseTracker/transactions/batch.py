@@ -0,0 +1,151 @@
+"""Apply many create/update/delete operations from one JSON request.
+
+Every operation is validated with the same rules as the add/edit forms.
+Invalid operations are reported and skipped; all valid ones are applied
+together in one transaction with one bulk_create, one bulk_update and
+one delete().  Their Mongo mirror writes are queued as two adjacent
+outbox rows (batch upsert + batch delete), which the drain worker sends
+in a single bulk_write.
+
+Operations look like::
+
+    {"op": "create", "ref": "tmp-1", "data": {"type": "expense", "amount": "12.50", ...}}
+    {"op": "update", "id": 42, "data": {"amount": "15"}}
+    {"op": "delete", "id": 43}
+
+``data`` uses the add-form field names; an update only needs the fields
+it changes.  ``ref`` is optional and echoed back in the result.
+"""
+import copy
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import caching, categories, outbox, rollups
+from .models import Expense
+from .validation import clean_transaction
+
+MAX_OPERATIONS = 500
+
+OPERATIONS = ("create", "update", "delete")
+
+UPDATE_FIELDS = ["transaction_type", "amount", "category", "description", "date", "payment_mode", "currency"]
+
+
+def _form_data(expense):
+    """An existing expense in add-form terms, as the base for partial updates."""
+    return {
+        "type": expense.transaction_type,
+        "amount": str(expense.amount),
+        "category": expense.category.name,
+        "description": expense.description,
+        "date": expense.date.isoformat(),
+        "payment": expense.payment_mode,
+        "currency": expense.currency,
+    }
+
+
+def _target_id(operation):
+    value = operation.get("id")
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValidationError("An id is required.")
+    return value
+
+
+def apply_batch(user, operations):
+    """Apply ``operations`` for ``user``; returns one result dict per operation."""
+    results = [{"index": i} for i in range(len(operations))]
+    for result, operation in zip(results, operations):
+        if isinstance(operation, dict) and "ref" in operation:
+            result["ref"] = operation["ref"]
+
+    def fail(index, message):
+        results[index].update(status="error", error=message)
+
+    targets = {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            fail(index, "Unknown operation.")
+        elif operation["op"] != "create":
+            try:
+                targets[index] = _target_id(operation)
+            except ValidationError as exc:
+                fail(index, exc.message)
+
+    with transaction.atomic():
+        existing = (
+            Expense.objects.select_for_update().select_related("user", "category")
+            .filter(user=user).in_bulk(set(targets.values()))
+        )
+        created, updated, previous, deleted = [], [], [], []
+        seen = set()
+        for index, operation in enumerate(operations):
+            if "status" in results[index]:
+                continue
+            op = operation["op"]
+            data = operation.get("data") or {}
+            if not isinstance(data, dict):
+                fail(index, "data must be an object.")
+                continue
+
+            if op == "create":
+                try:
+                    cleaned = clean_transaction(data)
+                except ValidationError as exc:
+                    fail(index, exc.message)
+                    continue
+                created.append((index, cleaned))
+                continue
+
+            expense = existing.get(targets[index])
+            if expense is None:
+                fail(index, "Transaction not found.")
+                continue
+            if expense.pk in seen:
+                fail(index, "Only one operation per transaction is allowed in a batch.")
+                continue
+            seen.add(expense.pk)
+
+            if op == "delete":
+                deleted.append((index, expense))
+                continue
+            try:
+                cleaned = clean_transaction({**_form_data(expense), **data})
+            except ValidationError as exc:
+                fail(index, exc.message)
+                continue
+            previous.append(copy.copy(expense))
+            updated.append((index, expense, cleaned))
+
+        # One lookup (and at most one insert) for every category named in the batch
+        categories.bind(user, [cleaned for _, cleaned in created] + [cleaned for _, _, cleaned in updated])
+        created = [(index, Expense(user=user, **cleaned)) for index, cleaned in created]
+        for _, expense, cleaned in updated:
+            for field, value in cleaned.items():
+                setattr(expense, field, value)
+        updated = [(index, expense) for index, expense, _ in updated]
+
+        new_rows = [expense for _, expense in created]
+        changed_rows = [expense for _, expense in updated]
+        doomed_rows = [expense for _, expense in deleted]
+
+        Expense.objects.bulk_create(new_rows)
+        Expense.objects.bulk_update(changed_rows, UPDATE_FIELDS)
+        if doomed_rows:
+            Expense.objects.filter(pk__in=[e.pk for e in doomed_rows]).delete()
+
+        rollups.record_many(previous + doomed_rows, -1)
+        rollups.record_many(new_rows + changed_rows)
+
+        if new_rows or changed_rows:
+            outbox.enqueue_upserts(new_rows + changed_rows)
+        if doomed_rows:
+            outbox.enqueue_deletes([e.pk for e in doomed_rows])
+        if new_rows or changed_rows:
+            # bulk_create/bulk_update send no signals (the delete() does)
+            caching.bump_version(user.pk)
+
+    for status, pairs in (("created", created), ("updated", updated), ("deleted", deleted)):
+        for index, expense in pairs:
+            results[index].update(status=status, id=expense.pk)
+    return results
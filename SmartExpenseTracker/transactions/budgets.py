@@ -0,0 +1,152 @@
+"""Per-category budgets with a running spent-to-date.
+
+Budget.spent is kept incrementally.  rollups.record_many() hands the
+expense side of every batch of Expense writes to apply_deltas(), which
+adds whatever falls in each matching budget's current period with one
+SELECT and at most one UPDATE per batch, in integer minor units.  Reading budget status is then
+a lookup of the user's Budget rows, never a SUM over Expense.
+
+A budget whose period has ended is re-based on the next status() read:
+period_start moves to the current period and spent is re-read from
+DailyTotal in the same UPDATE.  recompute() re-bases every budget from
+the Expense rows themselves, for repairs (the recompute_budgets command).
+
+Budgets are in the home currency.  The re-read sums home-currency spend
+in SQL and adds foreign spend converted per expense, as record_many()
+converts it, so the two ways of keeping spent agree to the paisa.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.db.models import BigIntegerField, Case, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from . import fx
+from .fields import minor
+from .models import Budget, DailyTotal, Expense
+
+
+def period_bounds(period, day):
+    """First and last day of the ``period`` (weekly/monthly/yearly) containing ``day``."""
+    if period == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == "yearly":
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+    return day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def apply_deltas(deltas):
+    """Add ``{(user_id, day, category_id): expense delta in minor units}`` to the matching budgets."""
+    grouped = {}
+    for (user_id, day, category), amount in deltas.items():
+        if amount:
+            grouped.setdefault((user_id, category), []).append((day, amount))
+    if not grouped:
+        return
+
+    matching = Budget.objects.filter(
+        user_id__in={user_id for user_id, _ in grouped},
+        category_id__in={category for _, category in grouped},
+    ).values_list("pk", "user_id", "category_id", "period", "period_start")
+    current = Q(pk__in=[])
+    changes = []
+    for pk, user_id, category, period, period_start in matching:
+        start, end = period_bounds(period, period_start)
+        change = sum(amount for day, amount in grouped.get((user_id, category), ()) if start <= day <= end)
+        if change:
+            # A concurrent re-base moves period_start; its re-read already counts this write
+            current |= Q(pk=pk, period_start=period_start)
+            changes.append(When(pk=pk, then=Value(change)))
+    if changes:
+        Budget.objects.filter(current).update(
+            spent=F("spent") + Case(*changes, output_field=BigIntegerField()),
+        )
+
+
+def _foreign_spent(budgets, start, end, converter):
+    """``When`` clauses adding the converted foreign spend of each of ``budgets``.
+
+    Foreign expenses are rare, so they are read row by row (one query,
+    usually empty) and converted one by one.
+    """
+    rows = (
+        Expense.objects.filter(
+            transaction_type="expense", date__gte=start, date__lte=end,
+            user_id__in=budgets.values("user_id"), category__in=budgets.values("category"),
+        )
+        .exclude(currency=converter.home)
+        .values_list("user_id", "category", "currency", "date", minor("amount"))
+    )
+    totals = {}
+    for user_id, category, currency, day, amount in rows:
+        key = (user_id, category)
+        totals[key] = totals.get(key, 0) + converter.to_home(amount, currency, day)
+    return [
+        When(user_id=user_id, category=category, then=Value(total))
+        for (user_id, category), total in totals.items() if total
+    ]
+
+
+def _spent(source, budgets, start, end, converter):
+    """Expression for the expense total between ``start`` and ``end`` of each of ``budgets``."""
+    if source is DailyTotal:
+        rows, amount = DailyTotal.objects.all(), "expense"
+    else:
+        rows, amount = Expense.objects.filter(transaction_type="expense"), "amount"
+    total = (
+        rows.filter(user_id=OuterRef("user_id"), category=OuterRef("category"),
+                    currency=converter.home, date__gte=start, date__lte=end)
+        .order_by().values("user_id").annotate(total=Sum(amount)).values("total")
+    )
+    # Home-currency spend is summed as stored minor units, never converted
+    spent = Coalesce(Subquery(total), Value(0), output_field=BigIntegerField())
+    foreign = _foreign_spent(budgets, start, end, converter)
+    if foreign:
+        spent = spent + Case(*foreign, default=Value(0), output_field=BigIntegerField())
+    return spent
+
+
+def _rebase(queryset, today, source):
+    converter = fx.Converter()
+    updated = 0
+    for period, _ in Budget.PERIOD_CHOICES:
+        start, end = period_bounds(period, today)
+        budgets = queryset.filter(period=period)
+        updated += budgets.update(period_start=start, spent=_spent(source, budgets, start, end, converter))
+    return updated
+
+
+def create(user, category, period, limit, today=None):
+    """A new budget on the Category ``category``, its current spent-to-date filled in."""
+    start, _ = period_bounds(period, today or date.today())
+    budget = Budget.objects.create(user=user, category=category, period=period, limit=limit,
+                                   period_start=start)
+    _rebase(Budget.objects.filter(pk=budget.pk), today or date.today(), DailyTotal)
+    budget.refresh_from_db(fields=["spent"])
+    return budget
+
+
+def status(user, today=None):
+    """``user``'s budgets for the current periods, the most used first."""
+    today = today or date.today()
+    budgets = list(Budget.objects.filter(user=user).select_related("category"))
+    stale = {b.period for b in budgets if b.period_start != period_bounds(b.period, today)[0]}
+    if stale:
+        converter = fx.Converter()
+        for period in stale:
+            start, end = period_bounds(period, today)
+            stale_budgets = Budget.objects.filter(user=user, period=period).exclude(period_start=start)
+            stale_budgets.update(
+                period_start=start, spent=_spent(DailyTotal, stale_budgets, start, end, converter),
+            )
+        budgets = list(Budget.objects.filter(user=user).select_related("category"))
+    return sorted(budgets, key=lambda b: b.percent_used, reverse=True)
+
+
+def recompute(user_ids=None, today=None):
+    """Re-base every budget (or ``user_ids``' budgets) from Expense; returns the count."""
+    budgets = Budget.objects.all()
+    if user_ids:
+        budgets = budgets.filter(user_id__in=user_ids)
+    return _rebase(budgets, today or date.today(), Expense)
@@ -0,0 +1,222 @@
+"""Per-user versioned cache for dashboard and report payloads.
+
+Keys are ``(view, user, data version, filter params)``.  Expense and
+Category writes bump the user's DataVersion through signals, so a stale
+payload can never be served and entries are never deleted explicitly;
+they simply age out through LRU or TTL eviction.
+
+Configured by ``settings.TRANSACTIONS_PAYLOAD_CACHE``::
+
+    {"BACKEND": "locmem", "MAX_ENTRIES": 1024, "TTL": 300}
+    {"BACKEND": "django", "ALIAS": "default", "TTL": 300}
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+_MISSING = object()
+
+
+def _fresh_version():
+    # Seeding from the clock keeps versions from ever repeating, even if the
+    # DataVersion row is lost (user re-created, database restored).
+    return time.time_ns()
+
+
+def current_version(user_id):
+    version = DataVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+    if version is not None:
+        return version
+    try:
+        with transaction.atomic():
+            return DataVersion.objects.create(user_id=user_id, version=_fresh_version()).version
+    except IntegrityError:
+        return DataVersion.objects.get(user_id=user_id).version
+
+
+async def acurrent_version(user_id):
+    version = await DataVersion.objects.filter(user_id=user_id).values_list("version", flat=True).afirst()
+    if version is not None:
+        return version
+    # First request for this user: create the row on the sync path
+    return await sync_to_async(current_version)(user_id)
+
+
+def bump_version(user_id):
+    if not DataVersion.objects.filter(user_id=user_id).update(version=F("version") + 1):
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(user_id=user_id, version=_fresh_version())
+        except IntegrityError:
+            DataVersion.objects.filter(user_id=user_id).update(version=F("version") + 1)
+
+
+def bump_versions(user_ids=None):
+    """Invalidate many users at once, for bulk paths that bypass signals."""
+    versions = DataVersion.objects.all()
+    if user_ids is not None:
+        versions = versions.filter(user_id__in=user_ids)
+    # Users without a row have nothing cached under any version yet.
+    versions.update(version=F("version") + 1)
+
+
+class LocMemLRUBackend:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    # Purely in-memory, so safe to call straight from the event loop
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Delegates to one of the project's CACHES (eviction is the backend's)."""
+
+    def __init__(self, alias="default", ttl=300):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(key, _MISSING)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.ttl)
+
+    async def aget(self, key):
+        return await self.cache.aget(key, _MISSING)
+
+    async def aset(self, key, value):
+        await self.cache.aset(key, value, self.ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class PayloadCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    def _count(self, counter, view):
+        with self._lock:
+            counter[view] = counter.get(view, 0) + 1
+
+    def key(self, view, user_id, version, params):
+        digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"payload:{view}:{user_id}:{version}:{digest}"
+
+    def get_or_compute(self, view, user_id, params, compute):
+        key = self.key(view, user_id, current_version(user_id), params)
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self._count(self.hits, view)
+            return value
+        self._count(self.misses, view)
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    async def aget_or_compute(self, view, user_id, params, compute):
+        """Async get_or_compute(); ``compute`` is a coroutine function."""
+        key = self.key(view, user_id, await acurrent_version(user_id), params)
+        value = await self.backend.aget(key)
+        if value is not _MISSING:
+            self._count(self.hits, view)
+            return value
+        self._count(self.misses, view)
+        value = await compute()
+        await self.backend.aset(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            views = sorted(set(self.hits) | set(self.misses))
+            return {view: {"hits": self.hits.get(view, 0), "misses": self.misses.get(view, 0)}
+                    for view in views}
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+def _build_cache():
+    config = {"BACKEND": "locmem", "MAX_ENTRIES": 1024, "TTL": 300}
+    config.update(getattr(settings, "TRANSACTIONS_PAYLOAD_CACHE", {}))
+    if config["BACKEND"] == "django":
+        backend = DjangoCacheBackend(config.get("ALIAS", "default"), config["TTL"])
+    else:
+        backend = LocMemLRUBackend(config["MAX_ENTRIES"], config["TTL"])
+    return PayloadCache(backend)
+
+
+_payload_cache = None
+_payload_cache_lock = threading.Lock()
+
+
+def get_payload_cache():
+    global _payload_cache
+    if _payload_cache is None:
+        with _payload_cache_lock:
+            if _payload_cache is None:
+                _payload_cache = _build_cache()
+    return _payload_cache
+
+
+def prometheus_metrics():
+    lines = [
+        "# HELP payload_cache_hits_total Dashboard/report payloads served from cache.",
+        "# TYPE payload_cache_hits_total counter",
+    ]
+    stats = get_payload_cache().stats()
+    lines += [f'payload_cache_hits_total{{view="{view}"}} {s["hits"]}' for view, s in stats.items()]
+    lines += [
+        "# HELP payload_cache_misses_total Dashboard/report payloads computed on a miss.",
+        "# TYPE payload_cache_misses_total counter",
+    ]
+    lines += [f'payload_cache_misses_total{{view="{view}"}} {s["misses"]}' for view, s in stats.items()]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,45 @@
+"""Resolving the category names that forms, imports and the batch API send.
+
+Expense.category is a foreign key, while every write path receives
+``(name, type)`` pairs from clean_transaction().  resolve() maps a whole
+batch of pairs to Category rows with one lookup, creating the missing
+categories with one bulk_create, so a batch costs the same few queries
+however many rows it has.
+"""
+from .models import Category
+
+
+def resolve(user, pairs, known=None):
+    """``{(name, type): Category}`` for ``pairs``, creating ``user``'s missing categories.
+
+    ``known`` is a dict of pairs resolved earlier; it is filled in place,
+    so callers writing many batches look each category up only once.
+    """
+    known = {} if known is None else known
+    wanted = set(pairs) - known.keys()
+
+    def lookup():
+        rows = Category.objects.filter(user=user, name__in={name for name, _ in wanted})
+        known.update({(c.name, c.type): c for c in rows if (c.name, c.type) in wanted})
+
+    if wanted:
+        lookup()
+        missing = wanted - known.keys()
+        if missing:
+            Category.objects.bulk_create(
+                [Category(user=user, name=name, type=kind) for name, kind in missing],
+                ignore_conflicts=True,
+            )
+            lookup()
+    return known
+
+
+def bind(user, rows, known=None):
+    """Swap the category name in each clean_transaction() dict for its Category.
+
+    Returns ``rows``; see resolve() for ``known``.
+    """
+    resolved = resolve(user, {(row["category"], row["transaction_type"]) for row in rows}, known)
+    for row in rows:
+        row["category"] = resolved[row["category"], row["transaction_type"]]
+    return rows
@@ -0,0 +1,8 @@
+"""Template context available on every page."""
+from . import fx
+
+
+def currency(request):
+    """The home currency every total is shown in, and its symbol."""
+    home = fx.home_currency(getattr(request, "user", None))
+    return {"home_currency": home, "currency_symbol": fx.symbol(home)}
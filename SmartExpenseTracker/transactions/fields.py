@@ -0,0 +1,83 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.functions import Cast
+
+MINOR_UNITS = 100  # paise per rupee
+DECIMAL_PLACES = 2
+
+
+def to_minor(value):
+    """Integer minor units for an amount in major units (Decimal, str or int)."""
+    amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    return int(amount.scaleb(DECIMAL_PLACES).to_integral_value(ROUND_HALF_UP))
+
+
+def from_minor(value):
+    """The two-place Decimal for ``value`` minor units."""
+    return Decimal(value).scaleb(-DECIMAL_PLACES)
+
+
+def format_minor(value):
+    """``value`` minor units as the text ``str(from_minor(value))`` would give."""
+    sign, value = ("-", -value) if value < 0 else ("", value)
+    return f"{sign}{value // MINOR_UNITS}.{value % MINOR_UNITS:02d}"
+
+
+def minor(expression):
+    """``expression`` over a MoneyField read as raw integer minor units.
+
+    For aggregates and values_list() reads that stay integer until they
+    are serialized, skipping the per-value Decimal conversion.
+    """
+    if isinstance(expression, str):
+        expression = models.F(expression)
+    if getattr(expression, "contains_aggregate", False):
+        # PostgreSQL sums a bigint column to a numeric, which would come
+        # back as a Decimal; SQLite's is already an integer
+        return Cast(expression, models.BigIntegerField())
+    return models.ExpressionWrapper(expression, output_field=models.BigIntegerField())
+
+
+class MoneyField(models.BigIntegerField):
+    """An amount stored as integer minor units and read as a two-place Decimal.
+
+    Sums over it are exact integer arithmetic in the database on every
+    backend; wrap them in minor() to keep the integer on the Python side.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else from_minor(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return Decimal(str(value)).quantize(Decimal(1).scaleb(-DECIMAL_PLACES), ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValidationError(self.error_messages["invalid"], code="invalid", params={"value": value})
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        return None if value is None else to_minor(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            "form_class": forms.DecimalField, "decimal_places": DECIMAL_PLACES, **kwargs,
+        })
+
+
+class SearchDocumentField(models.TextField):
+    """The hidden FTS5 column named after its table; supports ``__match``."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
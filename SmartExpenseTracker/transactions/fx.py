@@ -0,0 +1,139 @@
+"""Currencies and conversion to the home currency.
+
+Every Expense is kept in the currency it was paid in.  Totals are shown
+in ``settings.HOME_CURRENCY`` using the FxRate table, which holds the
+value of one unit of a currency in the home currency and is filled from
+a local CSV file by load_rates() (the load_fx_rates command); nothing is
+fetched over the network.
+
+An amount is converted at the rate in effect on the first day of its
+month.  The rollups and daily totals are grouped per currency in SQL,
+so a report converts one subtotal per (month, currency) instead of
+every row, and a Converter looks each rate up once: home-currency
+amounts cost no lookup at all, and each foreign currency's rates are
+read with one query the first time it is seen.
+"""
+import csv
+from bisect import bisect_right
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import caching
+from .models import FxRate
+
+ONE = Decimal(1)
+RATE_PLACES = Decimal("0.00000001")  # FxRate.rate has 8 decimal places
+
+SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+# Currency codes with at least one FxRate row, as last read by this process
+_known = set()
+
+
+def home_currency(user=None):
+    """The currency ``user``'s totals are shown in; one per deployment for now."""
+    return settings.HOME_CURRENCY
+
+
+def symbol(currency):
+    return SYMBOLS.get(currency, f"{currency} ")
+
+
+def currencies():
+    """The home currency and every currency with rates, home first."""
+    _known.update(FxRate.objects.values_list("currency", flat=True).distinct())
+    return [home_currency()] + sorted(_known - {home_currency()})
+
+
+def is_supported(currency):
+    """Whether amounts in ``currency`` can be converted; queries only on a miss."""
+    if currency == home_currency() or currency in _known:
+        return True
+    if FxRate.objects.filter(currency=currency).exists():
+        _known.add(currency)
+        return True
+    return False
+
+
+def clean_currency(value):
+    """The upper-case ISO 4217 code in ``value`` (home if blank); ValidationError if unusable."""
+    currency = (value or "").strip().upper() or home_currency()
+    if len(currency) != 3 or not currency.isalpha():
+        raise ValidationError("Please choose a valid currency.")
+    if not is_supported(currency):
+        raise ValidationError(f"No exchange rate is loaded for {currency}.")
+    return currency
+
+
+class MissingRate(LookupError):
+    pass
+
+
+class Converter:
+    """Converts minor-unit amounts to the home currency, each rate looked up once."""
+
+    def __init__(self, home=None):
+        self.home = home or home_currency()
+        self._series = {}  # currency -> (dates, rates), oldest first
+        self._factors = {}  # (currency, month) -> Decimal
+
+    def _rates(self, currency):
+        if currency not in self._series:
+            rows = list(FxRate.objects.filter(currency=currency).order_by("date").values_list("date", "rate"))
+            if not rows:
+                raise MissingRate(currency)
+            self._series[currency] = tuple(zip(*rows))
+        return self._series[currency]
+
+    def factor(self, currency, day):
+        """Home-currency value of one unit of ``currency`` for ``day``'s month."""
+        if currency == self.home:
+            return ONE
+        key = (currency, day.replace(day=1))
+        if key not in self._factors:
+            dates, rates = self._rates(currency)
+            # The latest rate on or before the 1st, else the earliest there is
+            self._factors[key] = rates[max(bisect_right(dates, key[1]) - 1, 0)]
+        return self._factors[key]
+
+    def to_home(self, minor, currency, day):
+        """``minor`` units of ``currency`` as home-currency minor units."""
+        if currency == self.home or not minor:
+            return minor
+        return int((minor * self.factor(currency, day)).to_integral_value(ROUND_HALF_UP))
+
+
+def _parse_rate_row(row):
+    try:
+        day = datetime.strptime(row["date"].strip(), "%Y-%m-%d").date()
+        currency = row["currency"].strip().upper()
+        rate = Decimal(row["rate"].strip()).quantize(RATE_PLACES, ROUND_HALF_UP)
+    except (KeyError, AttributeError, ValueError, InvalidOperation):
+        raise ValidationError(f"Invalid rate row: {row}")
+    if len(currency) != 3 or not currency.isalpha() or not rate.is_finite() or rate <= 0:
+        raise ValidationError(f"Invalid rate row: {row}")
+    return FxRate(date=day, currency=currency, rate=rate)
+
+
+def load_rates(stream, batch_size=1000):
+    """Upsert the ``date,currency,rate`` CSV rows in ``stream``; returns the row count.
+
+    ``rate`` is the value of one unit of ``currency`` in the home currency.
+    Cached report payloads of every user are invalidated.
+    """
+    rates = [_parse_rate_row(row) for row in csv.DictReader(stream)]
+    if any(rate.currency == home_currency() for rate in rates):
+        raise ValidationError(f"Rates for the home currency {home_currency()} are always 1.")
+    with transaction.atomic():
+        FxRate.objects.bulk_create(
+            rates, batch_size=batch_size, update_conflicts=True,
+            unique_fields=["currency", "date"], update_fields=["rate"],
+        )
+        caching.bump_versions()
+    _known.update(rate.currency for rate in rates)
+    return len(rates)
+
@@ -0,0 +1,168 @@
+"""Bulk CSV / bank-statement import.
+
+The file is read as a stream, one row at a time.  Each row goes through
+the same clean_transaction() rules as the add form; rows that fail are
+skipped and reported by line number.  Valid rows are written in batches,
+each batch in its own transaction:
+
+* categories the user does not have yet are created with one bulk_create,
+* the expenses with one bulk_create, indexed for search in one pass,
+* the monthly rollup with one additive upsert statement,
+* the Mongo mirror with a single batch-upsert outbox row, which the
+  drain_mongo_outbox worker sends to Mongo as one bulk_write.
+
+Either an ``amount`` column or bank-style ``debit``/``credit`` columns are
+accepted; with the latter a debit is an expense and a credit an income,
+and the column left blank or zero is ignored.
+"""
+import csv
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import caching, categories, outbox, rollups, search
+from .models import Category, Expense
+from .validation import clean_transaction
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+
+# Normalised header -> clean_transaction() key
+COLUMN_ALIASES = {
+    "type": ("type", "transaction type", "transaction_type"),
+    "amount": ("amount",),
+    "debit": ("debit", "withdrawal", "withdrawal amt", "withdrawal amount", "dr"),
+    "credit": ("credit", "deposit", "deposit amt", "deposit amount", "cr"),
+    "category": ("category",),
+    "description": ("description", "narration", "details", "particulars", "remarks"),
+    "date": ("date", "transaction date", "txn date", "value date"),
+    "payment": ("payment", "payment mode", "payment_mode", "mode"),
+    "currency": ("currency", "ccy", "currency code"),
+}
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    categories_created: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    # (line, error) where the file stopped parsing; rows before it are kept
+    aborted: tuple[int, str] | None = None
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+
+def map_columns(header):
+    """Return {key: column index} for the recognised columns of ``header``."""
+    normalized = [cell.strip().lower() for cell in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(normalized):
+            if name in aliases:
+                columns[key] = index
+                break
+    if "date" not in columns or not ({"amount", "debit", "credit"} & columns.keys()):
+        raise ValidationError("The file needs a date column and an amount (or debit/credit) column.")
+    return columns
+
+
+def _holds_amount(value):
+    """Whether a debit/credit cell is the row's amount; many banks fill the other with 0.00."""
+    try:
+        return Decimal(value.replace(",", "")) != 0
+    except InvalidOperation:
+        return bool(value)  # not a number: clean_transaction() reports it
+
+
+def _row_data(row, columns, defaults):
+    def cell(key):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    data = {
+        key: cell(key)
+        for key in ("type", "amount", "category", "description", "date", "payment", "currency")
+    }
+    if not data["amount"]:
+        debit, credit = cell("debit"), cell("credit")
+        if _holds_amount(debit):
+            data["amount"], data["type"] = debit, data["type"] or "expense"
+        elif _holds_amount(credit):
+            data["amount"], data["type"] = credit, data["type"] or "income"
+    for key, value in defaults.items():
+        data[key] = data[key] or value
+    return data
+
+
+def _write_batch(user, rows, known_categories, result):
+    with transaction.atomic():
+        result.categories_created += len(
+            {(row["category"], row["transaction_type"]) for row in rows} - known_categories.keys()
+        )
+        batch = [Expense(user=user, **row) for row in categories.bind(user, rows, known_categories)]
+        with search.deferred_fts_inserts(transaction.get_connection()):
+            Expense.objects.bulk_create(batch)
+        rollups.record_many(batch)
+        outbox.enqueue_upserts(batch)
+        # bulk_create sends no signals, so invalidate cached payloads here
+        caching.bump_version(user.pk)
+    result.imported += len(batch)
+
+
+def _rows(reader, result):
+    """Yield ``(line, row)`` up to the end or the first line csv cannot parse."""
+    try:
+        for line_no, row in enumerate(reader, start=2):
+            yield line_no, row
+    except csv.Error as exc:
+        result.aborted = (reader.line_num, str(exc))
+
+
+def import_csv(user, stream, batch_size=None, default_type="expense",
+               default_category="", default_payment=""):
+    """Import the CSV text ``stream`` for ``user``; returns an ImportResult.
+
+    Raises ValidationError if the file has no usable header row.  A line
+    the csv module cannot parse (e.g. a field over its size limit) ends the
+    import there, with the rows before it imported and ``aborted`` set.
+    """
+    batch_size = batch_size or getattr(settings, "TRANSACTIONS_IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    defaults = {"type": default_type, "category": default_category, "payment": default_payment}
+    started = time.perf_counter()
+    result = ImportResult()
+
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        raise ValidationError("The file is empty.")
+    columns = map_columns(header)
+
+    known_categories = {(c.name, c.type): c for c in Category.objects.filter(user=user)}
+    batch = []
+    for line_no, row in _rows(reader, result):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            cleaned = clean_transaction(_row_data(row, columns, defaults))
+        except ValidationError as exc:
+            result.skipped += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append((line_no, exc.message))
+            continue
+        batch.append(cleaned)
+        if len(batch) >= batch_size:
+            _write_batch(user, batch, known_categories, result)
+            batch = []
+    if batch:
+        _write_batch(user, batch, known_categories, result)
+
+    result.elapsed = time.perf_counter() - started
+    return result
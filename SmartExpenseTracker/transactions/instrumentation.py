@@ -0,0 +1,314 @@
+"""Per-request performance instrumentation.
+
+PerformanceMiddleware measures each request and files the numbers under
+the resolved URL name (e.g. ``transactions:reports``):
+
+* SQL query count and time, from an execute_wrapper that is installed on
+  every database connection as it is created,
+* Mongo command count and time, from MongoCommandTimer (a pymongo
+  CommandListener registered through ``MONGO["EVENT_LISTENERS"]``),
+* template render time, from the TimedDjangoTemplates backend,
+* any block wrapped in ``timed(name)``, and the total time.
+
+The numbers of the current request live in a context variable, so they
+follow a request into sync_to_async() threads.  Every response gets a
+``Server-Timing`` header; totals and a latency histogram per view are
+kept in-process (``stats``) and served by the request_metrics endpoint.
+
+Configured by ``settings.REQUEST_INSTRUMENTATION``::
+
+    {"ENABLED": True, "SERVER_TIMING": True,
+     "QUERY_BUDGETS": {"transactions:reports": 4}, "ENFORCE_BUDGETS": False}
+
+A view that runs more SQL queries than its budget logs a warning, or
+raises QueryBudgetExceeded when ENFORCE_BUDGETS is on (as in the tests).
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "QUERY_BUDGETS": {},
+    "ENFORCE_BUDGETS": False,
+}
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def instrumentation_settings():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "REQUEST_INSTRUMENTATION", {}))
+    return config
+
+
+class RequestMetrics:
+    """What one request spent.  Updated from one thread at a time: sync code
+    of an async request runs serially on its thread-sensitive executor."""
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.timings = {}
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        parts = [
+            f'sql;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_queries} queries"',
+            f'mongo;dur={self.mongo_seconds * 1000:.1f};desc="{self.mongo_commands} commands"',
+        ]
+        parts += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request under ``name``."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add_timing(name, time.perf_counter() - started)
+
+
+# ── SQL ──
+def sql_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_queries += 1
+        metrics.sql_seconds += time.perf_counter() - started
+
+
+def install_sql_timer(sender=None, connection=None, **kwargs):
+    """connection_created receiver; also safe to call on an open connection."""
+    if sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_timer)
+
+
+# ── Mongo ──
+class MongoCommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.mongo_commands += 1
+            metrics.mongo_seconds += event.duration_micros / 1_000_000
+
+
+# ── Templates ──
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return self._template.render(context, request)
+
+
+# ── Aggregates ──
+class ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.seconds = 0.0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.template_seconds = 0.0
+        self.max_sql_queries = 0
+
+    def observe(self, metrics, total):
+        self.requests += 1
+        self.buckets[bisect_left(BUCKETS, total)] += 1
+        self.seconds += total
+        self.sql_queries += metrics.sql_queries
+        self.sql_seconds += metrics.sql_seconds
+        self.mongo_commands += metrics.mongo_commands
+        self.mongo_seconds += metrics.mongo_seconds
+        self.template_seconds += metrics.timings.get("template", 0.0)
+        self.max_sql_queries = max(self.max_sql_queries, metrics.sql_queries)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if past the last)."""
+        rank = q * self.requests
+        seen = 0
+        for bound, count in zip(BUCKETS + (None,), self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def summary(self):
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "mean_ms": round(self.seconds / n * 1000, 3),
+            "p50_le_ms": _ms(self.quantile(0.5)),
+            "p95_le_ms": _ms(self.quantile(0.95)),
+            "p99_le_ms": _ms(self.quantile(0.99)),
+            "sql_queries_mean": round(self.sql_queries / n, 2),
+            "sql_queries_max": self.max_sql_queries,
+            "sql_ms_mean": round(self.sql_seconds / n * 1000, 3),
+            "mongo_commands_mean": round(self.mongo_commands / n, 2),
+            "mongo_ms_mean": round(self.mongo_seconds / n * 1000, 3),
+            "template_ms_mean": round(self.template_seconds / n * 1000, 3),
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+class RequestStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, metrics, total):
+        with self._lock:
+            self.views.setdefault(view, ViewStats()).observe(metrics, total)
+
+    def summary(self):
+        with self._lock:
+            return {view: stats.summary() for view, stats in sorted(self.views.items())}
+
+    def clear(self):
+        with self._lock:
+            self.views.clear()
+
+    def prometheus_metrics(self):
+        counters = [
+            ("request_sql_queries_total", "sql_queries"),
+            ("request_sql_seconds_total", "sql_seconds"),
+            ("request_mongo_commands_total", "mongo_commands"),
+            ("request_mongo_seconds_total", "mongo_seconds"),
+            ("request_template_seconds_total", "template_seconds"),
+        ]
+        with self._lock:
+            views = sorted(self.views.items())
+            lines = ["# TYPE request_duration_seconds histogram"]
+            for view, stats in views:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), stats.buckets):
+                    cumulative += count
+                    lines.append(f'request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+                lines.append(f'request_duration_seconds_sum{{view="{view}"}} {stats.seconds:.6f}')
+                lines.append(f'request_duration_seconds_count{{view="{view}"}} {stats.requests}')
+            for metric, attr in counters:
+                lines.append(f"# TYPE {metric} counter")
+                lines += [f'{metric}{{view="{view}"}} {getattr(stats, attr):g}' for view, stats in views]
+        return "\n".join(lines) + "\n"
+
+
+stats = RequestStats()
+
+
+# ── Middleware ──
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = instrumentation_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - started)
+
+    def _finish(self, request, response, metrics, total):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        stats.observe(view, metrics, total)
+
+        config = instrumentation_settings()
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = metrics.server_timing(total)
+
+        budget = config["QUERY_BUDGETS"].get(view)
+        if budget is not None and metrics.sql_queries > budget:
+            message = f"{view} ran {metrics.sql_queries} SQL queries (budget {budget})"
+            if config["ENFORCE_BUDGETS"]:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
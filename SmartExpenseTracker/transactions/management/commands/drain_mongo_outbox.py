@@ -0,0 +1,55 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from pymongo.errors import PyMongoError
+
+from transactions import outbox
+from transactions.mongo import get_transactions_collection
+
+
+class Command(BaseCommand):
+    help = "Replay the Mongo outbox into the Transactions collection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-attempts", type=int, default=10,
+                            help="Park an entry Mongo keeps rejecting after this many tries.")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--max-backoff", type=float, default=60.0,
+                            help="Upper bound in seconds for the retry backoff.")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain until empty (or the first error) and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        failures = 0
+        sent = 0
+
+        while True:
+            try:
+                count = outbox.drain_batch(
+                    get_transactions_collection(), batch_size, options["max_attempts"],
+                )
+            except PyMongoError as exc:
+                outbox.record_failure(exc, batch_size)
+                if options["once"]:
+                    raise
+                failures += 1
+                delay = min(options["max_backoff"], 0.5 * 2 ** failures)
+                delay += random.uniform(0, delay / 10)
+                self.stderr.write(f"Mongo unavailable ({exc}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            failures = 0
+            sent += count
+            if count:
+                self.stdout.write(f"Mirrored {count} change(s).")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox drained; {sent} change(s) mirrored."))
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import synthetic
+
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def row_count(value):
+    """Parse 1000, 100k or 1M."""
+    value = value.strip().lower()
+    try:
+        if value[-1:] in SUFFIXES:
+            return int(float(value[:-1]) * SUFFIXES[value[-1]])
+        return int(value)
+    except ValueError:
+        raise CommandError(f"Invalid row count: {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with categories and a realistic, seasonal "
+        "transaction history (for demos, load tests and benchmarks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1)
+        parser.add_argument("--rows", default="1k", help="Rows per user: 1000, 100k, 1M, ...")
+        parser.add_argument("--days", type=int, default=730, help="History length, ending today.")
+        parser.add_argument("--prefix", default="demo", help="Usernames are <prefix><n>.")
+        parser.add_argument("--password", default="demo-password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--mirror", action="store_true",
+                            help="Also queue the rows for the Mongo mirror.")
+
+    def handle(self, *args, **options):
+        rows = row_count(options["rows"])
+        for n in range(1, options["users"] + 1):
+            username = f"{options['prefix']}{n}"
+            user, created = User.objects.get_or_create(username=username)
+            if created:
+                user.set_password(options["password"])
+                user.save()
+            written = synthetic.populate(
+                user, rows, days=options["days"], seed=options["seed"] + n,
+                batch_size=options["batch_size"], mirror=options["mirror"],
+            )
+            state = "created" if created else "existing user"
+            self.stdout.write(f"{username} ({state}): {written:,} transaction(s).")
+        self.stdout.write(self.style.SUCCESS("Synthetic data generated."))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import budgets, fx
+from transactions.models import Expense
+
+
+class Command(BaseCommand):
+    help = "Load exchange rates (date,currency,rate rows) from a local CSV file into the FX rate table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default=settings.FX_RATES_FILE,
+            help="CSV file with date,currency,rate columns (default settings.FX_RATES_FILE).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8") as stream:
+                loaded = fx.load_rates(stream)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+        except ValidationError as exc:
+            raise CommandError(exc.message)
+        # Budget spend was converted at the rates known when it was written
+        user_ids = list(
+            Expense.objects.exclude(currency=fx.home_currency()).values_list("user_id", flat=True).distinct()
+        )
+        rebased = budgets.recompute(user_ids) if user_ids else 0
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} rate(s); re-based {rebased} budget(s)."))
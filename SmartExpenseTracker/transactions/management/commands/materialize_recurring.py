@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from transactions import recurring
+
+
+class Command(BaseCommand):
+    help = "Write every active recurring rule's due occurrences as transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until", type=date.fromisoformat,
+            help="Materialize occurrences up to this date (YYYY-MM-DD, default today).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=recurring.DEFAULT_CHUNK_SIZE,
+                            help="Rules read and committed per transaction.")
+        parser.add_argument("--batch-size", type=int, default=recurring.DEFAULT_BATCH_SIZE,
+                            help="Transactions written per bulk insert.")
+        parser.add_argument("--max-per-rule", type=int, default=recurring.MAX_OCCURRENCES_PER_PASS,
+                            help="Occurrences written per rule before moving on to the next one.")
+
+    def handle(self, *args, **options):
+        result = recurring.materialize(
+            until=options["until"], chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"], max_per_rule=options["max_per_rule"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {result.created} occurrence(s) from {result.rules} rule visit(s) "
+            f"in {result.elapsed:.2f}s ({result.skipped} already existed)."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from transactions import budgets
+
+
+class Command(BaseCommand):
+    help = "Recompute every budget's spent-to-date for its current period from the Expense rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids",
+            help="Only recompute this user id's budgets (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        updated = budgets.recompute(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {updated} budget(s)."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from transactions.mongo import get_transactions_collection
+from transactions.reconcile import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the Mongo Transactions mirror with the Expense table and repair "
+        "any drift. Run it with the outbox drained so queued changes are not "
+        "reported as drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report differences without writing to Mongo.")
+
+    def handle(self, *args, **options):
+        stats = reconcile(
+            get_transactions_collection(),
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+        )
+        verb = "Would repair" if options["dry_run"] else "Repaired"
+        self.stdout.write(
+            f"Scanned {stats.rows} row(s) and {stats.documents} document(s) in "
+            f"{stats.chunks} chunk(s); {stats.chunks_skipped} identical chunk(s) skipped."
+        )
+        self.stdout.write(
+            f"{verb}: {stats.inserted} missing, {stats.updated} changed, "
+            f"{stats.deleted} orphaned."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats.elapsed:.2f}s, {stats.rows_per_second:,.0f} rows/sec."
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+
+from transactions import pragmas
+
+
+class Command(BaseCommand):
+    help = "Refresh SQLite's planner statistics (PRAGMA optimize) and checkpoint its write-ahead log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--checkpoint", choices=pragmas.CHECKPOINT_MODES, default="TRUNCATE",
+                            help="wal_checkpoint mode; TRUNCATE also shrinks the -wal file to zero.")
+        parser.add_argument("--interval", type=float,
+                            help="Repeat every this many seconds instead of running once (e.g. 3600).")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                busy, log, checkpointed = pragmas.maintain(options["database"], options["checkpoint"])
+            except ImproperlyConfigured as exc:
+                raise CommandError(str(exc))
+            except OperationalError as exc:
+                # Locked past busy_timeout; the next run catches up
+                if options["interval"] is None:
+                    raise CommandError(str(exc))
+                self.stderr.write(f"Maintenance skipped: {exc}")
+            else:
+                message = f"Optimized; checkpointed {checkpointed} of {log} WAL page(s)"
+                if log < 0:
+                    self.stdout.write(self.style.WARNING("Optimized; the database is not in WAL mode."))
+                elif busy:
+                    self.stdout.write(self.style.WARNING(f"{message} (blocked by open transactions)."))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{message}."))
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
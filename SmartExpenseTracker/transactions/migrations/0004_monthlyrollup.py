@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Lower, TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    Expense = apps.get_model('transactions', 'Expense')
+    MonthlyRollup = apps.get_model('transactions', 'MonthlyRollup')
+    grouped = (
+        Expense.objects.annotate(month=TruncMonth('date'), ttype=Lower('transaction_type'))
+        .values('user_id', 'month', 'ttype', 'category', 'payment_mode')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(
+                user_id=row['user_id'],
+                month=row['month'],
+                transaction_type=row['ttype'],
+                category=row['category'],
+                payment_mode=row['payment_mode'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in grouped.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_alter_expense_category_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('transaction_type', models.CharField(max_length=10)),
+                ('category', models.CharField(max_length=50)),
+                ('payment_mode', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'transaction_type', 'category', 'payment_mode'), name='unique_monthly_rollup')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
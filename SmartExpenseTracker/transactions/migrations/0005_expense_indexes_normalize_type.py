@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def normalize_transaction_type(apps, schema_editor):
+    Expense = apps.get_model('transactions', 'Expense')
+    Expense.objects.update(transaction_type=Lower('transaction_type'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_monthlyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_transaction_type, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='expense',
+            name='transaction_type',
+            field=models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], default='expense', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'transaction_type', 'date'], name='expense_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'category'], name='expense_user_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-created_at'], name='expense_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:55
+
+import django.db.models.deletion
+import transactions.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_expense_recent_idx_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseSearchIndex',
+            fields=[
+                ('expense', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='transactions.expense')),
+                ('description', models.TextField()),
+                ('category', models.TextField()),
+                ('payment_mode', models.TextField()),
+                ('document', transactions.fields.SearchDocumentField(db_column='transactions_expense_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'transactions_expense_fts',
+                'managed': False,
+            },
+        ),
+    ]
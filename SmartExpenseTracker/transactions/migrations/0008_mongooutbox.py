@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_expensesearchindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MongoOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('op', models.CharField(choices=[('upsert', 'Upsert')], max_length=10)),
+                ('selector', models.JSONField()),
+                ('document', models.JSONField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('dead_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Mongo outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
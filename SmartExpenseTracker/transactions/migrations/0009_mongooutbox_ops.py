@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_mongooutbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mongooutbox',
+            name='op',
+            field=models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete'), ('rename', 'Rename category')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0011_mongooutbox_batch_upsert'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mongooutbox',
+            name='op',
+            field=models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete'), ('rename', 'Rename category'), ('upserts', 'Batch upsert'), ('deletes', 'Batch delete')], max_length=10),
+        ),
+    ]
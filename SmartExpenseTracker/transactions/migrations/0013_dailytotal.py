@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-18 05:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_daily_totals(apps, schema_editor):
+    Expense = apps.get_model('transactions', 'Expense')
+    DailyTotal = apps.get_model('transactions', 'DailyTotal')
+    grouped = (
+        Expense.objects.values('user_id', 'date', 'category')
+        .annotate(
+            income=Sum('amount', filter=Q(transaction_type='income')),
+            expense=Sum('amount', filter=Q(transaction_type='expense')),
+            count=Count('id'),
+        )
+        .order_by()
+    )
+    DailyTotal.objects.bulk_create(
+        [
+            DailyTotal(
+                user_id=row['user_id'],
+                date=row['date'],
+                category=row['category'],
+                income=row['income'] or 0,
+                expense=row['expense'] or 0,
+                count=row['count'],
+            )
+            for row in grouped.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_mongooutbox_batch_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=50)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date', 'category'), name='unique_daily_total')],
+            },
+        ),
+        migrations.RunPython(populate_daily_totals, migrations.RunPython.noop),
+    ]
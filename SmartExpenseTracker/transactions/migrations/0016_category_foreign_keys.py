@@ -0,0 +1,219 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:12
+#
+# Hand-edited: Expense, MonthlyRollup, Budget and RecurringRule.category go
+# from a name to a foreign key on Category in steps that stay cheap on a
+# large table.  The old column is renamed out of the way, the new nullable
+# column is added without an index, and the link is filled in by primary
+# key ranges, each range in its own short transaction.  Only then is the
+# name column dropped and the key made NOT NULL and indexed.  DailyTotal
+# is derived data and is regrouped from Expense instead: it used to merge
+# an income and an expense category of the same name into one row.
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+
+BATCH_SIZE = 10_000  # rows linked per transaction
+USER_BATCH_SIZE = 1_000  # users whose daily totals are regrouped per transaction
+
+FTS_TRIGGERS_ON_CATEGORY = ('transactions_expense_fts_ai', 'transactions_expense_fts_au')
+
+# model name -> how its category type is known
+LINKED = {
+    'Expense': F('transaction_type'),
+    'MonthlyRollup': F('transaction_type'),
+    'RecurringRule': F('transaction_type'),
+    # Budgets only ever cover expense categories
+    'Budget': Value('expense'),
+}
+
+
+def drop_fts_triggers(apps, schema_editor):
+    # They name the old column, which SQLite will not drop while they exist.
+    # ensure_sqlite_fts() reinstalls them after migrate and reindexes.
+    if schema_editor.connection.vendor == 'sqlite':
+        for name in FTS_TRIGGERS_ON_CATEGORY:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def _pk_ranges(queryset):
+    bounds = queryset.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return
+    for start in range(bounds['lo'], bounds['hi'] + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def link_categories(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Category = apps.get_model('transactions', 'Category')
+    for model_name, kind in LINKED.items():
+        model = apps.get_model('transactions', model_name)
+        rows = model.objects.using(alias).annotate(kind=kind)
+
+        # Names that never had a Category row (free-text imports) get one
+        missing = (
+            rows.filter(~Exists(Category.objects.filter(
+                user=OuterRef('user'), name=OuterRef('category_name'), type=OuterRef('kind'),
+            )))
+            .values_list('user_id', 'category_name', 'kind').distinct().order_by()
+        )
+        Category.objects.using(alias).bulk_create(
+            [Category(user_id=user_id, name=name, type=kind) for user_id, name, kind in missing.iterator()],
+            batch_size=1000, ignore_conflicts=True,
+        )
+
+        match = Category.objects.filter(user=OuterRef('user'), name=OuterRef('category_name'))
+        if model_name == 'Budget':
+            match = match.filter(type='expense')
+        else:
+            match = match.filter(type=OuterRef('transaction_type'))
+        for start, end in _pk_ranges(model.objects.using(alias)):
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(pk__gte=start, pk__lt=end).update(
+                    category=Subquery(match.values('pk')[:1]),
+                )
+
+    # DailyTotal is regrouped per range of users
+    Expense = apps.get_model('transactions', 'Expense')
+    DailyTotal = apps.get_model('transactions', 'DailyTotal')
+    DailyTotal.objects.using(alias).all().delete()
+    bounds = Expense.objects.using(alias).aggregate(lo=Min('user_id'), hi=Max('user_id'))
+    if bounds['lo'] is None:
+        return
+    for start in range(bounds['lo'], bounds['hi'] + 1, USER_BATCH_SIZE):
+        grouped = (
+            Expense.objects.using(alias)
+            .filter(user_id__gte=start, user_id__lt=start + USER_BATCH_SIZE)
+            .values('user_id', 'date', 'category')
+            .annotate(
+                income=Sum('amount', filter=Q(transaction_type='income')),
+                expense=Sum('amount', filter=Q(transaction_type='expense')),
+                count=Count('id'),
+            )
+            .order_by()
+        )
+        with transaction.atomic(using=alias):
+            DailyTotal.objects.using(alias).bulk_create(
+                [
+                    DailyTotal(
+                        user_id=row['user_id'], date=row['date'], category_id=row['category'],
+                        income=row['income'] or 0, expense=row['expense'] or 0, count=row['count'],
+                    )
+                    for row in grouped.iterator()
+                ],
+                batch_size=1000,
+            )
+
+
+def unlink_categories(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Category = apps.get_model('transactions', 'Category')
+    name = Subquery(Category.objects.filter(pk=OuterRef('category')).values('name')[:1])
+    for model_name in LINKED:
+        model = apps.get_model('transactions', model_name)
+        for start, end in _pk_ranges(model.objects.using(alias)):
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(pk__gte=start, pk__lt=end).update(category_name=name)
+    # Grouped by name again by the rebuild_rollups command once reversed
+    apps.get_model('transactions', 'DailyTotal').objects.using(alias).all().delete()
+
+
+def _category_key(**options):
+    return models.ForeignKey(to='transactions.category', **options)
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill range commits on its own
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0015_recurringrule'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, migrations.RunPython.noop),
+        migrations.RemoveIndex(model_name='expense', name='expense_user_category_idx'),
+        migrations.RemoveConstraint(model_name='monthlyrollup', name='unique_monthly_rollup'),
+        migrations.RemoveConstraint(model_name='dailytotal', name='unique_daily_total'),
+        migrations.RemoveConstraint(model_name='budget', name='unique_budget'),
+        migrations.AlterModelOptions(
+            name='budget',
+            options={'ordering': ['period']},
+        ),
+        # The names move aside and the keys are added next to them, nullable
+        # and unindexed so that neither step rewrites the table
+        migrations.RenameField(model_name='expense', old_name='category', new_name='category_name'),
+        migrations.RenameField(model_name='monthlyrollup', old_name='category', new_name='category_name'),
+        migrations.RenameField(model_name='budget', old_name='category', new_name='category_name'),
+        migrations.RenameField(model_name='recurringrule', old_name='category', new_name='category_name'),
+        migrations.RemoveField(model_name='dailytotal', name='category'),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name='category',
+                field=_category_key(null=True, db_index=False, on_delete=django.db.models.deletion.SET_NULL,
+                                    related_name='+'),
+            )
+            for model_name in ('expense', 'monthlyrollup', 'dailytotal', 'budget', 'recurringrule')
+        ],
+        migrations.RunPython(link_categories, unlink_categories),
+        # A default only so that reversing can add the name columns back
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name=model_name,
+                name='category_name',
+                field=models.CharField(max_length=50, default=''),
+            )
+            for model_name in ('expense', 'monthlyrollup', 'budget', 'recurringrule')
+        ]),
+        migrations.RemoveField(model_name='expense', name='category_name'),
+        migrations.RemoveField(model_name='monthlyrollup', name='category_name'),
+        migrations.RemoveField(model_name='budget', name='category_name'),
+        migrations.RemoveField(model_name='recurringrule', name='category_name'),
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=_category_key(on_delete=django.db.models.deletion.PROTECT, related_name='expenses'),
+        ),
+        migrations.AlterField(
+            model_name='monthlyrollup',
+            name='category',
+            field=_category_key(on_delete=django.db.models.deletion.CASCADE, related_name='+'),
+        ),
+        migrations.AlterField(
+            model_name='dailytotal',
+            name='category',
+            field=_category_key(on_delete=django.db.models.deletion.CASCADE, related_name='+'),
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='category',
+            field=_category_key(on_delete=django.db.models.deletion.CASCADE, related_name='budgets'),
+        ),
+        migrations.AlterField(
+            model_name='recurringrule',
+            name='category',
+            field=_category_key(on_delete=django.db.models.deletion.PROTECT, related_name='recurring_rules'),
+        ),
+        migrations.AlterModelOptions(
+            name='budget',
+            options={'ordering': ['category__name', 'period']},
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'month', 'transaction_type', 'category', 'payment_mode'),
+                name='unique_monthly_rollup',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytotal',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'category'), name='unique_daily_total'),
+        ),
+        migrations.AddConstraint(
+            model_name='budget',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'period'), name='unique_budget'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:40
+#
+# Hand-edited: every stored amount moves from a two-place decimal to an
+# integer count of paise (transactions.fields.MoneyField).  As in 0016 the
+# old column is renamed aside, the new one is added nullable and filled by
+# primary key ranges, each in its own transaction, and only then is the
+# old column dropped and the new one made NOT NULL.  The fill rounds
+# amount * 100 in SQL, which is exact for two-place values on every
+# backend (SQLite kept them as REAL).
+
+from django.db import migrations, models, transaction
+from django.db.models import F, Max, Min, Value
+from django.db.models.functions import Cast, Round
+
+import transactions.fields
+
+BATCH_SIZE = 10_000  # rows converted per transaction
+
+# model name -> its amount fields
+AMOUNTS = {
+    'expense': ('amount',),
+    'recurringrule': ('amount',),
+    'monthlyrollup': ('total',),
+    'dailytotal': ('income', 'expense'),
+    'budget': ('limit', 'spent'),
+}
+# Running totals have a default and two more digits than single amounts
+TOTALS = {'total', 'income', 'expense', 'spent'}
+
+
+def _pk_ranges(queryset):
+    bounds = queryset.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return
+    for start in range(bounds['lo'], bounds['hi'] + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def _convert(apps, schema_editor, column, value):
+    """Set ``column(name)`` to ``value(name)`` for every amount field, range by range."""
+    alias = schema_editor.connection.alias
+    for model_name, fields in AMOUNTS.items():
+        model = apps.get_model('transactions', model_name)
+        for start, end in _pk_ranges(model.objects.using(alias)):
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(pk__gte=start, pk__lt=end).update(
+                    **{column(name): value(name) for name in fields},
+                )
+
+
+def to_minor_units(apps, schema_editor):
+    _convert(apps, schema_editor, lambda name: name, lambda name: Cast(
+        Round(F(f'{name}_decimal') * Value(100)), models.BigIntegerField(),
+    ))
+
+
+def to_decimal(apps, schema_editor):
+    # A float divisor: SQLite divides two integers as integers
+    _convert(apps, schema_editor, lambda name: f'{name}_decimal', lambda name: F(name) / Value(100.0))
+
+
+def _money(name, **options):
+    if name in TOTALS:
+        options.setdefault('default', 0)
+    return transactions.fields.MoneyField(**options)
+
+
+class Migration(migrations.Migration):
+
+    # Each conversion range commits on its own
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0016_category_foreign_keys'),
+    ]
+
+    operations = [
+        *[
+            migrations.RenameField(model_name=model_name, old_name=name, new_name=f'{name}_decimal')
+            for model_name, fields in AMOUNTS.items() for name in fields
+        ],
+        *[
+            migrations.AddField(model_name=model_name, name=name, field=transactions.fields.MoneyField(null=True))
+            for model_name, fields in AMOUNTS.items() for name in fields
+        ],
+        migrations.RunPython(to_minor_units, to_decimal),
+        # A default only so that reversing can add the decimal columns back
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name=model_name,
+                name=f'{name}_decimal',
+                field=models.DecimalField(max_digits=14 if name in TOTALS else 10, decimal_places=2, default=0),
+            )
+            for model_name, fields in AMOUNTS.items() for name in fields
+        ]),
+        *[
+            migrations.RemoveField(model_name=model_name, name=f'{name}_decimal')
+            for model_name, fields in AMOUNTS.items() for name in fields
+        ],
+        *[
+            migrations.AlterField(model_name=model_name, name=name, field=_money(name))
+            for model_name, fields in AMOUNTS.items() for name in fields
+        ],
+    ]
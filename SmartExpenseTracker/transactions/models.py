@@ -1,6 +1,13 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 
+from .fields import MoneyField, SearchDocumentField
+
+
+def default_currency():
+    return settings.HOME_CURRENCY
+
 
 class Category(models.Model):
     TYPE_CHOICES = [
@@ -21,16 +28,256 @@ class Category(models.Model):
         return f"{self.name} ({self.get_type_display()})"
 
 
+class RecurringRule(models.Model):
+    """A transaction that repeats on an RFC 5545 RRULE schedule.
+
+    ``rrule`` is the rule body, e.g. ``FREQ=MONTHLY;BYMONTHDAY=1``, counted
+    from ``start_date``.  ``next_run`` is the first occurrence not yet
+    materialized as an Expense (null once the schedule is exhausted); the
+    materialize_recurring command advances it.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recurring_rules")
+    transaction_type = models.CharField(max_length=10, choices=Category.TYPE_CHOICES, default="expense")
+    payment_mode = models.CharField(max_length=20, default="Cash")
+    amount = MoneyField()
+    currency = models.CharField(max_length=3, default=default_currency)
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="recurring_rules")
+    description = models.CharField(max_length=255, blank=True)
+    rrule = models.CharField(max_length=255)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_run = models.DateField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The scheduler walks due rules in (next_run, id) order
+            models.Index(fields=["next_run", "id"], name="recurring_due_idx", condition=models.Q(active=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.category.name} - {self.currency} {self.amount} ({self.rrule})"
+
+
 class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    transaction_type = models.CharField(max_length=10, default="expense")
+    transaction_type = models.CharField(max_length=10, choices=Category.TYPE_CHOICES, default="expense")
     payment_mode = models.CharField(max_length=20, default="Cash")
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
-    category = models.CharField(max_length=50)
+    # Stored in minor units of ``currency``, read back as a two-place Decimal
+    amount = MoneyField()
+    # ISO 4217; totals are converted to the home currency (see transactions.fx)
+    currency = models.CharField(max_length=3, default=default_currency)
+    # A rename touches only the Category row; deleting a category in use is refused
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="expenses")
     description = models.CharField(max_length=255, blank=True)
     date = models.DateField()
+    # Set on the occurrences a RecurringRule materialized.  Lookups by rule
+    # use the partial unique index below instead of a full-table FK index.
+    recurring_rule = models.ForeignKey(
+        RecurringRule, null=True, blank=True, on_delete=models.SET_NULL, related_name="occurrences",
+        db_index=False,
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Makes materializing idempotent.  Partial, so it only indexes
+            # materialized rows (and SQLite adds it without a table rebuild).
+            models.UniqueConstraint(
+                fields=["recurring_rule", "date"], name="unique_recurring_occurrence",
+                condition=models.Q(recurring_rule__isnull=False),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "transaction_type", "date"], name="expense_user_type_date_idx"),
+            models.Index(fields=["user", "-date", "-created_at", "-id"], name="expense_user_recent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.category.name} - {self.currency} {self.amount}"
+
+
+class ExpenseSearchIndex(models.Model):
+    """Read-only mapping of the SQLite FTS5 table kept up by triggers.
+
+    See transactions.search; the table does not exist on other databases.
+    ``category`` holds the Expense's category id, so renames never touch it.
+    """
+    expense = models.OneToOneField(
+        Expense, primary_key=True, db_column="rowid",
+        on_delete=models.DO_NOTHING, related_name="search_index",
+    )
+    description = models.TextField()
+    category = models.TextField()
+    payment_mode = models.TextField()
+    document = SearchDocumentField(db_column="transactions_expense_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "transactions_expense_fts"
+
+
+class MonthlyRollup(models.Model):
+    """Running per-month totals, kept in step with Expense writes.
+
+    One row per (user, month, transaction_type, category, payment_mode,
+    currency), in that currency; ``month`` is always the first day of the month.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="monthly_rollups")
+    month = models.DateField()
+    transaction_type = models.CharField(max_length=10)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    payment_mode = models.CharField(max_length=20)
+    currency = models.CharField(max_length=3, default=default_currency)
+    total = MoneyField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "month", "transaction_type", "category", "payment_mode", "currency"],
+                name="unique_monthly_rollup",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.month:%b %Y} - {self.transaction_type} - {self.category_id}"
+
+
+class DailyTotal(models.Model):
+    """Running per-day totals for the trend charts, kept in step with Expense writes.
+
+    One row per (user, date, category, currency), in that currency; days
+    without transactions have no row and are zero-filled when read.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_totals")
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    currency = models.CharField(max_length=3, default=default_currency)
+    income = MoneyField(default=0)
+    expense = MoneyField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index behind the (user, date range) reads
+            models.UniqueConstraint(fields=["user", "date", "category", "currency"], name="unique_daily_total"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date} - {self.category_id}"
+
+
+class Budget(models.Model):
+    """A spending limit for one expense category per week, month or year.
+
+    ``limit`` and ``spent`` are in the home currency.  ``spent`` is the
+    category's expense total (foreign amounts converted) for the period
+    that starts on ``period_start``, kept in step with Expense writes by
+    transactions.budgets and re-based when a new period begins.
+    """
+    PERIOD_CHOICES = [
+        ("weekly", "Weekly"),
+        ("monthly", "Monthly"),
+        ("yearly", "Yearly"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="budgets")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="budgets")
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default="monthly")
+    limit = MoneyField()
+    spent = MoneyField(default=0)
+    period_start = models.DateField()
+
+    class Meta:
+        ordering = ["category__name", "period"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "category", "period"], name="unique_budget"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.category_id} - {self.period} {settings.HOME_CURRENCY} {self.limit}"
+
+    @property
+    def remaining(self):
+        return self.limit - self.spent
+
+    @property
+    def percent_used(self):
+        return float(self.spent / self.limit * 100) if self.limit else 0.0
+
+    @property
+    def is_over(self):
+        return self.spent > self.limit
+
+
+class FxRate(models.Model):
+    """The value of one unit of ``currency`` in the home currency on ``date``.
+
+    Loaded from a local file by the load_fx_rates command; see transactions.fx.
+    """
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            # Also the index behind each currency's date-ordered read
+            models.UniqueConstraint(fields=["currency", "date"], name="unique_fx_rate"),
+        ]
+
+    def __str__(self):
+        return f"{self.currency} {self.date} = {self.rate}"
+
+
+class MongoOutbox(models.Model):
+    """A pending MongoDB mirror write, committed together with its Expense change.
+
+    Rows are drained strictly in id order by the drain_mongo_outbox worker
+    and deleted once Mongo has acknowledged them.
+    """
+    OP_UPSERT = "upsert"
+    OP_DELETE = "delete"
+    OP_RENAME = "rename"
+    OP_UPSERTS = "upserts"  # ``document`` is a list of documents, each with its _id
+    OP_DELETES = "deletes"  # ``selector`` is {"_id": {"$in": [...]}}
+    OP_CHOICES = [
+        (OP_UPSERT, "Upsert"),
+        (OP_DELETE, "Delete"),
+        (OP_RENAME, "Rename category"),
+        (OP_UPSERTS, "Batch upsert"),
+        (OP_DELETES, "Batch delete"),
+    ]
+
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    selector = models.JSONField()
+    document = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    dead_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name_plural = "Mongo outbox"
+
+    def __str__(self):
+        return f"{self.op} {self.selector}"
+
+
+class DataVersion(models.Model):
+    """Per-user counter bumped on every Expense/Category write.
+
+    Cached dashboard and report payloads embed the version in their key,
+    so a write makes every older entry unreachable without deleting it.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name="data_version")
+    version = models.BigIntegerField()
+
     def __str__(self):
-        return f"{self.user.username} - {self.category} - ₹{self.amount}"
+        return f"{self.user_id} v{self.version}"
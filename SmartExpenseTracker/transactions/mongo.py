@@ -1,24 +1,214 @@
-from pymongo import MongoClient
+"""MongoDB client for the Transactions mirror.
+
+Connection options (pool size, timeouts, compression, write concern) come
+from ``settings.MONGO``; see DEFAULTS for the keys.  The client is created
+once per process.  A forked child (a gunicorn worker) drops the parent's
+client and builds its own, and ``warm_up()`` lets a process pay for DNS,
+TLS and the handshake before its first real write.  Pool events are
+counted by ``pool_stats`` and any listeners named in EVENT_LISTENERS.
+"""
+import logging
 import os
+import threading
+
 import certifi
-from dotenv import load_dotenv
+from django.conf import settings
+from django.utils.module_loading import import_string
+from pymongo import ASCENDING, DESCENDING, MongoClient, monitoring
+from pymongo.errors import PyMongoError
+from pymongo.write_concern import WriteConcern
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "URI": None,
+    "DB_NAME": "SmartExpenseTracker",
+    "MAX_POOL_SIZE": 20,
+    "MIN_POOL_SIZE": 0,
+    "MAX_IDLE_TIME_MS": 300_000,
+    "CONNECT_TIMEOUT_MS": 5_000,
+    "SOCKET_TIMEOUT_MS": 10_000,
+    "SERVER_SELECTION_TIMEOUT_MS": 5_000,
+    # How long a thread waits for a free pooled connection
+    "WAIT_QUEUE_TIMEOUT_MS": 5_000,
+    # zlib ships with Python; "zstd" and "snappy" need extra packages
+    "COMPRESSORS": ["zlib"],
+    "WRITE_CONCERN": {"w": "majority", "wtimeout": 5_000},
+    "WARM_UP": True,
+    # Dotted paths of extra pymongo monitoring listeners
+    "EVENT_LISTENERS": [],
+}
+
+# Documents are keyed by _id = Expense.pk; these cover the other lookups
+# the mirror issues (category renames, per-user reads).
+TRANSACTION_INDEXES = [
+    ([("user_id", ASCENDING), ("category", ASCENDING)], "user_category"),
+    ([("user_id", ASCENDING), ("date", DESCENDING)], "user_date"),
+]
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connection-pool events across every client of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checked_in = 0
+            self.checkout_failures = 0
+            self.checkout_seconds = 0.0
+            self.pools_cleared = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_open": self.created - self.closed,
+                "connections_in_use": self.checked_out - self.checked_in,
+                "connections_created_total": self.created,
+                "checkouts_total": self.checked_out,
+                "checkout_failures_total": self.checkout_failures,
+                "checkout_wait_seconds_total": round(self.checkout_seconds, 6),
+                "pools_cleared_total": self.pools_cleared,
+            }
+
+    def _add(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def connection_created(self, event):
+        self._add("created")
+
+    def connection_closed(self, event):
+        self._add("closed")
+
+    def connection_checked_out(self, event):
+        self._add("checked_out")
+        if event.duration:
+            self._add("checkout_seconds", event.duration)
+
+    def connection_checked_in(self, event):
+        self._add("checked_in")
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures")
+
+    def pool_cleared(self, event):
+        self._add("pools_cleared")
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
 
-# Load .env from project root (3 levels up: transactions -> SmartExpenseTracker -> SmartExpenseTracker)
-_base = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-load_dotenv(os.path.join(_base, '.env'))
+    def connection_check_out_started(self, event):
+        pass
 
-MONGO_URI = os.getenv("MONGO_URI")
 
-DB_NAME = "SmartExpenseTracker"
+pool_stats = PoolStats()
 
 _client = None
+_indexes_ready = False
+_client_lock = threading.Lock()
+
+
+def mongo_settings():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "MONGO", {}))
+    return config
+
+
+def client_options(config):
+    return {
+        "tlsCAFile": certifi.where(),
+        "maxPoolSize": config["MAX_POOL_SIZE"],
+        "minPoolSize": config["MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MAX_IDLE_TIME_MS"],
+        "connectTimeoutMS": config["CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["SOCKET_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": config["SERVER_SELECTION_TIMEOUT_MS"],
+        "waitQueueTimeoutMS": config["WAIT_QUEUE_TIMEOUT_MS"],
+        "compressors": ",".join(config["COMPRESSORS"]),
+        "event_listeners": [pool_stats] + [import_string(path)() for path in config["EVENT_LISTENERS"]],
+    }
+
+
+def _database(client, config):
+    return client.get_database(config["DB_NAME"], write_concern=WriteConcern(**config["WRITE_CONCERN"]))
+
+
+def ensure_indexes(collection):
+    for keys, name in TRANSACTION_INDEXES:
+        collection.create_index(keys, name=name)
+
 
 def get_mongo_db():
     global _client
+    config = mongo_settings()
     if _client is None:
-        _client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
-    return _client[DB_NAME]
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(config["URI"], **client_options(config))
+    return _database(_client, config)
+
 
 def get_transactions_collection():
+    global _indexes_ready
     db = get_mongo_db()
-    return db["Transactions"]
+    collection = db["Transactions"]
+    if not _indexes_ready:
+        ensure_indexes(collection)
+        _indexes_ready = True
+    return collection
+
+
+def warm_up():
+    """Open a first pooled connection so the next write skips DNS/TLS/handshake."""
+    try:
+        get_mongo_db().command("ping")
+    except PyMongoError as exc:
+        logger.warning("Mongo warm-up failed: %s", exc)
+
+
+def start_warm_up():
+    """Warm the client up on a daemon thread; a no-op when disabled or unconfigured."""
+    config = mongo_settings()
+    if not config["URI"] or not config["WARM_UP"]:
+        return None
+    thread = threading.Thread(target=warm_up, name="mongo-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def reset_after_fork():
+    """Forget the parent's client; pymongo clients must not cross a fork."""
+    global _client, _indexes_ready, _client_lock
+    _client = None
+    _indexes_ready = False
+    _client_lock = threading.Lock()
+    pool_stats.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def prometheus_metrics():
+    lines = []
+    for name, value in pool_stats.snapshot().items():
+        metric = f"mongo_pool_{name}"
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines += [f"# TYPE {metric} {kind}", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
@@ -0,0 +1,146 @@
+"""Transactional outbox for the MongoDB mirror.
+
+Request handlers never talk to Mongo.  They call ``enqueue_*`` inside the
+same ``transaction.atomic()`` block as the Expense write, and the
+``drain_mongo_outbox`` worker replays the queue with ``bulk_write``.
+Every operation is idempotent (replace-by-_id upserts, deletes by _id and
+category renames), so replaying a batch after a crash or a partial
+failure is harmless.
+"""
+import logging
+
+from django.utils import timezone
+from pymongo import DeleteMany, DeleteOne, ReplaceOne, UpdateMany
+from pymongo.errors import BulkWriteError
+
+from .models import MongoOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def expense_document(expense):
+    return {
+        "user_id": expense.user_id,
+        "username": expense.user.username,
+        "amount": float(expense.amount),
+        "currency": expense.currency,
+        "category": expense.category.name,
+        "description": expense.description,
+        "date": str(expense.date),
+        "transaction_type": expense.transaction_type,
+        "payment_mode": expense.payment_mode,
+        "created_at": expense.created_at.isoformat(),
+    }
+
+
+def enqueue_upsert(expense):
+    # The document's _id is the Expense primary key, so every mirror write
+    # is a single indexed lookup and replaying it can never duplicate.
+    return MongoOutbox.objects.create(
+        op=MongoOutbox.OP_UPSERT,
+        selector={"_id": expense.pk},
+        document=expense_document(expense),
+    )
+
+
+def enqueue_upserts(expenses):
+    """Queue a batch of saved expenses as a single outbox row.
+
+    The worker replays it as one ``bulk_write`` of upserts rather than an
+    ``insert_many``, so replaying the batch after a crash cannot duplicate.
+    """
+    expenses = list(expenses)
+    return MongoOutbox.objects.create(
+        op=MongoOutbox.OP_UPSERTS,
+        selector={"_id": {"$in": [expense.pk for expense in expenses]}},
+        document=[{"_id": expense.pk, **expense_document(expense)} for expense in expenses],
+    )
+
+
+def enqueue_delete(expense):
+    return MongoOutbox.objects.create(op=MongoOutbox.OP_DELETE, selector={"_id": expense.pk})
+
+
+def enqueue_deletes(pks):
+    return MongoOutbox.objects.create(
+        op=MongoOutbox.OP_DELETES, selector={"_id": {"$in": list(pks)}},
+    )
+
+
+def enqueue_rename(user, transaction_type, old_name, new_name):
+    # Mirror documents carry the name, so they still need the rename
+    return MongoOutbox.objects.create(
+        op=MongoOutbox.OP_RENAME,
+        selector={"user_id": user.pk, "transaction_type": transaction_type, "category": old_name},
+        document={"category": new_name},
+    )
+
+
+def _operations(entry):
+    if entry.op == MongoOutbox.OP_DELETE:
+        return [DeleteOne(entry.selector)]
+    if entry.op == MongoOutbox.OP_DELETES:
+        return [DeleteMany(entry.selector)]
+    if entry.op == MongoOutbox.OP_RENAME:
+        return [UpdateMany(entry.selector, {"$set": entry.document})]
+    if entry.op == MongoOutbox.OP_UPSERTS:
+        return [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in entry.document]
+    return [ReplaceOne(entry.selector, entry.document, upsert=True)]
+
+
+def pending(batch_size):
+    return list(MongoOutbox.objects.filter(dead_at__isnull=True).order_by("id")[:batch_size])
+
+
+def drain_batch(collection, batch_size=500, max_attempts=10):
+    """Send the oldest pending entries to ``collection`` in one bulk_write.
+
+    ``batch_size`` caps the number of write operations (a batch-upsert entry
+    counts once per document, and is never split).  Returns the number of
+    entries acknowledged.  Connection-level errors propagate so the caller
+    can back off, and so does a BulkWriteError carrying only write concern
+    errors; a document Mongo rejects is retried on later passes and parked
+    (``dead_at``) after ``max_attempts``.
+    """
+    entries = []
+    operations = []
+    owners = []  # operation index -> index into entries
+    for entry in pending(batch_size):
+        entry_ops = _operations(entry)
+        if entries and len(operations) + len(entry_ops) > batch_size:
+            break
+        owners.extend([len(entries)] * len(entry_ops))
+        operations.extend(entry_ops)
+        entries.append(entry)
+    if not entries:
+        return 0
+
+    try:
+        collection.bulk_write(operations, ordered=True)
+    except BulkWriteError as exc:
+        if not exc.details.get("writeErrors"):
+            # Only write concern errors (e.g. a wtimeout): no document was
+            # rejected, so the caller retries the whole batch with backoff.
+            raise
+        # Ordered writes stop at the first failure; everything before it
+        # landed, and replaying the failed entry's earlier upserts is harmless.
+        failed_index = owners[exc.details["writeErrors"][0]["index"]]
+        MongoOutbox.objects.filter(pk__in=[e.pk for e in entries[:failed_index]]).delete()
+        failed = entries[failed_index]
+        failed.attempts += 1
+        failed.last_error = str(exc.details["writeErrors"][0].get("errmsg", exc))[:2000]
+        if failed.attempts >= max_attempts:
+            failed.dead_at = timezone.now()
+            logger.error("Giving up on Mongo outbox entry %s: %s", failed.pk, failed.last_error)
+        failed.save(update_fields=["attempts", "last_error", "dead_at"])
+        return failed_index
+
+    MongoOutbox.objects.filter(pk__in=[e.pk for e in entries]).delete()
+    return len(entries)
+
+
+def record_failure(exc, batch_size=500):
+    """Note a connection-level failure on the entries at the head of the queue."""
+    MongoOutbox.objects.filter(pk__in=[e.pk for e in pending(batch_size)]).update(
+        last_error=str(exc)[:2000],
+    )
@@ -0,0 +1,105 @@
+"""Keyset (cursor) pagination for the transactions history.
+
+A cursor is the sort key of the last row on a page, so fetching the next
+page is an indexed range read no matter how deep the user has scrolled.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+
+HISTORY_ORDERING = ("-date", "-created_at", "-id")
+
+
+def _field_name(ordering_item):
+    return ordering_item.lstrip("-")
+
+
+def _int(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"not an integer: {value!r}")
+    return value
+
+
+def _float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"not a number: {value!r}")
+    return float(value)
+
+
+# Sort fields -> parser of their cursor value; others pass through as-is
+CURSOR_PARSERS = {
+    "date": date.fromisoformat,
+    "created_at": datetime.fromisoformat,
+    "id": _int,
+    "search_rank": _float,
+}
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_serialize(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, ordering=HISTORY_ORDERING):
+    """Return the decoded sort key, or None for a missing/malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    try:
+        return [
+            CURSOR_PARSERS.get(_field_name(item), lambda v: v)(value)
+            for item, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError):
+        return None
+
+
+def _after(ordering, values):
+    """Rows strictly after ``values`` in ``ordering`` (lexicographic).
+
+    The leading column is also bounded on its own so the database can turn
+    the predicate into an index range seek instead of filtering a scan.
+    """
+    lead = "lte" if ordering[0].startswith("-") else "gte"
+    bound = Q(**{f"{_field_name(ordering[0])}__{lead}": values[0]})
+    condition = Q()
+    for i, item in enumerate(ordering):
+        lookup = "lt" if item.startswith("-") else "gt"
+        clause = Q(**{f"{_field_name(item)}__{lookup}": values[i]})
+        for prev_item, prev_value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{_field_name(prev_item): prev_value})
+        condition |= clause
+    return bound & condition
+
+
+def keyset_page(qs, cursor=None, page_size=50, ordering=HISTORY_ORDERING):
+    """Return ``(rows, next_cursor)`` for one page of ``qs``.
+
+    ``next_cursor`` is None on the last page.
+    """
+    qs = qs.order_by(*ordering)
+    values = decode_cursor(cursor, ordering)
+    if values is not None:
+        qs = qs.filter(_after(ordering, values))
+
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, _field_name(item)) for item in ordering])
+    return rows, next_cursor
@@ -0,0 +1,83 @@
+"""SQLite connection tuning and upkeep.
+
+apply_pragmas() is a connection_created receiver that runs the PRAGMAs of
+``settings.SQLITE_PRAGMAS`` (merged over DEFAULTS; a value of None drops
+a default) on every new SQLite connection.  Other databases are left
+alone.  The defaults suit a web app with several workers on one file:
+
+* ``journal_mode=WAL``: readers and the writer stop blocking each other,
+  and a commit appends to the log instead of journalling whole pages,
+* ``synchronous=NORMAL``: in WAL mode the log is synced only at
+  checkpoints, not on every commit.  The database stays consistent; a
+  power cut can lose the last commits, an application crash cannot,
+* ``busy_timeout``: milliseconds a writer waits for the lock before
+  "database is locked",
+* ``cache_size`` and ``mmap_size``: a 64 MiB page cache and up to 256 MiB
+  of the file memory-mapped, per connection,
+* ``temp_store=MEMORY``: sorts and temporary indexes stay off disk.
+
+They run on the raw sqlite3 connection, so the instrumentation does not
+count them as queries.  maintain() is what the sqlite_maintenance command
+runs periodically: ``PRAGMA optimize`` to refresh the planner statistics
+the dashboards' GROUP BYs depend on, and a WAL checkpoint that keeps the
+log from growing between the automatic ones.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20_000,
+    "cache_size": -64_000,  # negative means KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+_VALUE_RE = re.compile(r"-?\w+")
+
+
+def pragma_settings():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "SQLITE_PRAGMAS", {}))
+    return {name: value for name, value in config.items() if value is not None}
+
+
+def pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        # Names and values are spliced into the SQL, so only words pass
+        if not name.isidentifier() or not _VALUE_RE.fullmatch(str(value)):
+            raise ImproperlyConfigured(f"Invalid SQLITE_PRAGMAS entry {name!r}: {value!r}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def apply_pragmas(sender=None, connection=None, **kwargs):
+    """connection_created receiver."""
+    if connection.vendor != "sqlite":
+        return
+    for statement in pragma_statements(pragma_settings()):
+        connection.connection.execute(statement)
+
+
+def maintain(using="default", checkpoint="TRUNCATE"):
+    """Run ``PRAGMA optimize`` and a WAL checkpoint on the ``using`` database.
+
+    Returns the checkpoint's ``(busy, log pages, checkpointed pages)``;
+    busy is 1 when readers or a writer kept it from finishing.
+    """
+    if checkpoint not in CHECKPOINT_MODES:
+        raise ValueError(f"checkpoint must be one of {', '.join(CHECKPOINT_MODES)}")
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        raise ImproperlyConfigured(f"Database {using!r} is not SQLite")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA optimize")
+        cursor.execute(f"PRAGMA wal_checkpoint({checkpoint})")
+        return cursor.fetchone()
@@ -0,0 +1,118 @@
+"""Streaming SQL -> Mongo reconciliation for the Transactions mirror.
+
+Both sides are walked once in primary-key order: Expense rows through a
+chunked server-side iterator, Mongo documents through a single cursor
+sorted on ``_id``.  Each chunk of rows is compared with the documents in
+the same key range by hash first, so identical ranges cost one hash and
+no per-document work.  Only differing ranges are diffed and repaired with
+one ``bulk_write``.  Memory use is bounded by the chunk size.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+
+from pymongo import ASCENDING, DeleteOne, ReplaceOne
+
+from .models import Expense
+from .outbox import expense_document
+
+
+@dataclass
+class ReconcileStats:
+    rows: int = 0
+    documents: int = 0
+    chunks: int = 0
+    chunks_skipped: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _sort_key(doc_id):
+    # Mongo orders numbers before every other BSON type, so documents left
+    # over from the old ObjectId-keyed mirror sort after all Expense ids.
+    return (0, doc_id) if isinstance(doc_id, int) else (1, str(doc_id))
+
+
+def chunk_hash(documents):
+    digest = hashlib.sha1()
+    for doc in documents:
+        digest.update(json.dumps(doc, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class _Cursor:
+    """Peekable wrapper over a Mongo cursor."""
+
+    def __init__(self, cursor):
+        self._cursor = iter(cursor)
+        self._head = next(self._cursor, None)
+
+    def take_through(self, last_id, limit=None):
+        """Pop documents whose _id sorts at or before ``last_id`` (None: any)."""
+        taken = []
+        while self._head is not None and (
+            last_id is None or _sort_key(self._head["_id"]) <= _sort_key(last_id)
+        ):
+            if limit is not None and len(taken) >= limit:
+                break
+            taken.append(self._head)
+            self._head = next(self._cursor, None)
+        return taken
+
+
+def _repair(collection, sql_docs, mongo_docs, stats, dry_run):
+    mongo_by_id = {doc["_id"]: doc for doc in mongo_docs}
+    operations = []
+    for doc in sql_docs:
+        existing = mongo_by_id.pop(doc["_id"], None)
+        if existing is None:
+            stats.inserted += 1
+        elif existing != doc:
+            stats.updated += 1
+        else:
+            continue
+        operations.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+    for doc_id in mongo_by_id:
+        stats.deleted += 1
+        operations.append(DeleteOne({"_id": doc_id}))
+    if operations and not dry_run:
+        collection.bulk_write(operations, ordered=False)
+
+
+def reconcile(collection, chunk_size=1000, dry_run=False):
+    started = time.perf_counter()
+    stats = ReconcileStats()
+    rows = (
+        Expense.objects.select_related("user", "category").order_by("pk").iterator(chunk_size=chunk_size)
+    )
+    cursor = _Cursor(collection.find({}, batch_size=chunk_size).sort("_id", ASCENDING))
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if chunk:
+            mongo_docs = cursor.take_through(chunk[-1].pk)
+        else:
+            # Past the last row: whatever is left in Mongo has no SQL row
+            mongo_docs = cursor.take_through(None, limit=chunk_size)
+            if not mongo_docs:
+                break
+        sql_docs = [{"_id": expense.pk, **expense_document(expense)} for expense in chunk]
+
+        stats.rows += len(sql_docs)
+        stats.documents += len(mongo_docs)
+        stats.chunks += 1
+        if chunk_hash(sql_docs) == chunk_hash(mongo_docs):
+            stats.chunks_skipped += 1
+        else:
+            _repair(collection, sql_docs, mongo_docs, stats, dry_run)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,175 @@
+"""Recurring transactions: RRULE schedules materialized in bulk.
+
+A RecurringRule carries an RFC 5545 RRULE (parsed with dateutil) and
+``next_run``, its first occurrence not yet written as an Expense.
+materialize() brings every active rule up to a date:
+
+* due rules are streamed in keyset-paginated chunks ordered by
+  (next_run, id), which the partial recurring_due_idx index serves, so
+  memory stays bounded however many rules there are,
+* occurrences go through the importer's bulk path: one bulk_create per
+  batch, search indexed per batch, rollups and budgets upserted per
+  batch and one Mongo outbox row per batch,
+* each chunk commits its occurrences together with its rules' advanced
+  next_run, so a crash never loses or repeats an occurrence.
+
+The partial unique (recurring_rule, date) constraint is the backstop:
+occurrences that already exist are skipped, and two schedulers racing
+on one chunk make the later transaction fail instead of duplicating.
+A rule more than ``max_per_rule`` occurrences behind is caught up over
+further passes of the same run.
+"""
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from datetime import time as clock
+from functools import lru_cache
+
+from dateutil.rrule import rrule, rrulestr
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching, categories, outbox, rollups, search
+from .models import Expense, RecurringRule
+
+DEFAULT_CHUNK_SIZE = 500  # rules per transaction; keeps IN lists under SQLite's 999
+DEFAULT_BATCH_SIZE = 5000  # expenses per bulk_create
+MAX_OCCURRENCES_PER_PASS = 366
+
+
+@dataclass
+class MaterializeResult:
+    rules: int = 0
+    created: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+
+@lru_cache(maxsize=1024)
+def _parse(text):
+    schedule = rrulestr(text, cache=False)
+    if not isinstance(schedule, rrule):
+        raise ValueError("only a single RRULE is supported")
+    return schedule
+
+
+def schedule_for(text, start_date):
+    """The dateutil rrule for ``text`` counted from ``start_date``; ValueError if invalid."""
+    return _parse(text.strip().removeprefix("RRULE:")).replace(
+        dtstart=datetime.combine(start_date, clock.min),
+    )
+
+
+def _occurrences(rule, until, limit):
+    """Up to ``limit`` occurrence dates from ``rule.next_run`` through ``until``.
+
+    Returns ``(dates, next_run)``; next_run is None once the schedule (or
+    ``end_date``) is exhausted.
+    """
+    schedule = schedule_for(rule.rrule, rule.start_date)
+    dates = []
+    for when in schedule.xafter(datetime.combine(rule.next_run, clock.min), inc=True):
+        day = when.date()
+        if rule.end_date and day > rule.end_date:
+            return dates, None
+        if day > until or len(dates) >= limit:
+            return dates, day
+        dates.append(day)
+    return dates, None
+
+
+def create(user, rrule_text, start_date, **fields):
+    """Save a new rule for ``user``; raises ValidationError for a bad RRULE.
+
+    ``fields`` are clean_transaction() style, with the category by name.
+    """
+    try:
+        schedule = schedule_for(rrule_text, start_date)
+    except (ValueError, TypeError) as exc:
+        raise ValidationError(f"Invalid recurrence rule: {exc}")
+    fields.setdefault("transaction_type", "expense")
+    categories.bind(user, [fields])
+    first = next(iter(schedule), None)
+    rule = RecurringRule(user=user, rrule=rrule_text, start_date=start_date, **fields)
+    rule.next_run = first.date() if first and not (rule.end_date and first.date() > rule.end_date) else None
+    rule.save()
+    return rule
+
+
+def _due_chunks(until, chunk_size):
+    due = (
+        RecurringRule.objects.filter(active=True, next_run__lte=until)
+        .select_related("user", "category").order_by("next_run", "pk")
+    )
+    cursor = None
+    while True:
+        page = due
+        if cursor:
+            page = due.filter(Q(next_run__gt=cursor[0]) | Q(next_run=cursor[0], pk__gt=cursor[1]))
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        cursor = (chunk[-1].next_run, chunk[-1].pk)
+        yield chunk
+
+
+def _write(batch, result):
+    if not batch:
+        return
+    with search.deferred_fts_inserts(transaction.get_connection()):
+        Expense.objects.bulk_create(batch)
+    rollups.record_many(batch)
+    outbox.enqueue_upserts(batch)
+    result.created += len(batch)
+
+
+def _materialize_chunk(rules, until, batch_size, max_per_rule, result):
+    """Write one chunk's due occurrences; returns True if a rule is still behind."""
+    behind = False
+    with transaction.atomic():
+        existing = set(
+            Expense.objects.filter(
+                recurring_rule__in=rules,
+                date__gte=min(rule.next_run for rule in rules), date__lte=until,
+            ).values_list("recurring_rule_id", "date")
+        )
+        users = set()
+        batch = []
+        for rule in rules:
+            dates, rule.next_run = _occurrences(rule, until, max_per_rule)
+            behind = behind or (rule.next_run is not None and rule.next_run <= until)
+            for day in dates:
+                if (rule.pk, day) in existing:
+                    result.skipped += 1
+                    continue
+                batch.append(Expense(
+                    user=rule.user, recurring_rule=rule, transaction_type=rule.transaction_type,
+                    amount=rule.amount, category=rule.category, description=rule.description,
+                    payment_mode=rule.payment_mode, currency=rule.currency, date=day,
+                ))
+                users.add(rule.user_id)
+                if len(batch) >= batch_size:
+                    _write(batch, result)
+                    batch = []
+        _write(batch, result)
+        RecurringRule.objects.bulk_update(rules, ["next_run"], batch_size=batch_size)
+        if users:
+            caching.bump_versions(users)
+    result.rules += len(rules)
+    return behind
+
+
+def materialize(until=None, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                max_per_rule=MAX_OCCURRENCES_PER_PASS):
+    """Write every active rule's occurrences up to ``until`` (default today)."""
+    until = until or date.today()
+    started = time.perf_counter()
+    result = MaterializeResult()
+    behind = True
+    while behind:
+        behind = False
+        for rules in _due_chunks(until, chunk_size):
+            behind = _materialize_chunk(rules, until, batch_size, max_per_rule, result) or behind
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,189 @@
+"""Report engine shared by the dashboard and the reports page.
+
+build_report() computes every total and chart series for a filtered date
+range from at most three queries:
+
+* one GROUP BY over MonthlyRollup for the months the range fully covers,
+  with income and expense summed side by side through conditional
+  aggregates (``Sum(..., filter=Q(...))``),
+* one GROUP BY over Expense, only when the range has partial edge
+  months, again split by conditional aggregates, and
+* one indexed range read of DailyTotal for the daily trend, which comes
+  back dense (zero-filled) for any window length.
+
+The ORM has no GROUPING SETS, so instead of one set per breakdown the
+query groups at the finest grain any breakdown needs (month, category,
+payment mode, currency) and the breakdowns are folded from those rows in
+Python.  Sums come back and are folded as integer minor units; a foreign
+currency sum is converted to the home currency as it is folded (one
+rate lookup per currency and month, see transactions.fx), and the result
+is converted to Decimal once, when it is finished.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, Max, Q, Sum
+
+from . import fx
+from .fields import from_minor, minor
+from .models import Expense, MonthlyRollup
+from .rollups import daily_series, month_start, range_plan
+
+ZERO = Decimal("0")
+
+INCOME = Q(transaction_type="income")
+EXPENSE = Q(transaction_type="expense")
+
+
+@dataclass
+class CategoryTotal:
+    name: str
+    total: Decimal
+    count: int
+
+
+@dataclass
+class MonthTotal:
+    month: date
+    income: Decimal = ZERO
+    expense: Decimal = ZERO
+
+
+@dataclass
+class ReportResult:
+    total_income: Decimal = ZERO
+    total_expense: Decimal = ZERO
+    txn_count: int = 0
+    # Expense-side breakdowns, largest first
+    categories: list[CategoryTotal] = field(default_factory=list)
+    payment_modes: list[tuple[str, Decimal]] = field(default_factory=list)
+    # Oldest first; ``daily`` has an entry for every day of its window
+    months: list[MonthTotal] = field(default_factory=list)
+    daily: list[tuple[date, Decimal]] = field(default_factory=list)
+
+    @property
+    def net(self):
+        return self.total_income - self.total_expense
+
+
+class _Accumulator:
+    def __init__(self):
+        self.result = ReportResult(total_income=0, total_expense=0)
+        self.categories = {}
+        self.payment_modes = {}
+        self.months = {}
+
+    def add(self, month, category, payment_mode, income, expense, income_count, expense_count):
+        # income and expense are minor units until finish()
+        income = income or 0
+        expense = expense or 0
+        result = self.result
+        result.total_income += income
+        result.total_expense += expense
+        result.txn_count += (income_count or 0) + (expense_count or 0)
+
+        if income_count or expense_count:
+            totals = self.months.setdefault(month, MonthTotal(month, 0, 0))
+            totals.income += income
+            totals.expense += expense
+        if expense_count:
+            cat = self.categories.setdefault(category, CategoryTotal(category, 0, 0))
+            cat.total += expense
+            cat.count += expense_count
+            self.payment_modes[payment_mode] = self.payment_modes.get(payment_mode, 0) + expense
+
+    def finish(self):
+        result = self.result
+        result.total_income = from_minor(result.total_income)
+        result.total_expense = from_minor(result.total_expense)
+        result.categories = [
+            CategoryTotal(c.name, from_minor(c.total), c.count)
+            for c in sorted(self.categories.values(), key=lambda c: c.total, reverse=True)
+        ]
+        result.payment_modes = [
+            (mode, from_minor(total))
+            for mode, total in sorted(self.payment_modes.items(), key=lambda kv: kv[1], reverse=True)
+        ]
+        result.months = [
+            MonthTotal(m, from_minor(self.months[m].income), from_minor(self.months[m].expense))
+            for m in sorted(self.months)
+        ]
+        return result
+
+
+def _rollup_rows(user, rollup_q, category):
+    qs = MonthlyRollup.objects.filter(rollup_q, user=user)
+    if category:
+        qs = qs.filter(category__name=category)
+    return (
+        qs.values("month", "category", "payment_mode", "currency")
+        .annotate(
+            # Grouped on the category id; the name rides along as an aggregate
+            name=Max("category__name"),
+            income=minor(Sum("total", filter=INCOME)),
+            expense=minor(Sum("total", filter=EXPENSE)),
+            income_count=Sum("count", filter=INCOME),
+            expense_count=Sum("count", filter=EXPENSE),
+        )
+        .order_by()
+    )
+
+
+def _edge_rows(user, edge_q, category):
+    """Totals for the partial edge months, from one scan of Expense."""
+    qs = Expense.objects.filter(edge_q, user=user)
+    if category:
+        qs = qs.filter(category__name=category)
+    return (
+        qs.values("date", "category", "payment_mode", "currency")
+        .annotate(
+            name=Max("category__name"),
+            income=minor(Sum("amount", filter=INCOME)),
+            expense=minor(Sum("amount", filter=EXPENSE)),
+            income_count=Count("id", filter=INCOME),
+            expense_count=Count("id", filter=EXPENSE),
+        )
+        .order_by()
+    )
+
+
+def build_report(user, date_from=None, date_to=None, category=None, daily_window=None):
+    """Totals and chart series for ``user``'s transactions in a date range.
+
+    Amounts are in the home currency.  ``daily_window`` ``(start, end)``
+    adds a per-day expense series over those days (clipped to the
+    range); without it none is computed.
+    """
+    acc = _Accumulator()
+    if date_from and date_to and date_from > date_to:
+        return acc.finish()
+
+    converter = fx.Converter(fx.home_currency(user))
+
+    def add(month, row):
+        acc.add(month, row["name"], row["payment_mode"],
+                converter.to_home(row["income"] or 0, row["currency"], month),
+                converter.to_home(row["expense"] or 0, row["currency"], month),
+                row["income_count"], row["expense_count"])
+
+    rollup_q, raw_ranges = range_plan(date_from, date_to)
+    for row in _rollup_rows(user, rollup_q, category):
+        add(row["month"], row)
+
+    if raw_ranges:
+        edge_q = Q()
+        for start, end in raw_ranges:
+            edge_q |= Q(date__gte=start, date__lte=end)
+        for row in _edge_rows(user, edge_q, category):
+            add(month_start(row["date"]), row)
+
+    result = acc.finish()
+    if daily_window is not None:
+        start, end = daily_window
+        if date_from:
+            start = max(start, date_from)
+        if date_to:
+            end = min(end, date_to)
+        result.daily = daily_series(user, start, end, category, converter=converter)
+    return result
@@ -0,0 +1,349 @@
+"""Incremental maintenance of the per-user MonthlyRollup and DailyTotal tables.
+
+The dashboard and reports read their totals and chart series from
+MonthlyRollup, and the daily trend from DailyTotal, instead of scanning
+Expense.  Every write path that touches an Expense row must call into
+this module inside the same transaction.  Budget spend rides along (see
+transactions.budgets).
+
+Deltas are summed as integer minor units (transactions.fields.MoneyField
+storage) and written as such, with no Decimal arithmetic per expense.
+Both tables are kept per currency; only the budget deltas are converted
+to the home currency (see transactions.fx).
+"""
+import calendar
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from . import budgets, caching, fx
+from .fields import from_minor, minor, to_minor
+from .models import DailyTotal, Expense, MonthlyRollup
+
+ZERO = Decimal("0")
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def month_end(value):
+    return value.replace(day=calendar.monthrange(value.year, value.month)[1])
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return parse_date(value)
+    return value
+
+
+def _key(expense):
+    return {
+        "user_id": expense.user_id,
+        "month": month_start(_as_date(expense.date)),
+        "transaction_type": expense.transaction_type,
+        "category": expense.category_id,
+        "payment_mode": expense.payment_mode,
+        "currency": expense.currency,
+    }
+
+
+ROLLUP_KEY = ("user_id", "month", "transaction_type", "category", "payment_mode", "currency")
+DAILY_KEY = ("user_id", "date", "category", "currency")
+
+
+def _from_storage(model, values):
+    """Attribute values for ``values`` given as stored (minor units for amounts)."""
+    fields = {name: model._meta.get_field(name) for name in values}
+    return {
+        name: fields[name].from_db_value(value, None, None) if hasattr(fields[name], "from_db_value") else value
+        for name, value in values.items()
+    }
+
+
+def _apply_delta(model, key, **deltas):
+    """Add stored-unit ``deltas`` to the ``model`` row at ``key``, creating it if missing."""
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    updated = model.objects.filter(**key).update(**changes)
+    if not updated:
+        try:
+            with transaction.atomic():
+                model.objects.create(**key, **_from_storage(model, deltas))
+        except IntegrityError:
+            # Another writer created the row between our UPDATE and INSERT.
+            model.objects.filter(**key).update(**changes)
+    if deltas["count"] < 0:
+        model.objects.filter(**key, count__lte=0).delete()
+
+
+def _upsert_sql(connection, model, key_fields, value_fields):
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    keys = [qn(model._meta.get_field(name).column) for name in key_fields]
+    values = [qn(model._meta.get_field(name).column) for name in value_fields]
+    placeholders = ", ".join(["%s"] * (len(keys) + len(values)))
+    updates = ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in values)
+    return (
+        f"INSERT INTO {table} ({', '.join(keys + values)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+
+
+def _add_deltas(model, key_fields, value_fields, deltas):
+    """Add ``{key tuple: value tuple}`` onto ``model`` rows, creating missing ones.
+
+    The values are in stored units, so amounts are integer minor units.
+    On SQLite and PostgreSQL the writes go out as a single additive
+    INSERT ... ON CONFLICT DO UPDATE; elsewhere they fall back to
+    _apply_delta() per key.
+    """
+    if not deltas:
+        return
+    connection = transaction.get_connection()
+    if connection.vendor not in ("sqlite", "postgresql"):
+        for key, values in deltas.items():
+            _apply_delta(model, dict(zip(key_fields, key)), **dict(zip(value_fields, values)))
+        return
+
+    fields = [model._meta.get_field(name) for name in key_fields]
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, key)] + list(values)
+        for key, values in deltas.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(_upsert_sql(connection, model, key_fields, value_fields), params)
+
+
+def record(expense, sign=1):
+    """Add (sign=1) or remove (sign=-1) an expense's contribution."""
+    record_many([expense], sign)
+
+
+def record_many(expenses, sign=1):
+    """Add (sign=1) or remove (sign=-1) a batch of expenses' contributions.
+
+    There is one write per distinct MonthlyRollup key and per distinct
+    DailyTotal key, batched by _add_deltas(), plus the budget lookup and
+    update of budgets.apply_deltas().  Budgets are kept in the home
+    currency, so foreign expenses reach them converted one by one, the
+    way budgets.recompute() counts them.
+    """
+    converter = fx.Converter()
+    monthly = {}
+    daily = {}
+    spending = {}
+    for expense in expenses:
+        amount = to_minor(expense.amount) * sign
+        day = _as_date(expense.date)
+        key = tuple(_key(expense).values())
+        total, count = monthly.get(key, (0, 0))
+        monthly[key] = (total + amount, count + sign)
+
+        key = (expense.user_id, day, expense.category_id, expense.currency)
+        income, spent, count = daily.get(key, (0, 0, 0))
+        if expense.transaction_type == "income":
+            income += amount
+        else:
+            spent += amount
+            spending[key[:3]] = spending.get(key[:3], 0) + converter.to_home(amount, expense.currency, day)
+        daily[key] = (income, spent, count + sign)
+    if not monthly:
+        return
+
+    _add_deltas(MonthlyRollup, ROLLUP_KEY, ("total", "count"), monthly)
+    _add_deltas(DailyTotal, DAILY_KEY, ("income", "expense", "count"), daily)
+    budgets.apply_deltas(spending)
+    if sign < 0:
+        users = {key[0] for key in monthly}
+        MonthlyRollup.objects.filter(user_id__in=users, count__lte=0).delete()
+        DailyTotal.objects.filter(user_id__in=users, count__lte=0).delete()
+
+
+def _grouped_expenses(qs):
+    return (
+        qs.annotate(rollup_month=TruncMonth("date"))
+        .values("user_id", "rollup_month", "transaction_type", "category", "payment_mode", "currency")
+        .annotate(rollup_total=Sum("amount"), rollup_count=Count("id"))
+        .order_by()
+    )
+
+
+def _grouped_days(qs):
+    return (
+        qs.values("user_id", "date", "category", "currency")
+        .annotate(
+            day_income=Sum("amount", filter=Q(transaction_type="income")),
+            day_expense=Sum("amount", filter=Q(transaction_type="expense")),
+            day_count=Count("id"),
+        )
+        .order_by()
+    )
+
+
+def _bulk_insert(model, objects, batch_size):
+    created = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """Recompute rollups and daily totals from scratch, optionally only for ``user_ids``."""
+    expenses = Expense.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    days = DailyTotal.objects.all()
+    if user_ids is not None:
+        expenses = expenses.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+        days = days.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        rollups.delete()
+        days.delete()
+        created = _bulk_insert(MonthlyRollup, (
+            MonthlyRollup(
+                user_id=item["user_id"],
+                month=item["rollup_month"],
+                transaction_type=item["transaction_type"],
+                category_id=item["category"],
+                payment_mode=item["payment_mode"],
+                currency=item["currency"],
+                total=item["rollup_total"],
+                count=item["rollup_count"],
+            )
+            for item in _grouped_expenses(expenses).iterator(chunk_size=batch_size)
+        ), batch_size)
+        created += _bulk_insert(DailyTotal, (
+            DailyTotal(
+                user_id=item["user_id"],
+                date=item["date"],
+                category_id=item["category"],
+                currency=item["currency"],
+                income=item["day_income"] or ZERO,
+                expense=item["day_expense"] or ZERO,
+                count=item["day_count"],
+            )
+            for item in _grouped_days(expenses).iterator(chunk_size=batch_size)
+        ), batch_size)
+        caching.bump_versions(user_ids)
+    return created
+
+
+def daily_series(user, start, end, category=None, kind="expense", converter=None):
+    """Dense ``[(day, total), ...]`` of ``kind`` from ``start`` to ``end`` inclusive.
+
+    One indexed range read of DailyTotal, summed per day and currency;
+    each foreign sum is converted to the home currency once.  Days
+    without a row are zero.
+    """
+    if start > end:
+        return []
+    converter = converter or fx.Converter()
+    qs = DailyTotal.objects.filter(user=user, date__gte=start, date__lte=end)
+    if category:
+        qs = qs.filter(category__name=category)
+    totals = {}
+    for day, currency, total in (
+        qs.values("date", "currency").annotate(day_total=minor(Sum(kind))).order_by()
+        .values_list("date", "currency", "day_total")
+    ):
+        totals[day] = totals.get(day, 0) + converter.to_home(total, currency, day)
+    return [
+        (day, from_minor(totals.get(day, 0)))
+        for day in (start + timedelta(days=n) for n in range((end - start).days + 1))
+    ]
+
+
+def range_plan(date_from=None, date_to=None):
+    """Split a date range into whole rollup months and raw edge ranges.
+
+    Returns ``(rollup_q, raw_ranges)``: a filter on MonthlyRollup.month for
+    the months the range fully covers, and the ``(start, end)`` day ranges
+    of any partial first/last month, which must be read from Expense.
+    """
+    rollup_q = Q()
+    raw_ranges = []
+
+    if date_from:
+        first_full = month_start(date_from)
+        if date_from != first_full:
+            raw_end = month_end(date_from)
+            if date_to and date_to < raw_end:
+                raw_end = date_to
+            raw_ranges.append((date_from, raw_end))
+            first_full = month_end(date_from) + timedelta(days=1)
+        rollup_q &= Q(month__gte=first_full)
+
+    if date_to:
+        last_month = month_start(date_to)
+        if date_to != month_end(date_to):
+            # Unless the leading edge range already ends at date_to
+            if not (date_from and date_from != month_start(date_from) and month_start(date_from) == last_month):
+                raw_ranges.append((last_month, date_to))
+            rollup_q &= Q(month__lt=last_month)
+        else:
+            rollup_q &= Q(month__lte=last_month)
+
+    return rollup_q, raw_ranges
+
+
+def summary_rows(user, date_from=None, date_to=None, category=None):
+    """Grouped (month, type, category, payment_mode, currency) totals for a date range.
+
+    Whole months come straight from MonthlyRollup.  A range that starts or
+    ends mid-month reads only those edge days from Expense, so the raw scan
+    never covers more than two months regardless of history size.
+    """
+    if date_from and date_to and date_from > date_to:
+        return []
+
+    rollup_q, raw_ranges = range_plan(date_from, date_to)
+    rollup_qs = MonthlyRollup.objects.filter(rollup_q, user=user)
+    if category:
+        rollup_qs = rollup_qs.filter(category__name=category)
+
+    rows = list(rollup_qs.values(
+        "month", "transaction_type", "category", "payment_mode", "currency", "total", "count",
+    ))
+
+    if raw_ranges:
+        date_q = Q()
+        for start, end in raw_ranges:
+            date_q |= Q(date__gte=start, date__lte=end)
+        raw_qs = Expense.objects.filter(date_q, user=user)
+        if category:
+            raw_qs = raw_qs.filter(category__name=category)
+        rows.extend(
+            {
+                "month": item["rollup_month"],
+                "transaction_type": item["transaction_type"],
+                "category": item["category"],
+                "payment_mode": item["payment_mode"],
+                "currency": item["currency"],
+                "total": item["rollup_total"],
+                "count": item["rollup_count"],
+            }
+            for item in _grouped_expenses(raw_qs)
+        )
+    return rows
+
+
+def parse_filter_date(value):
+    """Parse a ``YYYY-MM-DD`` query-string value, ignoring bad input."""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
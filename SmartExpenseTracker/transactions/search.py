@@ -0,0 +1,235 @@
+"""Pluggable full-text search over a user's transactions.
+
+The backend is picked from ``settings.TRANSACTIONS_SEARCH_BACKEND`` (a
+dotted path).  Without that setting, SQLite databases use an FTS5 index
+(installed by ensure_sqlite_fts() after every migrate) and every other
+database falls back to ``icontains`` matching.
+
+A backend's ``search()`` narrows a queryset to the matching rows and
+annotates each with ``search_rank`` (lower is more relevant), so the
+history view's other filters and keyset pagination compose with it.
+Category names are matched through the owning ``user``'s categories.
+"""
+import re
+import unicodedata
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.utils.module_loading import import_string
+
+from .models import Category
+
+FTS_TABLE = "transactions_expense_fts"  # also ExpenseSearchIndex._meta.db_table
+
+SEARCH_ORDERING = ("search_rank", "-date", "-created_at", "-id")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query):
+    return _TOKEN_RE.findall(query or "")
+
+
+def _fold(text):
+    # Roughly what the unicode61 tokenizer does with remove_diacritics
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class BaseSearchBackend:
+    def search(self, qs, query, user=None):
+        raise NotImplementedError
+
+    def index(self, expense):
+        """Called after an Expense is saved; backends with their own store update it here."""
+
+    def remove(self, expense):
+        """Called after an Expense is deleted."""
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Substring matching with no index; every match ranks equally."""
+
+    def search(self, qs, query, user=None):
+        terms = search_terms(query)
+        if not terms:
+            return qs.none()
+        for term in terms:
+            qs = qs.filter(
+                Q(description__icontains=term) |
+                Q(category__name__icontains=term) |
+                Q(payment_mode__icontains=term)
+            )
+        return qs.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 index with prefix matching and bm25 relevance.
+
+    The index is kept current by triggers on transactions_expense, so
+    bulk_create() and queryset update()/delete() stay covered too.  It
+    holds the category id rather than its name, which keeps renames to one
+    row: a term matches a category through the ids of ``user``'s
+    categories with a word starting with it.
+    """
+
+    def match_expression(self, query, categories=()):
+        """FTS5 query for ``query``; ``categories`` is ``[(id, name), ...]``."""
+        words = [(pk, [_fold(word) for word in search_terms(name)]) for pk, name in categories]
+        parts = []
+        for term in search_terms(query):
+            # Quote every token so user input can never be parsed as FTS syntax,
+            # and add * for prefix matching ("gro" finds "Groceries").
+            part = f'{{description payment_mode}} : "{term}"*'
+            folded = _fold(term)
+            ids = [str(pk) for pk, names in words if any(w.startswith(folded) for w in names)]
+            if ids:
+                part = f'({part} OR category : ({" OR ".join(ids)}))'
+            parts.append(part)
+        return " AND ".join(parts)
+
+    def search(self, qs, query, user=None):
+        categories = ()
+        if user is not None and search_terms(query):
+            categories = Category.objects.filter(user=user).values_list("pk", "name")
+        match = self.match_expression(query, categories)
+        if not match:
+            return qs.none()
+        # One join against the FTS table: it yields the matching rowids and
+        # their bm25 rank in a single pass over the index.
+        return qs.filter(search_index__document__match=match).annotate(
+            search_rank=F("search_index__rank"),
+        )
+
+
+# Kept in sync with the Expense columns.  Django rebuilds SQLite tables on
+# most ALTERs, which silently drops triggers, so ensure_sqlite_fts() runs
+# after every migrate and reinstalls (and reindexes) whatever is missing.
+FTS_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "description, category, payment_mode, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+
+def fts_triggers(category="category_id"):
+    """The index triggers, reading categories from the ``category`` column."""
+    return {
+        f"{FTS_TABLE}_ai": (
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON transactions_expense BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, description, category, payment_mode) "
+            f"VALUES (new.id, new.description, new.{category}, new.payment_mode); END"
+        ),
+        f"{FTS_TABLE}_ad": (
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON transactions_expense BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+        ),
+        f"{FTS_TABLE}_au": (
+            f"CREATE TRIGGER {FTS_TABLE}_au "
+            f"AFTER UPDATE OF description, {category}, payment_mode ON transactions_expense BEGIN "
+            f"UPDATE {FTS_TABLE} SET description = new.description, category = new.{category}, "
+            "payment_mode = new.payment_mode WHERE rowid = old.id; END"
+        ),
+    }
+
+
+def fts_rebuild_sql(category="category_id"):
+    return (
+        f"DELETE FROM {FTS_TABLE}",
+        f"INSERT INTO {FTS_TABLE}(rowid, description, category, payment_mode) "
+        f"SELECT id, description, {category}, payment_mode FROM transactions_expense",
+    )
+
+
+FTS_TRIGGERS = fts_triggers()
+FTS_REBUILD_SQL = fts_rebuild_sql()
+
+
+def _category_column(cursor):
+    """``category_id``, or the name column of a schema migrated to before 0016."""
+    cursor.execute("SELECT name FROM pragma_table_info('transactions_expense')")
+    columns = {row[0] for row in cursor.fetchall()}
+    for column in ("category_id", "category"):
+        if column in columns:
+            return column
+    return None  # no expense table yet (or any more)
+
+
+def ensure_sqlite_fts(conn, rebuild=False):
+    """Create the FTS5 table and triggers if missing or stale; reindex if any were.
+
+    The triggers follow whatever schema the database is migrated to, so
+    this is also safe after migrating backwards.
+    """
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        category = _category_column(cursor)
+        if category is None:
+            return
+        triggers = fts_triggers(category)
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'transactions_expense'"
+        )
+        existing = dict(cursor.fetchall())
+        cursor.execute(FTS_CREATE_SQL)
+        missing = [name for name, sql in triggers.items() if existing.get(name) != sql]
+        for name in missing:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(triggers[name])
+        if missing or rebuild:
+            for statement in fts_rebuild_sql(category):
+                cursor.execute(statement)
+
+
+FTS_INDEX_NEW_ROWS_SQL = (
+    f"INSERT INTO {FTS_TABLE}(rowid, description, category, payment_mode) "
+    "SELECT id, description, category_id, payment_mode FROM transactions_expense WHERE id > %s"
+)
+
+
+@contextmanager
+def deferred_fts_inserts(conn):
+    """Index rows inserted inside the block with one set-based statement.
+
+    FTS5 indexes a single INSERT ... SELECT several times faster than the
+    row-at-a-time insert trigger, which matters for bulk imports.  Must be
+    used inside transaction.atomic(): SQLite DDL is transactional and the
+    DROP TRIGGER takes the write lock, so no other connection can insert
+    while the trigger is gone.
+    """
+    name = f"{FTS_TABLE}_ai"
+    if conn.vendor != "sqlite":
+        yield
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = %s", [name])
+        if cursor.fetchone() is None:
+            installed = False
+        else:
+            installed = True
+            cursor.execute(f"DROP TRIGGER {name}")
+            # AUTOINCREMENT ids only grow, so new rows are exactly id > last_id
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions_expense")
+            (last_id,) = cursor.fetchone()
+    if not installed:
+        yield
+        return
+    try:
+        yield
+        with conn.cursor() as cursor:
+            cursor.execute(FTS_INDEX_NEW_ROWS_SQL, [last_id])
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute(FTS_TRIGGERS[name])
+
+
+def get_search_backend():
+    path = getattr(settings, "TRANSACTIONS_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "sqlite":
+        return SQLiteFTSBackend()
+    return SimpleSearchBackend()
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_version
+from .models import Budget, Category, Expense
+from .search import ensure_sqlite_fts, get_search_backend
+
+
+@receiver(post_save, sender=Expense)
+def index_expense(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Expense)
+def unindex_expense(sender, instance, **kwargs):
+    get_search_backend().remove(instance)
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    ensure_sqlite_fts(connections[using])
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def bump_data_version(sender, instance, **kwargs):
+    bump_version(instance.user_id)
@@ -0,0 +1,163 @@
+"""Realistic synthetic transactions for demos, load tests and benchmarks.
+
+Each month gets the fixed items a real ledger has (salary on the 1st,
+rent in the first days, a few utility bills mid-month).  The remaining
+rows are day-to-day spending.  Dates are drawn with a seasonal weight
+(lean February, summer travel, a festive October-December) and a weekend
+bump, and amounts follow a per-category log-normal spread.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from . import caching, categories, outbox, rollups, search
+from .models import Expense
+
+
+@dataclass(frozen=True)
+class SpendProfile:
+    category: str
+    weight: float
+    median: float  # typical amount
+    spread: float  # sigma of the log-normal
+    descriptions: tuple
+    payment_modes: tuple
+
+
+SPENDING = (
+    SpendProfile("Food", 30, 250, 0.7,
+                 ("Groceries", "Lunch", "Dinner with friends", "Coffee", "Snacks", "Food delivery"),
+                 ("UPI", "Cash", "Debit Card")),
+    SpendProfile("Transport", 18, 150, 0.6,
+                 ("Uber ride", "Metro card top-up", "Fuel", "Auto rickshaw", "Parking"),
+                 ("UPI", "Cash")),
+    SpendProfile("Shopping", 12, 1200, 0.9,
+                 ("Clothes", "Electronics", "Home supplies", "Online order", "Gift"),
+                 ("Credit Card", "UPI", "Debit Card")),
+    SpendProfile("Entertainment", 8, 600, 0.7,
+                 ("Movie tickets", "Streaming subscription", "Concert", "Games"),
+                 ("Credit Card", "UPI")),
+    SpendProfile("Health", 5, 800, 0.8,
+                 ("Pharmacy", "Doctor visit", "Lab test", "Gym membership"),
+                 ("UPI", "Debit Card", "Cash")),
+    SpendProfile("Travel", 4, 4000, 0.9,
+                 ("Flight tickets", "Hotel", "Train tickets", "Weekend trip"),
+                 ("Credit Card", "Net Banking")),
+    SpendProfile("Education", 3, 1500, 0.8,
+                 ("Online course", "Books", "Exam fee"),
+                 ("Net Banking", "UPI")),
+)
+
+# Relative spending frequency by calendar month
+SEASONALITY = {1: 0.9, 2: 0.8, 3: 0.95, 4: 1.0, 5: 1.1, 6: 1.15,
+               7: 1.05, 8: 0.95, 9: 1.0, 10: 1.25, 11: 1.35, 12: 1.45}
+WEEKEND_FACTOR = 1.3
+
+# (day of month, type, category, description, payment mode, amount)
+MONTHLY_ITEMS = (
+    (1, "income", "Salary", "Monthly salary", "Net Banking", 85000),
+    (3, "expense", "Rent", "Monthly rent", "Net Banking", 22000),
+    (12, "expense", "Bills", "Electricity bill", "UPI", 1800),
+    (15, "expense", "Bills", "Internet bill", "UPI", 900),
+    (18, "expense", "Bills", "Mobile recharge", "UPI", 400),
+)
+# Occasional extra income
+SIDE_INCOME = (("Freelance", "Freelance project", 12000), ("Investment", "Dividend", 3000),
+               ("Bonus", "Performance bonus", 40000))
+
+CATEGORIES = (
+    [(p.category, "expense") for p in SPENDING]
+    + [("Rent", "expense"), ("Bills", "expense")]
+    + [("Salary", "income")] + [(name, "income") for name, _, _ in SIDE_INCOME]
+)
+
+
+def _month_starts(start, end):
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def generate(user, rows, days=730, end=None, seed=0):
+    """Yield ``rows`` unsaved Expense objects for ``user`` over ``days`` days up to ``end``.
+
+    The user's CATEGORIES are created first if missing.
+    """
+    known = categories.resolve(user, CATEGORIES)
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    emitted = 0
+
+    # Fixed monthly items first, as long as they fit in the row budget
+    for month in _month_starts(start, end):
+        for day, kind, category, description, mode, amount in MONTHLY_ITEMS:
+            when = month.replace(day=day)
+            if emitted >= rows or not start <= when <= end:
+                continue
+            yield Expense(
+                user=user, transaction_type=kind, category=known[category, kind], description=description,
+                payment_mode=mode, date=when, amount=f"{amount * rng.uniform(0.97, 1.03):.2f}",
+            )
+            emitted += 1
+
+    calendar = [start + timedelta(days=n) for n in range(days)]
+    weights = [
+        SEASONALITY[d.month] * (WEEKEND_FACTOR if d.weekday() >= 5 else 1.0) for d in calendar
+    ]
+    profile_weights = [p.weight for p in SPENDING]
+
+    remaining = rows - emitted
+    if remaining <= 0:
+        return
+    dates = rng.choices(calendar, weights=weights, k=remaining)
+    picks = rng.choices(SPENDING, weights=profile_weights, k=remaining)
+    for when, profile in zip(dates, picks):
+        if rng.random() < 0.02:
+            category, description, median = rng.choice(SIDE_INCOME)
+            yield Expense(
+                user=user, transaction_type="income", category=known[category, "income"],
+                description=description,
+                payment_mode="Net Banking", date=when,
+                amount=f"{median * rng.lognormvariate(0, 0.4):.2f}",
+            )
+            continue
+        amount = profile.median * rng.lognormvariate(0, profile.spread)
+        yield Expense(
+            user=user, transaction_type="expense", category=known[profile.category, "expense"],
+            description=rng.choice(profile.descriptions), payment_mode=rng.choice(profile.payment_modes),
+            date=when, amount=f"{min(max(amount, 1), 10 ** 7):.2f}",
+        )
+
+
+def populate(user, rows, days=730, end=None, seed=0, batch_size=5000, mirror=False):
+    """Write ``rows`` synthetic transactions for ``user``; returns the row count.
+
+    Rows go in with the importer's bulk path (rollups upserted per batch,
+    search indexed per batch).  ``mirror`` also queues them for Mongo.
+    """
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        with transaction.atomic():
+            with search.deferred_fts_inserts(transaction.get_connection()):
+                Expense.objects.bulk_create(batch)
+            rollups.record_many(batch)
+            if mirror:
+                outbox.enqueue_upserts(batch)
+        written += len(batch)
+
+    for expense in generate(user, rows, days, end, seed):
+        batch.append(expense)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    caching.bump_version(user.pk)
+    return written
@@ -1,3 +1,1814 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib.util
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection, connections
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from pymongo import DeleteMany, DeleteOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from . import (
+    analytics, batch, budgets, caching, export, fields, fx, importer, instrumentation, mongo, outbox, pagination,
+    pragmas, reconcile, reports, recurring, rollups, search, synthetic, validation, views,
+)
+from .models import Budget, Category, DailyTotal, Expense, FxRate, MongoOutbox, MonthlyRollup, RecurringRule
+
+
+class FakeCursor(list):
+    def sort(self, key, direction=1):
+        # BSON ordering: numbers before everything else (e.g. ObjectIds)
+        super().sort(
+            key=lambda doc: (0, doc[key]) if isinstance(doc[key], int) else (1, str(doc[key])),
+            reverse=direction < 0,
+        )
+        return self
+
+
+class FakeCollection:
+    """Minimal in-memory stand-in for a pymongo collection (mongomock-style).
+
+    Supports the subset the mirror code uses: equality and ``$in``
+    filters, ``$set`` updates, upserts and ``bulk_write``.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self._next_id = 1
+
+    @staticmethod
+    def _matches(doc, query):
+        return all(
+            doc.get(key) in value["$in"] if isinstance(value, dict) else doc.get(key) == value
+            for key, value in query.items()
+        )
+
+    def _find(self, query):
+        return [doc for doc in self.docs.values() if self._matches(doc, query)]
+
+    def _upsert(self, query, values, upsert, many=False):
+        matched = self._find(query)
+        for doc in matched if many else matched[:1]:
+            doc.update(values)
+        if not matched and upsert:
+            doc = {**query, **values}
+            if "_id" not in doc:
+                doc["_id"], self._next_id = self._next_id, self._next_id + 1
+            self.docs[doc["_id"]] = doc
+
+    def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            if isinstance(op, (UpdateOne, UpdateMany)):
+                self._upsert(op._filter, op._doc["$set"], op._upsert, isinstance(op, UpdateMany))
+            elif isinstance(op, ReplaceOne):
+                for doc in self._find(op._filter)[:1]:
+                    del self.docs[doc["_id"]]
+                self._upsert(op._filter, op._doc, op._upsert)
+            elif isinstance(op, (DeleteOne, DeleteMany)):
+                matched = self._find(op._filter)
+                for doc in matched if isinstance(op, DeleteMany) else matched[:1]:
+                    del self.docs[doc["_id"]]
+            else:
+                raise NotImplementedError(type(op))
+
+    def find(self, query=None, projection=None, batch_size=None):
+        return FakeCursor(dict(doc) for doc in self._find(query or {}))
+
+    def count_documents(self, query):
+        return len(self._find(query))
+
+    def create_index(self, keys, name=None):
+        self.indexes = getattr(self, "indexes", []) + [name]
+        return name
+
+
+def get_category(user, name="Food", kind="expense"):
+    return Category.objects.get_or_create(user=user, name=name, type=kind)[0]
+
+
+def rollup_snapshot(user):
+    return sorted(
+        MonthlyRollup.objects.filter(user=user).values_list(
+            "month", "transaction_type", "category", "payment_mode", "currency", "total", "count",
+        )
+    ) + sorted(
+        DailyTotal.objects.filter(user=user).values_list(
+            "date", "category", "currency", "income", "expense", "count",
+        )
+    )
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        self.client.force_login(self.user)
+
+    def add(self, **overrides):
+        data = {
+            "type": "expense",
+            "amount": "100.50",
+            "category": "Food",
+            "description": "",
+            "date": "2026-03-14",
+            "payment": "Cash",
+        }
+        data.update(overrides)
+        self.client.post(reverse("transactions:add_transaction"), data)
+        return Expense.objects.latest("id")
+
+    def assert_matches_rebuild(self):
+        incremental = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(incremental, rollup_snapshot(self.user))
+
+    def test_add_edit_delete_keep_rollup_in_sync(self):
+        first = self.add()
+        self.add(amount="20", date="2026-03-02")
+        self.add(type="income", category="Salary", amount="5000", payment="UPI")
+        self.assert_matches_rebuild()
+
+        self.client.post(reverse("transactions:edit_transaction", args=[first.pk]), {
+            "type": "expense",
+            "amount": "75",
+            "category": "Travel",
+            "description": "",
+            "date": "2026-04-01",
+            "payment": "Cash",
+        })
+        self.assert_matches_rebuild()
+
+        self.client.get(reverse("transactions:delete_transaction", args=[first.pk]))
+        self.assert_matches_rebuild()
+        self.assertFalse(MonthlyRollup.objects.filter(category__name="Travel").exists())
+
+    def test_category_rename_touches_only_the_category_row(self):
+        for day in range(1, 29):
+            self.add(category="Food", date=f"2026-02-{day:02d}")
+        self.add(category="Groceries", amount="10", date="2026-02-01")
+        snapshot = rollup_snapshot(self.user)
+        category = Category.objects.get(user=self.user, name="Food", type="expense")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("transactions:edit_category", args=[category.pk]), {"name": "Meals"})
+
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("UPDATE", "INSERT", "DELETE"))]
+        for table in ("transactions_expense", "transactions_monthlyrollup", "transactions_dailytotal",
+                      "transactions_budget"):
+            self.assertFalse([sql for sql in writes if f'"{table}"' in sql], table)
+        self.assertEqual(snapshot, rollup_snapshot(self.user))
+        self.assert_matches_rebuild()
+        response = self.client.get(reverse("transactions:reports"))
+        self.assertEqual(response.context["top_cats"][0]["name"], "Meals")
+
+    def test_daily_series_is_dense_and_one_query(self):
+        self.add(amount="30", date="2026-03-10")
+        self.add(amount="5", category="Travel", date="2026-03-10")
+        self.add(type="income", category="Salary", amount="500", date="2026-03-12")
+
+        for days in (7, 30, 90, 365):
+            end = date(2026, 3, 12)
+            with self.assertNumQueries(1):
+                series = rollups.daily_series(self.user, end - timedelta(days=days - 1), end)
+            self.assertEqual(len(series), days)
+            self.assertEqual(series[-1], (end, Decimal("0")))
+            self.assertEqual(series[-3], (date(2026, 3, 10), Decimal("35")))
+
+        food = rollups.daily_series(self.user, date(2026, 3, 10), date(2026, 3, 12), category="Food")
+        self.assertEqual([total for _, total in food], [Decimal("30"), Decimal("0"), Decimal("0")])
+        income = rollups.daily_series(self.user, date(2026, 3, 10), date(2026, 3, 12), kind="income")
+        self.assertEqual([total for _, total in income], [Decimal("0"), Decimal("0"), Decimal("500")])
+
+    def test_reports_view_trend_window(self):
+        self.add(amount="40", date=date.today().isoformat())
+
+        response = self.client.get(reverse("transactions:reports"), {"trend": "7"})
+        self.assertEqual(response.context["trend_days"], 7)
+        self.assertEqual(len(json.loads(response.context["daily_labels"])), 7)
+
+        response = self.client.get(reverse("transactions:reports"), {"trend": "12"})
+        self.assertEqual(response.context["trend_days"], 30)
+
+    def test_summary_rows_reads_partial_months_from_expenses(self):
+        self.add(amount="1", date="2026-01-31")
+        self.add(amount="2", date="2026-02-10")
+        self.add(amount="4", date="2026-03-05")
+        self.add(amount="8", date="2026-03-20")
+
+        rows = rollups.summary_rows(self.user, date(2026, 1, 15), date(2026, 3, 10))
+
+        self.assertEqual(sum(r["total"] for r in rows), Decimal("7"))
+        self.assertEqual(sum(r["count"] for r in rows), 3)
+
+    def test_edit_reverses_the_stored_row_not_a_stale_copy(self):
+        self.add(amount="20")
+        stale = self.add()
+        Expense.objects.filter(pk=stale.pk).update(amount=Decimal("60"))
+        rollups.rebuild([self.user.id])
+
+        async_to_sync(views._update_expense)(stale, validation.clean_transaction({
+            "type": "expense", "amount": "75", "category": "Food", "date": "2026-03-14", "payment": "Cash",
+        }))
+
+        self.assert_matches_rebuild()
+        self.assertEqual(MonthlyRollup.objects.get(user=self.user).total, Decimal("95"))
+
+    def test_summary_rows_same_month_range_from_the_first(self):
+        self.add(amount="100", date="2024-03-10")
+        self.add(amount="7", date="2024-03-20")
+
+        rows = rollups.summary_rows(self.user, date(2024, 3, 1), date(2024, 3, 15))
+
+        self.assertEqual((sum(r["total"] for r in rows), sum(r["count"] for r in rows)), (Decimal("100"), 1))
+        # One edge range either way, never the same days twice
+        for start in (date(2024, 3, 1), date(2024, 3, 5)):
+            self.assertEqual(rollups.range_plan(start, date(2024, 3, 15))[1], [(start, date(2024, 3, 15))])
+
+    def test_reports_view_totals_come_from_rollup(self):
+        self.add(amount="40")
+        self.add(type="income", category="Salary", amount="100")
+
+        response = self.client.get(reverse("transactions:reports"))
+
+        self.assertEqual(response.context["total_income"], Decimal("100"))
+        self.assertEqual(response.context["total_expense"], Decimal("40"))
+        self.assertEqual(response.context["txn_count"], 2)
+        self.assertEqual(response.context["top_cats"], [{"name": "Food", "total": 40.0, "count": 1}])
+
+
+@skipUnless(connection.vendor == "sqlite", "asserts on SQLite's EXPLAIN QUERY PLAN output")
+class ExpenseIndexPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="carol", password="pw")
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = qs.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn("SCAN transactions_expense", plan)
+
+    def test_type_and_date_filter_uses_composite_index(self):
+        qs = Expense.objects.filter(user=self.user, transaction_type="expense", date__gte=date(2026, 1, 1))
+        self.assertUsesIndex(qs, "expense_user_type_date_idx")
+
+    def test_category_filter_uses_foreign_key_index(self):
+        qs = Expense.objects.filter(user=self.user, category=get_category(self.user))
+        self.assertUsesIndex(qs, "transactions_expense_category_id")
+
+    def test_history_ordering_uses_index_without_sort(self):
+        qs = Expense.objects.filter(user=self.user).order_by("-date", "-created_at")
+        self.assertUsesIndex(qs, "expense_user_recent_idx")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+    def test_keyset_page_seeks_into_history_index(self):
+        cursor = ["2026-01-01", "2026-01-01T00:00:00+00:00", 5]
+        qs = (
+            Expense.objects.filter(user=self.user)
+            .order_by(*pagination.HISTORY_ORDERING)
+            .filter(pagination._after(pagination.HISTORY_ORDERING, cursor))
+        )
+        self.assertUsesIndex(qs, "expense_user_recent_idx (user_id=? AND date<?)")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+
+class TransactionHistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dave", password="pw")
+        self.client.force_login(self.user)
+        for day in range(1, 8):
+            for _ in range(2):  # same date twice exercises the created_at/id tie-break
+                Expense.objects.create(user=self.user, amount="10", category=get_category(self.user),
+                                       date=date(2026, 5, day))
+        rollups.rebuild([self.user.id])
+
+    def test_api_pages_cover_every_row_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.client.get(reverse("transactions:history_api"), params).json()
+            seen.extend(row["id"] for row in page["results"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        expected = list(
+            Expense.objects.filter(user=self.user)
+            .order_by(*pagination.HISTORY_ORDERING).values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_history_view_renders_one_page_with_rollup_count(self):
+        with mock.patch("transactions.views.HISTORY_PAGE_SIZE", 5):
+            response = self.client.get(reverse("transactions:transactions"), {"type": "expense"})
+
+        self.assertEqual(len(response.context["transactions"]), 5)
+        self.assertIsNotNone(response.context["next_cursor"])
+        self.assertEqual(response.context["result_count"], 14)
+
+    def test_count_matches_rows_for_a_range_from_the_first(self):
+        response = self.client.get(reverse("transactions:transactions"), {"from": "2026-05-01", "to": "2026-05-03"})
+
+        self.assertEqual(len(response.context["transactions"]), 6)
+        self.assertEqual(response.context["result_count"], 6)
+
+    def test_malformed_cursor_restarts_from_first_page(self):
+        page = self.client.get(reverse("transactions:history_api"), {"cursor": "not-a-cursor"}).json()
+        self.assertEqual(len(page["results"]), 14)
+
+    def test_cursor_with_invalid_values_restarts_from_first_page(self):
+        for values in (["x", "y", "z"], ["2026-05-03", "2026-05-03T00:00:00", "7"], [None, None, None]):
+            cursor = pagination.encode_cursor(values)
+            self.assertIsNone(pagination.decode_cursor(cursor), values)
+
+            page = self.client.get(reverse("transactions:history_api"), {"cursor": cursor}).json()
+            self.assertEqual(len(page["results"]), 14)
+            response = self.client.get(reverse("transactions:transactions"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 200)
+
+
+@skipUnless(connection.vendor == "sqlite", "exercises the SQLite FTS5 backend")
+class TransactionSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erin", password="pw")
+        self.client.force_login(self.user)
+        self.groceries = Expense.objects.create(
+            user=self.user, amount="10", category=get_category(self.user), description="Weekly groceries",
+            date=date(2026, 6, 1),
+        )
+        self.dinner = Expense.objects.create(
+            user=self.user, amount="20", category=get_category(self.user), description="Dinner with groceries money",
+            date=date(2026, 6, 2), payment_mode="UPI",
+        )
+        self.taxi = Expense.objects.create(
+            user=self.user, amount="30", category=get_category(self.user, "Transport"), description="Taxi",
+            date=date(2026, 6, 3),
+        )
+
+    def search_ids(self, **params):
+        response = self.client.get(reverse("transactions:history_api"), params)
+        return [row["id"] for row in response.json()["results"]]
+
+    def test_prefix_match_orders_by_relevance(self):
+        self.assertEqual(self.search_ids(q="groc"), [self.groceries.pk, self.dinner.pk])
+
+    def test_search_composes_with_other_filters(self):
+        self.assertEqual(self.search_ids(q="groc upi"), [self.dinner.pk])
+        self.assertEqual(self.search_ids(q="food", category="Transport"), [])
+        self.assertEqual(self.search_ids(q="taxi", type="expense", **{"from": "2026-06-03"}), [self.taxi.pk])
+
+        response = self.client.get(reverse("transactions:transactions"), {"q": "groc"})
+        self.assertEqual(response.context["result_count"], 2)
+
+    def test_category_names_match_through_the_users_categories(self):
+        self.assertEqual(sorted(self.search_ids(q="foo")), [self.groceries.pk, self.dinner.pk])
+        Category.objects.filter(user=self.user, name="Food").update(name="Meals")
+        self.assertEqual(self.search_ids(q="food"), [])
+        self.assertEqual(sorted(self.search_ids(q="meal")), [self.groceries.pk, self.dinner.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        Expense.objects.filter(pk=self.taxi.pk).update(description="Airport cab")
+        self.assertEqual(self.search_ids(q="airport"), [self.taxi.pk])
+        self.assertEqual(self.search_ids(q="taxi"), [])
+
+        self.groceries.delete()
+        self.assertEqual(self.search_ids(q="groceries"), [self.dinner.pk])
+
+    def test_fts_syntax_in_query_is_treated_as_text(self):
+        self.assertEqual(self.search_ids(q='taxi" OR "food'), [])
+
+    def test_missing_triggers_are_reinstalled_and_reindexed(self):
+        with connection.cursor() as cursor:
+            for name in search.FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        Expense.objects.create(user=self.user, amount="5", category=get_category(self.user),
+                               description="Late snack", date=date(2026, 6, 4))
+
+        search.ensure_sqlite_fts(connection)
+
+        self.assertEqual(len(self.search_ids(q="snack")), 1)
+
+
+@skipUnless(connection.vendor == "sqlite", "exercises the SQLite FTS5 backend")
+class SearchIndexMigrationTests(TransactionTestCase):
+    def tearDown(self):
+        call_command("migrate", "transactions", verbosity=0)
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                           "AND tbl_name = 'transactions_expense'")
+            return dict(cursor.fetchall())
+
+    def test_triggers_follow_migrations_backwards_and_forwards(self):
+        # 0015 still keeps the category name on the expense row
+        call_command("migrate", "transactions", "0015", verbosity=0)
+        self.assertEqual(self.triggers(), search.fts_triggers("category"))
+
+        call_command("migrate", "transactions", "0010", verbosity=0)
+        self.assertEqual(self.triggers(), search.fts_triggers("category"))
+
+        call_command("migrate", "transactions", verbosity=0)
+        self.assertEqual(self.triggers(), search.FTS_TRIGGERS)
+
+
+class MongoOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="frank", password="pw")
+        self.client.force_login(self.user)
+        self.collection = FakeCollection()
+
+    def post_add(self, **overrides):
+        data = {"type": "expense", "amount": "12.50", "category": "Food",
+                "description": "Lunch", "date": "2026-07-01", "payment": "Cash"}
+        data.update(overrides)
+        return self.client.post(reverse("transactions:add_transaction"), data)
+
+    def test_request_path_never_touches_mongo(self):
+        with mock.patch("transactions.mongo.get_transactions_collection", side_effect=AssertionError):
+            response = self.post_add()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(MongoOutbox.objects.count(), 1)
+
+    def test_drain_upserts_idempotently(self):
+        self.post_add()
+        expense = Expense.objects.get()
+        self.client.post(reverse("transactions:edit_transaction", args=[expense.pk]), {
+            "type": "expense", "amount": "20", "category": "Food",
+            "description": "Brunch", "date": "2026-07-01", "payment": "UPI",
+        })
+
+        self.assertEqual(outbox.drain_batch(self.collection), 2)
+        self.assertEqual(MongoOutbox.objects.count(), 0)
+
+        docs = self.collection.find()
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0]["_id"], expense.pk)
+        self.assertEqual((docs[0]["amount"], docs[0]["description"]), (20.0, "Brunch"))
+
+        # Replaying the same change (e.g. after a crash before delete) is harmless
+        outbox.enqueue_upsert(Expense.objects.get())
+        outbox.drain_batch(self.collection)
+        self.assertEqual(self.collection.count_documents({}), 1)
+
+    def test_deletes_and_renames_propagate(self):
+        self.post_add(category="Food")
+        self.post_add(category="Food", date="2026-07-02")
+        category = Category.objects.get(user=self.user, name="Food", type="expense")
+        doomed = Expense.objects.earliest("id")
+
+        self.client.get(reverse("transactions:delete_transaction", args=[doomed.pk]))
+        self.client.post(reverse("transactions:edit_category", args=[category.pk]), {"name": "Meals"})
+        while outbox.drain_batch(self.collection):
+            pass
+
+        self.assertEqual(self.collection.count_documents({}), Expense.objects.count())
+        self.assertEqual([d["category"] for d in self.collection.find()], ["Meals"])
+
+    def test_indexes_are_created_once_per_process(self):
+        with mock.patch("transactions.mongo._indexes_ready", False), \
+                mock.patch("transactions.mongo.get_mongo_db") as get_db:
+            collection = get_db.return_value.__getitem__.return_value
+            mongo.get_transactions_collection()
+            mongo.get_transactions_collection()
+
+        self.assertEqual(collection.create_index.call_count, len(mongo.TRANSACTION_INDEXES))
+
+    def test_connection_errors_keep_entries_queued(self):
+        self.post_add()
+        down = mock.Mock()
+        down.bulk_write.side_effect = ServerSelectionTimeoutError("no servers")
+
+        with self.assertRaises(ServerSelectionTimeoutError):
+            outbox.drain_batch(down)
+        outbox.record_failure(ServerSelectionTimeoutError("no servers"))
+
+        entry = MongoOutbox.objects.get()
+        self.assertEqual(entry.last_error, "no servers")
+        self.assertIsNone(entry.dead_at)
+
+    def test_rejected_document_is_parked_after_max_attempts(self):
+        for day in ("2026-07-01", "2026-07-02", "2026-07-03"):
+            self.post_add(date=day)
+        first, second, third = MongoOutbox.objects.order_by("id")
+        rejecting = mock.Mock()
+        rejecting.bulk_write.side_effect = [
+            BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "document invalid"}]}),
+            BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "document invalid"}]}),
+        ]
+
+        self.assertEqual(outbox.drain_batch(rejecting, max_attempts=2), 1)
+        self.assertFalse(MongoOutbox.objects.filter(pk=first.pk).exists())
+        with self.assertLogs("transactions.outbox", "ERROR"):
+            outbox.drain_batch(rejecting, max_attempts=2)
+
+        second.refresh_from_db()
+        self.assertIsNotNone(second.dead_at)
+        self.assertEqual(outbox.drain_batch(self.collection, max_attempts=2), 1)
+        self.assertEqual(list(MongoOutbox.objects.all()), [second])
+
+    def test_write_concern_error_retries_the_whole_batch(self):
+        self.post_add()
+        self.post_add(date="2026-07-02")
+        timed_out = mock.Mock()
+        timed_out.bulk_write.side_effect = BulkWriteError({
+            "writeErrors": [],
+            "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication timed out"}],
+        })
+
+        with mock.patch("transactions.management.commands.drain_mongo_outbox.get_transactions_collection",
+                        return_value=timed_out):
+            with self.assertRaises(BulkWriteError):
+                call_command("drain_mongo_outbox", "--once", stdout=io.StringIO(), stderr=io.StringIO())
+
+        entries = list(MongoOutbox.objects.all())
+        self.assertEqual(len(entries), 2)
+        self.assertTrue(all(e.attempts == 0 and e.dead_at is None and e.last_error for e in entries))
+        self.assertEqual(outbox.drain_batch(self.collection), 2)
+
+    def test_batch_upsert_entries_are_never_split(self):
+        self.post_add()
+        expenses = [
+            Expense.objects.create(user=self.user, amount="5", category=get_category(self.user), date=date(2026, 7, d))
+            for d in (2, 3, 4)
+        ]
+        single, batch = outbox.pending(10)[0], outbox.enqueue_upserts(expenses)
+        rejecting = mock.Mock()
+        rejecting.bulk_write.side_effect = BulkWriteError(
+            {"writeErrors": [{"index": 2, "errmsg": "document invalid"}]},
+        )
+
+        # Operation 2 is the batch entry's second document
+        self.assertEqual(outbox.drain_batch(rejecting, batch_size=10), 1)
+        self.assertEqual(len(rejecting.bulk_write.call_args.args[0]), 4)
+        self.assertFalse(MongoOutbox.objects.filter(pk=single.pk).exists())
+        batch.refresh_from_db()
+        self.assertEqual(batch.attempts, 1)
+
+        # A three-document entry still goes out whole under a smaller cap
+        self.assertEqual(outbox.drain_batch(self.collection, batch_size=2), 1)
+        self.assertEqual(self.collection.count_documents({}), 3)
+
+
+class MongoClientConfigTests(TestCase):
+    def setUp(self):
+        mongo.pool_stats.reset()
+
+    @override_settings(MONGO={
+        "URI": "mongodb://db.example", "MAX_POOL_SIZE": 7, "SOCKET_TIMEOUT_MS": 1234,
+        "COMPRESSORS": ["zstd", "zlib"], "WRITE_CONCERN": {"w": 1},
+    })
+    def test_client_is_built_from_settings(self):
+        with mock.patch("transactions.mongo._client", None), \
+                mock.patch("transactions.mongo.MongoClient") as client_class:
+            mongo.get_mongo_db()
+            mongo.get_mongo_db()
+
+        client_class.assert_called_once()
+        args, kwargs = client_class.call_args
+        self.assertEqual(args, ("mongodb://db.example",))
+        self.assertEqual(kwargs["maxPoolSize"], 7)
+        self.assertEqual(kwargs["socketTimeoutMS"], 1234)
+        self.assertEqual(kwargs["serverSelectionTimeoutMS"], mongo.DEFAULTS["SERVER_SELECTION_TIMEOUT_MS"])
+        self.assertEqual(kwargs["compressors"], "zstd,zlib")
+        self.assertIn(mongo.pool_stats, kwargs["event_listeners"])
+        get_database = client_class.return_value.get_database
+        self.assertEqual(get_database.call_args.kwargs["write_concern"].document, {"w": 1})
+
+    @override_settings(MONGO={"URI": None})
+    def test_warm_up_needs_a_uri(self):
+        self.assertIsNone(mongo.start_warm_up())
+
+    def test_gunicorn_workers_warm_up_once_the_app_is_loaded(self):
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", settings.BASE_DIR / "gunicorn.conf.py")
+        conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(conf)
+
+        with mock.patch("transactions.mongo.start_warm_up") as start_warm_up:
+            conf.post_worker_init(mock.Mock())
+
+        start_warm_up.assert_called_once_with()
+
+    @override_settings(MONGO={"URI": "mongodb://db.example"})
+    def test_warm_up_pings_on_a_background_thread(self):
+        with mock.patch("transactions.mongo.get_mongo_db") as get_db:
+            mongo.start_warm_up().join()
+
+        get_db.return_value.command.assert_called_once_with("ping")
+
+    def test_fork_drops_the_parents_client(self):
+        with mock.patch("transactions.mongo._client", object()), \
+                mock.patch("transactions.mongo._indexes_ready", True):
+            mongo.reset_after_fork()
+            self.assertIsNone(mongo._client)
+            self.assertFalse(mongo._indexes_ready)
+
+    def test_pool_stats_and_metrics_endpoint(self):
+        stats = mongo.pool_stats
+        stats.connection_created(mock.Mock())
+        stats.connection_checked_out(mock.Mock(duration=0.25))
+        stats.connection_checked_out(mock.Mock(duration=0.5))
+        stats.connection_checked_in(mock.Mock())
+        stats.connection_check_out_failed(mock.Mock())
+
+        self.assertEqual(stats.snapshot(), {
+            "connections_open": 1,
+            "connections_in_use": 1,
+            "connections_created_total": 1,
+            "checkouts_total": 2,
+            "checkout_failures_total": 1,
+            "checkout_wait_seconds_total": 0.75,
+            "pools_cleared_total": 0,
+        })
+
+        user = User.objects.create_user(username="ops", password="pw")
+        self.client.force_login(user)
+        url = reverse("transactions:mongo_metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertIn("mongo_pool_connections_in_use 1", self.client.get(url).content.decode())
+
+
+class ReconcileMongoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="gina", password="pw")
+        self.expenses = [
+            Expense.objects.create(user=self.user, amount=str(10 + i), category=get_category(self.user),
+                                   date=date(2026, 8, 1 + i))
+            for i in range(7)
+        ]
+        self.collection = FakeCollection()
+        for expense in self.expenses:
+            outbox.enqueue_upsert(expense)
+        outbox.drain_batch(self.collection)
+
+    def test_in_sync_mirror_skips_every_chunk(self):
+        stats = reconcile.reconcile(self.collection, chunk_size=3)
+
+        self.assertEqual((stats.rows, stats.chunks, stats.chunks_skipped), (7, 3, 3))
+        self.assertEqual(stats.inserted + stats.updated + stats.deleted, 0)
+
+    def test_repairs_missing_changed_orphaned_and_legacy_documents(self):
+        missing, changed = self.expenses[1], self.expenses[4]
+        del self.collection.docs[missing.pk]
+        self.collection.docs[changed.pk]["amount"] = 999.0
+        self.collection.docs[10_000] = {"_id": 10_000, "user_id": self.user.pk}
+        self.collection.docs["legacy"] = {"_id": "legacy", "user_id": self.user.pk}
+
+        dry = reconcile.reconcile(self.collection, chunk_size=3, dry_run=True)
+        self.assertEqual((dry.inserted, dry.updated, dry.deleted), (1, 1, 2))
+        self.assertEqual(self.collection.count_documents({}), 8)
+
+        stats = reconcile.reconcile(self.collection, chunk_size=3)
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted), (1, 1, 2))
+        self.assertEqual(stats.chunks_skipped, 1)
+        self.assertEqual(sorted(self.collection.docs), sorted(e.pk for e in self.expenses))
+        self.assertEqual(self.collection.docs[changed.pk]["amount"], 14.0)
+
+        again = reconcile.reconcile(self.collection, chunk_size=3)
+        self.assertEqual(again.chunks, again.chunks_skipped)
+
+
+class PayloadCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="carol", password="pw")
+        self.client.force_login(self.user)
+        caching.get_payload_cache().clear()
+
+    def stats(self, view):
+        return caching.get_payload_cache().stats().get(view, {"hits": 0, "misses": 0})
+
+    def test_repeat_load_is_served_from_cache(self):
+        url = reverse("transactions:reports")
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(url, {"category": "Rent"})
+
+        self.assertEqual(self.stats("reports"), {"hits": 1, "misses": 2})
+
+    def test_expense_and_category_writes_invalidate(self):
+        url = reverse("dashboard:dashboard_view")
+        self.client.get(url)
+
+        self.client.post(reverse("transactions:add_transaction"), {
+            "type": "expense", "amount": "40", "category": "Food",
+            "description": "", "date": "2026-03-01", "payment": "Cash",
+        })
+        response = self.client.get(url)
+        self.assertEqual(response.context["pie_labels"], '["Food"]')
+
+        Category.objects.create(user=self.user, name="Travel", type="expense")
+        self.client.get(url)
+        self.client.get(url)
+
+        self.assertEqual(self.stats("dashboard"), {"hits": 1, "misses": 3})
+
+    def test_versions_are_per_user(self):
+        other = User.objects.create_user(username="dave", password="pw")
+        before = caching.current_version(self.user.pk)
+
+        Expense.objects.create(user=other, amount="5", category=get_category(other), date=date(2026, 3, 1))
+
+        self.assertEqual(caching.current_version(self.user.pk), before)
+
+    def test_locmem_backend_evicts_lru_and_expired(self):
+        backend = caching.LocMemLRUBackend(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIs(backend.get("b"), caching._MISSING)
+
+        with mock.patch("transactions.caching.time.monotonic", return_value=10 ** 9):
+            self.assertIs(backend.get("c"), caching._MISSING)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        url = reverse("transactions:cache_metrics")
+        self.client.get(reverse("transactions:reports"))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        body = self.client.get(url).content.decode()
+
+        self.assertIn('payload_cache_misses_total{view="reports"} 1', body)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erin", password="pw")
+        self.expense = Expense.objects.create(
+            user=self.user, amount="25.00", category=get_category(self.user), date=date(2026, 3, 2),
+        )
+        rollups.record(self.expense)
+        Category.objects.create(user=self.user, name="Salary", type="income")
+        caching.get_payload_cache().clear()
+
+    async def test_read_views(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("dashboard:dashboard_view"))
+        self.assertEqual(response.context["recent_transactions"], [self.expense])
+        self.assertContains(response, "Welcome back, erin")
+
+        response = await self.async_client.get(reverse("transactions:reports"))
+        self.assertEqual(response.context["all_categories"], ["Food", "Salary"])
+        self.assertEqual(response.context["txn_count"], 1)
+
+        response = await self.async_client.get(reverse("transactions:transactions"))
+        self.assertEqual(response.context["result_count"], 1)
+        self.assertEqual(list(response.context["transactions"]), [self.expense])
+
+    async def test_add_and_edit(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("transactions:add_transaction"))
+        self.assertEqual([c.name for c in response.context["income_categories"]], ["Salary"])
+
+        await self.async_client.post(reverse("transactions:add_transaction"), {
+            "type": "income", "amount": "100", "category": "Salary",
+            "description": "", "date": "2026-03-05", "payment": "UPI",
+        })
+        await self.async_client.post(reverse("transactions:edit_transaction", args=[self.expense.pk]), {
+            "type": "expense", "amount": "30", "category": "Food",
+            "description": "lunch", "date": "2026-03-02", "payment": "Cash",
+        })
+
+        self.assertEqual(await Expense.objects.filter(user=self.user).acount(), 2)
+        self.assertEqual((await Expense.objects.aget(pk=self.expense.pk)).amount, Decimal("30.00"))
+        self.assertEqual(await MongoOutbox.objects.acount(), 2)
+
+    async def test_edit_of_another_users_transaction_is_404(self):
+        other = await User.objects.acreate_user(username="frank", password="pw")
+        await self.async_client.aforce_login(other)
+
+        response = await self.async_client.get(reverse("transactions:edit_transaction", args=[self.expense.pk]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class SQLitePragmaTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={"temp_store": None, "cache_size": -2000})
+    def test_settings_merge_over_the_defaults(self):
+        config = pragmas.pragma_settings()
+
+        self.assertNotIn("temp_store", config)
+        self.assertEqual((config["cache_size"], config["journal_mode"]), (-2000, "WAL"))
+        self.assertEqual(pragmas.pragma_statements({"mmap_size": 0}), ["PRAGMA mmap_size = 0"])
+
+    def test_only_words_reach_the_sql(self):
+        for entry in [{"journal_mode": "WAL; DROP TABLE auth_user"}, {"cache size": 10}, {"optimize": "1.5"}]:
+            with self.assertRaises(ImproperlyConfigured):
+                pragmas.pragma_statements(entry)
+
+    def test_maintenance_refuses_other_databases(self):
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            with self.assertRaises(CommandError):
+                call_command("sqlite_maintenance", stdout=io.StringIO())
+
+
+class ConcurrentWriteTests(TransactionTestCase):
+    """Several connections writing and reading at once, as under several workers.
+
+    Needs a database file (or server) the threads can share; the default
+    SQLite profile runs its tests on one, in WAL mode with a busy timeout.
+    """
+    WRITERS = 6
+    WRITES = 8
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a test database that separate connections can share")
+        self.user = User.objects.create_user(username="mona", password="pw")
+        self.client.force_login(self.user)
+        self.today = date.today()
+        caching.get_payload_cache().clear()
+
+    def run_threads(self, tasks):
+        def run(task):
+            try:
+                return task()
+            finally:
+                # Each thread opened its own connection
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            return list(pool.map(run, tasks))
+
+    def writer(self, worker):
+        def write():
+            client = Client()
+            client.cookies = self.client.cookies
+            return [
+                client.post(reverse("transactions:add_transaction"), {
+                    "type": "expense", "amount": f"{worker + 1}.25", "category": "Food",
+                    "description": f"worker {worker} #{n}", "date": self.today.isoformat(), "payment": "UPI",
+                }).status_code
+                for n in range(self.WRITES)
+            ]
+        return write
+
+    def reader(self):
+        client = Client()
+        client.cookies = self.client.cookies
+        return [client.get(reverse("dashboard:dashboard_view")).status_code for _ in range(self.WRITES)]
+
+    def test_sqlite_connections_are_tuned_and_maintained(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        self.run_threads([self.writer(0)])
+        with connection.cursor() as cursor:
+            for pragma, expected in [("journal_mode", "wal"), ("synchronous", 1), ("temp_store", 2),
+                                     ("busy_timeout", settings.SQLITE_PRAGMAS["busy_timeout"])]:
+                cursor.execute(f"PRAGMA {pragma}")
+                self.assertEqual(cursor.fetchone()[0], expected, pragma)
+
+        out = io.StringIO()
+        call_command("sqlite_maintenance", stdout=out)
+
+        self.assertIn("Optimized; checkpointed", out.getvalue())
+        with connection.cursor() as cursor:
+            # TRUNCATE left an empty log behind
+            cursor.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self.assertEqual(cursor.fetchone(), (0, 0, 0))
+
+    def test_concurrent_adds_keep_totals_and_budgets_exact(self):
+        budgets.create(self.user, get_category(self.user), "monthly", Decimal("100000"))
+
+        statuses = self.run_threads([self.writer(worker) for worker in range(self.WRITERS)])
+
+        self.assertEqual(statuses, [[302] * self.WRITES] * self.WRITERS)
+        expected = sum(Decimal(f"{worker + 1}.25") for worker in range(self.WRITERS)) * self.WRITES
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), self.WRITERS * self.WRITES)
+        self.assertEqual(Budget.objects.get().spent, expected)
+        snapshot = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(snapshot, rollup_snapshot(self.user))
+        self.assertEqual(reports.build_report(self.user).total_expense, expected)
+
+    def test_concurrent_deletes_reverse_the_totals_once(self):
+        budgets.create(self.user, get_category(self.user), "monthly", Decimal("1000"))
+        self.run_threads([self.writer(0)])
+        expense = Expense.objects.filter(user=self.user).first()
+        MongoOutbox.objects.all().delete()
+
+        def delete():
+            client = Client()
+            client.cookies = self.client.cookies
+            return client.get(reverse("transactions:delete_transaction", args=[expense.pk])).status_code
+
+        self.run_threads([delete] * self.WRITERS)
+
+        self.assertEqual(MongoOutbox.objects.filter(op=MongoOutbox.OP_DELETE).count(), 1)
+        self.assertEqual(Budget.objects.get().spent, Decimal("1.25") * (self.WRITES - 1))
+        snapshot = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(snapshot, rollup_snapshot(self.user))
+
+    def test_reads_proceed_during_writes(self):
+        tasks = [self.writer(worker) for worker in range(self.WRITERS // 2)]
+        tasks += [self.reader] * (self.WRITERS // 2)
+
+        statuses = self.run_threads(tasks)
+
+        self.assertEqual(statuses[:self.WRITERS // 2], [[302] * self.WRITES] * (self.WRITERS // 2))
+        self.assertEqual(statuses[self.WRITERS // 2:], [[200] * self.WRITES] * (self.WRITERS // 2))
+        self.assertEqual(Expense.objects.count(), self.WRITES * (self.WRITERS // 2))
+
+
+@override_settings(REQUEST_INSTRUMENTATION={**settings.REQUEST_INSTRUMENTATION, "ENFORCE_BUDGETS": True})
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="gina", password="pw", is_staff=True)
+        self.client.force_login(self.user)
+        caching.get_payload_cache().clear()
+        instrumentation.stats.clear()
+
+    def add(self, amount="20"):
+        return self.client.post(reverse("transactions:add_transaction"), {
+            "type": "expense", "amount": amount, "category": "Food",
+            "description": "", "date": "2026-03-01", "payment": "Cash",
+        })
+
+    def test_hot_views_stay_within_query_budgets(self):
+        # Any view over its budget raises QueryBudgetExceeded here.  The
+        # budgets make writes update them and the dashboard re-base them.
+        for period, start in [("monthly", date(2026, 3, 1)), ("weekly", date(2026, 2, 23)),
+                              ("yearly", date(2026, 1, 1))]:
+            Budget.objects.create(user=self.user, category=get_category(self.user), period=period, limit=100,
+                                  period_start=start)
+        self.add()
+        pk = Expense.objects.get().pk
+        for url in [
+            reverse("dashboard:dashboard_view"),
+            reverse("transactions:reports"),
+            reverse("transactions:transactions"),
+            reverse("transactions:transactions") + "?q=food",
+            reverse("transactions:transactions") + "?type=expense&from=2026-02-15&to=2026-03-20",
+            reverse("transactions:history_api"),
+            reverse("transactions:history_api") + "?q=food",
+            reverse("transactions:add_transaction"),
+            reverse("transactions:edit_transaction", args=[pk]),
+        ]:
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        self.add("30")
+        self.client.post(reverse("transactions:edit_transaction", args=[pk]), {
+            "type": "expense", "amount": "25", "category": "Food",
+            "description": "", "date": "2026-03-02", "payment": "UPI",
+        })
+
+    @override_settings(REQUEST_INSTRUMENTATION={"QUERY_BUDGETS": {"transactions:reports": 1},
+                                                "ENFORCE_BUDGETS": True})
+    def test_exceeding_a_budget_fails(self):
+        with self.assertRaises(instrumentation.QueryBudgetExceeded):
+            self.client.get(reverse("transactions:reports"))
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("dashboard:dashboard_view"))
+
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^sql;dur=[\d.]+;desc="\d+ queries", mongo;dur=0.0;desc="0 commands", ')
+        self.assertIn("template;dur=", timing)
+        self.assertRegex(timing, r"total;dur=[\d.]+$")
+
+    def test_stats_per_view_and_endpoint(self):
+        self.client.get(reverse("transactions:reports"))
+        self.client.get(reverse("transactions:reports"))
+
+        summary = self.client.get(reverse("transactions:request_metrics"), {"format": "json"}).json()
+        self.assertEqual(summary["transactions:reports"]["requests"], 2)
+        self.assertGreater(summary["transactions:reports"]["sql_queries_max"], 0)
+
+        body = self.client.get(reverse("transactions:request_metrics")).content.decode()
+        self.assertIn('request_duration_seconds_count{view="transactions:reports"} 2', body)
+        self.assertIn('request_duration_seconds_bucket{view="transactions:reports",le="+Inf"} 2', body)
+
+    def test_mongo_commands_and_timed_blocks_count_toward_the_request(self):
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation._current.set(metrics)
+        try:
+            instrumentation.MongoCommandTimer().succeeded(mock.Mock(duration_micros=1500))
+            with instrumentation.timed("report"):
+                pass
+        finally:
+            instrumentation._current.reset(token)
+        instrumentation.MongoCommandTimer().succeeded(mock.Mock(duration_micros=1500))
+
+        self.assertEqual((metrics.mongo_commands, metrics.mongo_seconds), (1, 0.0015))
+        self.assertIn("report", metrics.timings)
+
+    def test_histogram_quantiles(self):
+        view = instrumentation.ViewStats()
+        for seconds in [0.003] * 90 + [0.2] * 9 + [20]:
+            view.observe(instrumentation.RequestMetrics(), seconds)
+
+        self.assertEqual(view.quantile(0.5), 0.005)
+        self.assertEqual(view.quantile(0.95), 0.25)
+        self.assertIsNone(view.quantile(1.0))
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate_is_seasonal_and_has_monthly_items(self):
+        end = date(2026, 12, 31)
+        rows = list(synthetic.generate(User.objects.create_user(username="gen"), 20000, days=365, end=end, seed=1))
+
+        self.assertEqual(len(rows), 20000)
+        self.assertTrue(all(date(2026, 1, 1) <= e.date <= end for e in rows))
+        salaries = [e for e in rows if e.category.name == "Salary"]
+        self.assertEqual(sorted(e.date.month for e in salaries), list(range(1, 13)))
+
+        per_day = {m: sum(1 for e in rows if e.date.month == m and e.transaction_type == "expense")
+                   for m in (2, 12)}
+        self.assertGreater(per_day[12] / 31, 1.5 * per_day[2] / 28)
+
+    def test_populate_keeps_rollups_and_search_in_step(self):
+        user = User.objects.create_user(username="synth")
+        written = synthetic.populate(user, 1500, days=200, batch_size=400)
+
+        self.assertEqual(written, Expense.objects.filter(user=user).count())
+        incremental = rollup_snapshot(user)
+        rollups.rebuild([user.pk])
+        self.assertEqual(incremental, rollup_snapshot(user))
+        self.assertTrue(Category.objects.filter(user=user, name="Salary", type="income").exists())
+        if connection.vendor == "sqlite":
+            hits = search.SQLiteFTSBackend().search(Expense.objects.filter(user=user), "groceries")
+            self.assertEqual(hits.count(), Expense.objects.filter(user=user, description="Groceries").count())
+
+    def test_command_accepts_scaled_row_counts(self):
+        out = io.StringIO()
+        call_command("generate_synthetic_data", "--users", "2", "--rows", "0.3k", "--prefix", "s", stdout=out)
+
+        self.assertEqual(Expense.objects.filter(user__username="s2").count(), 300)
+        self.assertTrue(User.objects.get(username="s1").check_password("demo-password"))
+
+
+class MoneyFieldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="mona")
+
+    def test_amounts_are_stored_in_minor_units_and_read_as_decimals(self):
+        expense = Expense.objects.create(user=self.user, amount="0.29", category=get_category(self.user),
+                                         date=date(2026, 1, 1))
+        Expense.objects.create(user=self.user, amount=Decimal("1234.5"), category=get_category(self.user),
+                               date=date(2026, 1, 2))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT amount FROM transactions_expense WHERE id = %s", [expense.pk])
+            self.assertEqual(cursor.fetchone()[0], 29)
+
+        expense.refresh_from_db()
+        self.assertEqual(str(expense.amount), "0.29")
+        self.assertEqual(Expense.objects.filter(amount__gt=Decimal("0.28")).count(), 2)
+        self.assertEqual(Expense.objects.aggregate(total=Sum("amount"))["total"], Decimal("1234.79"))
+        self.assertEqual(Expense.objects.aggregate(total=fields.minor(Sum("amount")))["total"], 123479)
+
+    def test_minor_unit_helpers(self):
+        self.assertEqual(fields.to_minor("12.345"), 1235)
+        self.assertEqual(fields.to_minor(Decimal("-0.5")), -50)
+        self.assertEqual(fields.from_minor(1250), Decimal("12.50"))
+        for value in (0, 5, 1250, -7, 9999999999):
+            self.assertEqual(fields.format_minor(value), str(fields.from_minor(value)))
+
+    def test_upsert_fallback_adds_minor_unit_deltas(self):
+        key = {"user_id": self.user.pk, "date": date(2026, 1, 1), "category": get_category(self.user)}
+        rollups._apply_delta(DailyTotal, key, income=0, expense=1250, count=1)
+        rollups._apply_delta(DailyTotal, key, income=0, expense=5, count=1)
+
+        row = DailyTotal.objects.get()
+        self.assertEqual((row.expense, row.count), (Decimal("12.55"), 2))
+
+
+class ReportEngineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erin", password="pw")
+        rows = [
+            ("income", "3000", "Salary", "Bank", date(2026, 1, 1)),
+            ("expense", "120", "Food", "Cash", date(2026, 1, 10)),
+            ("expense", "80", "Food", "UPI", date(2026, 1, 20)),
+            ("expense", "900", "Rent", "Bank", date(2026, 2, 1)),
+            ("income", "50", "Refund", "UPI", date(2026, 3, 5)),
+            ("expense", "30", "Food", "Cash", date(2026, 3, 6)),
+            ("expense", "400", "Travel", "Card", date(2026, 3, 25)),
+        ]
+        for kind, amount, category, payment, day in rows:
+            Expense.objects.create(user=self.user, transaction_type=kind, amount=amount,
+                                   category=get_category(self.user, category, kind), payment_mode=payment, date=day)
+        rollups.rebuild([self.user.id])
+
+    def test_partial_month_range_with_daily_series_takes_three_queries(self):
+        with self.assertNumQueries(3):
+            report = reports.build_report(
+                self.user, date(2026, 1, 15), date(2026, 3, 10),
+                daily_window=(date(2026, 3, 1), date(2026, 3, 31)),
+            )
+
+        self.assertEqual(report.total_income, Decimal("50"))
+        self.assertEqual(report.total_expense, Decimal("1010"))
+        self.assertEqual(report.txn_count, 4)
+        self.assertEqual(
+            [(c.name, c.total, c.count) for c in report.categories],
+            [("Rent", Decimal("900"), 1), ("Food", Decimal("110"), 2)],
+        )
+        self.assertEqual(report.payment_modes,
+                         [("Bank", Decimal("900")), ("UPI", Decimal("80")), ("Cash", Decimal("30"))])
+        self.assertEqual(
+            [(m.month, m.income, m.expense) for m in report.months],
+            [(date(2026, 1, 1), Decimal("0"), Decimal("80")),
+             (date(2026, 2, 1), Decimal("0"), Decimal("900")),
+             (date(2026, 3, 1), Decimal("50"), Decimal("30"))],
+        )
+        # Clipped to the range and zero-filled
+        self.assertEqual(len(report.daily), 10)
+        self.assertEqual(report.daily[0], (date(2026, 3, 1), Decimal("0")))
+        self.assertEqual(report.daily[5], (date(2026, 3, 6), Decimal("30")))
+        self.assertEqual(sum(total for _, total in report.daily), Decimal("30"))
+
+    def test_range_from_the_first_to_mid_month(self):
+        report = reports.build_report(self.user, date(2026, 3, 1), date(2026, 3, 10),
+                                      daily_window=(date(2026, 3, 1), date(2026, 3, 31)))
+
+        self.assertEqual((report.total_income, report.total_expense, report.txn_count),
+                         (Decimal("50"), Decimal("30"), 2))
+        self.assertEqual([(c.name, c.total, c.count) for c in report.categories], [("Food", Decimal("30"), 1)])
+        self.assertEqual(report.payment_modes, [("Cash", Decimal("30"))])
+        self.assertEqual([(m.month, m.income, m.expense) for m in report.months],
+                         [(date(2026, 3, 1), Decimal("50"), Decimal("30"))])
+        self.assertEqual(sum(total for _, total in report.daily), Decimal("30"))
+
+    def test_unfiltered_report_reads_only_the_rollup(self):
+        with self.assertNumQueries(1):
+            report = reports.build_report(self.user)
+
+        self.assertEqual(report.net, Decimal("3050") - Decimal("1530"))
+        self.assertEqual(report.categories[0].name, "Rent")
+
+    def test_reports_view_query_count(self):
+        self.client.force_login(self.user)
+        caching.get_payload_cache().clear()
+        url = reverse("transactions:reports")
+        params = {"from": "2026-01-15", "to": "2026-03-10", "category": "Food"}
+
+        # session, user, data version, rollup, expense edges, insights, categories
+        with self.assertNumQueries(7):
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.context["txn_count"], 2)
+        self.assertEqual(response.context["top_cats"], [{"name": "Food", "total": 110.0, "count": 2}])
+
+
+class AnalyticsTests(TestCase):
+    TODAY = date(2026, 3, 10)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ivy", password="pw")
+        rows = [
+            ("expense", "150", "Food", date(2025, 12, 20)),
+            ("expense", "300", "Food", date(2026, 1, 5)),
+            ("expense", "900", "Rent", date(2026, 2, 3)),
+            ("expense", "600", "Food", date(2026, 2, 10)),
+            ("income", "1000", "Salary", date(2026, 3, 1)),
+            ("expense", "100", "Food", date(2026, 3, 2)),
+            ("expense", "50", "Food", date(2026, 3, 9)),
+        ]
+        for kind, amount, category, day in rows:
+            Expense.objects.create(user=self.user, transaction_type=kind, amount=amount,
+                                   category=get_category(self.user, category, kind), payment_mode="UPI", date=day)
+        rollups.rebuild([self.user.id])
+
+    def test_insights_take_one_query(self):
+        with self.assertNumQueries(1):
+            result = analytics.insights(self.user, self.TODAY)
+
+        self.assertEqual(result.month_to_date, 150)
+        self.assertEqual(result.last_month, 1500)
+        # Trailing 30 days (10 Feb - 10 Mar) spent 750, and 21 days remain
+        self.assertEqual(result.avg_30, 25)
+        self.assertEqual(result.avg_7, round(50 / 7, 2))
+        self.assertEqual(result.projected, 150 + 25 * 21)
+        self.assertEqual(result.projected_change_pct, -55.0)
+
+    def test_month_over_month(self):
+        months = analytics.insights(self.user, self.TODAY).months
+
+        self.assertEqual(len(months), analytics.HISTORY_MONTHS)
+        self.assertEqual((months[0].month, months[-1].month), (date(2025, 3, 1), date(2026, 2, 1)))
+        dec, jan, feb = months[-3:]
+        self.assertEqual((dec.change, dec.change_pct), (150, None))
+        self.assertEqual((jan.change, jan.change_pct), (150, 100.0))
+        self.assertEqual((feb.expense, feb.change, feb.change_pct), (1500, 1200, 400.0))
+        self.assertEqual(feb.rolling_mean, 650)
+
+    def test_category_burn(self):
+        categories = analytics.insights(self.user, self.TODAY).categories
+
+        self.assertEqual(
+            [(c.name, c.month_to_date, c.burn_rate, c.projected, c.last_month) for c in categories],
+            [("Food", 150, 25, 675, 600), ("Rent", 0, 0, 0, 900)],
+        )
+
+    def test_category_filter_and_empty_history(self):
+        rent = analytics.insights(self.user, self.TODAY, category="Rent")
+        self.assertEqual([c.name for c in rent.categories], ["Rent"])
+        self.assertEqual(rent.months[-1].expense, 900)
+
+        empty = analytics.insights(User.objects.create_user(username="new"), self.TODAY)
+        self.assertEqual((empty.projected, empty.categories), (0, []))
+        self.assertIsNone(empty.projected_change_pct)
+
+    def test_reports_view_shows_insights(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("transactions:reports"))
+
+        self.assertIsInstance(response.context["insights"], analytics.Insights)
+        self.assertContains(response, "Spending Insights")
+
+
+class BudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="judy", password="pw")
+        self.client.force_login(self.user)
+        self.today = date.today()
+
+    def add(self, **overrides):
+        data = {"type": "expense", "amount": "100", "category": "Food", "description": "",
+                "date": self.today.isoformat(), "payment": "UPI"}
+        data.update(overrides)
+        self.client.post(reverse("transactions:add_transaction"), data)
+        return Expense.objects.latest("id")
+
+    def spent(self):
+        return sorted(Budget.objects.filter(user=self.user).values_list("category__name", "period", "spent"))
+
+    def assert_matches_recompute(self):
+        incremental = self.spent()
+        budgets.recompute([self.user.id])
+        self.assertEqual(incremental, self.spent())
+
+    def test_spent_follows_add_edit_delete(self):
+        budgets.create(self.user, get_category(self.user), "monthly", Decimal("500"))
+        budgets.create(self.user, get_category(self.user), "yearly", Decimal("5000"))
+        expense = self.add()
+        self.add(category="Travel")
+        self.add(type="income", category="Food", amount="999")
+        self.add(date=(self.today - timedelta(days=400)).isoformat())
+        self.assertEqual(Budget.objects.get(period="monthly").spent, Decimal("100"))
+        self.assert_matches_recompute()
+
+        self.client.post(reverse("transactions:edit_transaction", args=[expense.pk]), {
+            "type": "expense", "amount": "150", "category": "Food", "description": "",
+            "date": self.today.isoformat(), "payment": "UPI",
+        })
+        self.assertEqual(Budget.objects.get(period="monthly").spent, Decimal("150"))
+        self.assert_matches_recompute()
+
+        self.client.get(reverse("transactions:delete_transaction", args=[expense.pk]))
+        self.assertEqual(Budget.objects.get(period="monthly").spent, Decimal("0"))
+        self.assert_matches_recompute()
+
+    def test_bulk_writes_update_budgets(self):
+        budgets.create(self.user, get_category(self.user), "monthly", Decimal("500"))
+        synthetic.populate(self.user, 300, days=60, end=self.today)
+
+        self.assertGreater(Budget.objects.get().spent, 0)
+        self.assert_matches_recompute()
+
+    def test_status_is_a_lookup_and_rebases_ended_periods(self):
+        self.add(amount="40")
+        budget = budgets.create(self.user, get_category(self.user), "monthly", Decimal("50"))
+        with self.assertNumQueries(1):
+            [current] = budgets.status(self.user)
+        self.assertEqual(current.percent_used, 80.0)
+        self.assertFalse(current.is_over)
+
+        # Left over from an earlier month: re-based on read
+        Budget.objects.filter(pk=budget.pk).update(
+            period_start=date(self.today.year - 1, 1, 1), spent=Decimal("999"),
+        )
+        [current] = budgets.status(self.user)
+        self.assertEqual((current.period_start, current.spent), (self.today.replace(day=1), Decimal("40")))
+
+    def test_budgets_follow_a_category_rename(self):
+        self.add(category="Food")
+        self.add(category="Groceries", amount="10")
+        category = get_category(self.user)
+        budgets.create(self.user, category, "monthly", Decimal("500"))
+        budgets.create(self.user, category, "weekly", Decimal("100"))
+
+        self.client.post(reverse("transactions:edit_category", args=[category.pk]), {"name": "Meals"})
+
+        self.assertEqual(self.spent(), [("Meals", "monthly", Decimal("100")), ("Meals", "weekly", Decimal("100"))])
+        self.add(category="Meals", amount="5")
+        self.assert_matches_recompute()
+
+    def test_recompute_command_repairs_spent(self):
+        self.add(amount="75")
+        budgets.create(self.user, get_category(self.user), "monthly", Decimal("500"))
+        Budget.objects.update(spent=Decimal("1"), period_start=date(2020, 1, 1))
+
+        call_command("recompute_budgets", stdout=io.StringIO())
+
+        budget = Budget.objects.get()
+        self.assertEqual((budget.period_start, budget.spent), (self.today.replace(day=1), Decimal("75")))
+
+    def test_budgets_page_and_dashboard(self):
+        url = reverse("transactions:budgets")
+        self.add(amount="120")
+        self.client.post(url, {"category": "Food", "period": "monthly", "limit": "100"})
+        self.client.post(url, {"category": "Food", "period": "monthly", "limit": "200"})
+        self.client.post(url, {"category": "Travel", "period": "daily", "limit": "200"})
+        self.client.post(url, {"category": "Travel", "period": "weekly", "limit": "-5"})
+        budget = Budget.objects.get()
+        self.assertEqual((budget.limit, budget.spent), (Decimal("100"), Decimal("120")))
+
+        response = self.client.get(reverse("dashboard:dashboard_view"))
+        self.assertEqual([b.category.name for b in response.context["budgets"]], ["Food"])
+        self.assertContains(response, "budget-fill over")
+
+        self.client.post(reverse("transactions:edit_budget", args=[budget.pk]), {"limit": "150"})
+        response = self.client.get(url)
+        self.assertEqual(response.context["budgets"][0].limit, Decimal("150"))
+
+        self.client.get(reverse("transactions:delete_budget", args=[budget.pk]))
+        self.assertFalse(Budget.objects.exists())
+
+
+class RecurringTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="kate", password="pw")
+
+    def rule(self, rrule="FREQ=MONTHLY;BYMONTHDAY=1", start=date(2026, 1, 1), **fields):
+        fields = {"amount": Decimal("1200"), "category": "Rent", "payment_mode": "Bank", **fields}
+        return recurring.create(self.user, rrule, start, **fields)
+
+    def test_monthly_rule_materializes_due_dates_once(self):
+        rule = self.rule()
+        budgets.create(self.user, get_category(self.user, "Rent"), "yearly", Decimal("20000"), today=date(2026, 4, 15))
+
+        result = recurring.materialize(until=date(2026, 4, 15))
+
+        self.assertEqual((result.rules, result.created), (1, 4))
+        self.assertEqual(
+            list(rule.occurrences.order_by("date").values_list("date", flat=True)),
+            [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)],
+        )
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_run, date(2026, 5, 1))
+        self.assertEqual(Budget.objects.get().spent, Decimal("4800"))
+        self.assertEqual(MongoOutbox.objects.get().op, MongoOutbox.OP_UPSERTS)
+        snapshot = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(snapshot, rollup_snapshot(self.user))
+
+        # Nothing is due any more
+        self.assertEqual(recurring.materialize(until=date(2026, 4, 15)).created, 0)
+        # A scheduler that crashed before saving next_run skips what exists
+        RecurringRule.objects.update(next_run=date(2026, 1, 1))
+        result = recurring.materialize(until=date(2026, 5, 15))
+        self.assertEqual((result.created, result.skipped), (1, 4))
+        self.assertEqual(rule.occurrences.count(), 5)
+
+    def test_schedule_end_is_respected(self):
+        counted = self.rule("FREQ=WEEKLY;COUNT=3")
+        ended = self.rule("FREQ=DAILY", end_date=date(2026, 1, 5))
+        self.rule(start=date(2027, 1, 1))
+
+        recurring.materialize(until=date(2026, 12, 31))
+
+        self.assertEqual(counted.occurrences.count(), 3)
+        self.assertEqual(ended.occurrences.count(), 5)
+        self.assertEqual(list(RecurringRule.objects.order_by("pk").values_list("next_run", flat=True)),
+                         [None, None, date(2027, 1, 1)])
+
+    def test_chunks_and_per_rule_cap_still_catch_everything_up(self):
+        rules = [self.rule("FREQ=DAILY", start=date(2026, 1, day)) for day in range(1, 6)]
+
+        result = recurring.materialize(until=date(2026, 1, 10), chunk_size=2, batch_size=3, max_per_rule=4)
+
+        self.assertEqual([r.occurrences.count() for r in rules], [10, 9, 8, 7, 6])
+        self.assertEqual(result.created, 40)
+        self.assertFalse(RecurringRule.objects.exclude(next_run=date(2026, 1, 11)).exists())
+
+    def test_invalid_rule_is_rejected(self):
+        for text in ["FREQ=SOMETIMES", "not a rule", "FREQ=DAILY;UNTIL=20260101T000000Z"]:
+            with self.assertRaises(ValidationError):
+                self.rule(text)
+        self.assertFalse(RecurringRule.objects.exists())
+
+    def test_command(self):
+        self.rule("FREQ=YEARLY")
+        out = io.StringIO()
+        call_command("materialize_recurring", "--until", "2028-06-01", stdout=out)
+        self.assertIn("Materialized 3 occurrence(s)", out.getvalue())
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+
+RATES_CSV = """date,currency,rate
+2026-01-01,USD,83.25
+2026-03-01,usd,84
+2026-01-01,EUR,90.5
+"""
+
+
+class FxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="lena", password="pw")
+        self.client.force_login(self.user)
+        fx._known.clear()
+        self.addCleanup(fx._known.clear)
+        fx.load_rates(io.StringIO(RATES_CSV))
+
+    def add(self, **overrides):
+        data = {"type": "expense", "amount": "100", "category": "Travel", "description": "",
+                "date": "2026-01-10", "payment": "Card"}
+        data.update(overrides)
+        self.client.post(reverse("transactions:add_transaction"), data)
+        return Expense.objects.order_by("id").last()
+
+    def test_load_rates_upserts_and_validates(self):
+        self.assertEqual(FxRate.objects.count(), 3)
+        fx.load_rates(io.StringIO("date,currency,rate\n2026-03-01,USD,84.5\n"))
+        self.assertEqual(FxRate.objects.get(currency="USD", date=date(2026, 3, 1)).rate, Decimal("84.5"))
+        self.assertEqual(fx.currencies(), ["INR", "EUR", "USD"])
+
+        for text in ["2026-01-01,INR,1", "2026-01-01,USD,-2", "2026-13-01,USD,80", "2026-01-01,US,80"]:
+            with self.assertRaises(ValidationError):
+                fx.load_rates(io.StringIO(f"date,currency,rate\n{text}\n"))
+        self.assertEqual(FxRate.objects.count(), 3)
+
+    def test_converter_reads_each_currency_once(self):
+        converter = fx.Converter()
+        with self.assertNumQueries(1):
+            # The rate on the 1st of the month; before the first rate, the earliest
+            self.assertEqual(converter.to_home(1000, "USD", date(2026, 2, 20)), 83250)
+            self.assertEqual(converter.to_home(1000, "USD", date(2026, 3, 31)), 84000)
+            self.assertEqual(converter.to_home(1000, "USD", date(2025, 6, 1)), 83250)
+            self.assertEqual(converter.to_home(-1, "USD", date(2026, 1, 5)), -83)
+            self.assertEqual(converter.to_home(1000, "INR", date(2026, 1, 5)), 1000)
+        with self.assertRaises(fx.MissingRate):
+            converter.to_home(100, "CHF", date(2026, 1, 5))
+
+    def test_unknown_currency_is_rejected(self):
+        self.add(currency="CHF")
+        self.add(currency="dollars")
+        self.assertFalse(Expense.objects.exists())
+
+        expense = self.add(currency="usd")
+        self.assertEqual((expense.currency, str(expense)), ("USD", "lena - Travel - USD 100.00"))
+
+    def test_report_and_dashboard_totals_are_converted(self):
+        self.add(amount="500", category="Food", payment="UPI")
+        self.add(currency="USD", amount="10")
+        self.add(currency="USD", amount="2.50", date="2026-03-05")
+        self.add(currency="EUR", amount="1", category="Food", payment="UPI")
+        self.add(type="income", category="Salary", amount="1000", currency="USD", date="2026-03-01")
+        snapshot = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(snapshot, rollup_snapshot(self.user))
+
+        # One rollup read, then one rate read per foreign currency
+        with self.assertNumQueries(3):
+            report = reports.build_report(self.user)
+        self.assertEqual(report.total_expense, Decimal("500") + Decimal("832.50") + Decimal("210") + Decimal("90.50"))
+        self.assertEqual(report.total_income, Decimal("84000"))
+        self.assertEqual(
+            [(c.name, c.total, c.count) for c in report.categories],
+            [("Travel", Decimal("1042.50"), 2), ("Food", Decimal("590.50"), 2)],
+        )
+        self.assertEqual(
+            [(m.month, m.expense) for m in report.months],
+            [(date(2026, 1, 1), Decimal("1423.00")), (date(2026, 3, 1), Decimal("210.00"))],
+        )
+
+        series = rollups.daily_series(self.user, date(2026, 1, 9), date(2026, 1, 10))
+        self.assertEqual(series, [(date(2026, 1, 9), Decimal("0")), (date(2026, 1, 10), Decimal("1423.00"))])
+        # Partial edge months are read from Expense and converted the same way
+        edges = reports.build_report(self.user, date(2026, 1, 5), date(2026, 3, 20))
+        self.assertEqual(edges.total_expense, report.total_expense)
+
+        response = self.client.get(reverse("dashboard:dashboard_view"))
+        self.assertContains(response, "USD 10.00")
+
+    def test_budgets_count_foreign_spend_in_the_home_currency(self):
+        today = date.today()
+        fx.load_rates(io.StringIO(f"date,currency,rate\n{today.replace(day=1)},USD,80\n"))
+        budget = budgets.create(self.user, get_category(self.user, "Travel"), "monthly", Decimal("10000"))
+        self.add(currency="USD", amount="0.03", date=today.isoformat())
+        self.add(currency="USD", amount="0.03", date=today.isoformat())
+        self.add(amount="100", date=today.isoformat())
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent, Decimal("104.80"))
+
+        budgets.recompute([self.user.id])
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent, Decimal("104.80"))
+        Budget.objects.update(period_start=date(2020, 1, 1), spent=0)
+        [current] = budgets.status(self.user)
+        self.assertEqual(current.spent, Decimal("104.80"))
+
+    def test_insights_convert_foreign_rows(self):
+        today = date(2026, 1, 20)
+        self.add(amount="100", date="2026-01-10")
+        self.add(currency="USD", amount="1", date="2026-01-10")
+
+        result = analytics.insights(self.user, today)
+
+        self.assertEqual(result.month_to_date, 183.25)
+        self.assertEqual([c.name for c in result.categories], ["Travel"])
+
+    def test_command_loads_a_file_and_rebases_budgets(self):
+        path = settings.BASE_DIR / "fx_rates_test.csv"
+        path.write_text("date,currency,rate\n2026-01-01,GBP,105\n")
+        self.addCleanup(path.unlink)
+        out = io.StringIO()
+
+        call_command("load_fx_rates", str(path), stdout=out)
+
+        self.assertIn("Loaded 1 rate(s)", out.getvalue())
+        self.assertEqual(fx.clean_currency("gbp"), "GBP")
+
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="frank", password="pw")
+        self.client.force_login(self.user)
+        food, rent = get_category(self.user), get_category(self.user, "Rent")
+        Expense.objects.create(user=self.user, amount="12.50", category=food, payment_mode="Cash",
+                               description='Lunch, "special"', date=date(2026, 3, 2))
+        Expense.objects.create(user=self.user, amount="900", category=rent, payment_mode="Bank",
+                               description="March rent", date=date(2026, 3, 1))
+        Expense.objects.create(user=self.user, amount="70", category=food, payment_mode="UPI",
+                               description="Groceries", date=date(2026, 2, 1))
+
+    def export(self, **params):
+        response = self.client.get(reverse("transactions:export_transactions"), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_applies_history_filters(self):
+        response, body = self.export(category="Food", **{"from": "2026-03-01"})
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        self.assertEqual(body.decode().splitlines(), [
+            "date,description,category,transaction_type,payment_mode,currency,amount",
+            '2026-03-02,"Lunch, ""special""",Food,expense,Cash,INR,12.50',
+        ])
+
+    def test_jsonl_search_export_gzipped(self):
+        response, body = self.export(format="jsonl", compress="gzip", q="groc")
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertTrue(response["Content-Disposition"].endswith('.jsonl.gz"'))
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            "date": "2026-02-01", "description": "Groceries", "category": "Food",
+            "transaction_type": "expense", "payment_mode": "UPI", "currency": "INR", "amount": "70.00",
+        }])
+
+    def test_rows_stay_ordered_across_small_chunks(self):
+        with mock.patch.object(export, "FLUSH_BYTES", 1):
+            _, body = self.export()
+        self.assertEqual([line.split(",")[0] for line in body.decode().splitlines()[1:]],
+                         ["2026-03-02", "2026-03-01", "2026-02-01"])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse("transactions:export_transactions"), {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="grace", password="pw")
+        Category.objects.create(user=self.user, name="Food", type="expense")
+
+    def run_import(self, text, **kwargs):
+        return importer.import_csv(self.user, io.StringIO(text), **kwargs)
+
+    def test_valid_rows_are_written_in_batches(self):
+        text = (
+            "date,type,amount,category,description,payment\n"
+            "2026-01-05,expense,120.50,Food,Lunch,UPI\n"
+            "2026-01-06,expense,80,Travel,Cab,Cash\n"
+            "2026-01-07,income,5000,Salary,,Net Banking\n"
+            "\n"
+            "2026-02-01,expense,\"1,200.00\",Travel,Flight,Credit Card\n"
+            "2026-02-02,expense,30,Food,Snacks,\n"
+        )
+        with mock.patch.object(caching, "bump_version") as bump:
+            result = self.run_import(text, batch_size=2)
+
+        self.assertEqual((result.imported, result.skipped, result.categories_created), (5, 0, 2))
+        self.assertEqual(bump.call_count, 3)
+        self.assertEqual(
+            set(Category.objects.filter(user=self.user).values_list("name", "type")),
+            {("Food", "expense"), ("Travel", "expense"), ("Salary", "income")},
+        )
+        self.assertEqual(Expense.objects.get(description="Flight").amount, Decimal("1200.00"))
+        self.assertEqual(Expense.objects.get(description="Snacks").payment_mode, "Cash")
+        # One outbox row (one Mongo bulk_write) per batch
+        entries = list(MongoOutbox.objects.all())
+        self.assertEqual([e.op for e in entries], [MongoOutbox.OP_UPSERTS] * 3)
+        self.assertEqual(
+            sorted(doc["_id"] for e in entries for doc in e.document),
+            sorted(Expense.objects.values_list("pk", flat=True)),
+        )
+        collection = FakeCollection()
+        self.assertEqual(outbox.drain_batch(collection, batch_size=10), 3)
+        self.assertEqual(collection.docs[entries[0].document[0]["_id"]]["category"], "Food")
+
+        incremental = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(incremental, rollup_snapshot(self.user))
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 backend is SQLite-only")
+    def test_imported_rows_are_searchable_and_trigger_restored(self):
+        self.run_import("date,amount,category,description\n2026-01-05,10,Food,Weekly groceries\n")
+        Expense.objects.create(user=self.user, amount="5", category=get_category(self.user),
+                               description="Grocery top-up", date=date(2026, 1, 6))
+
+        found = search.SQLiteFTSBackend().search(Expense.objects.filter(user=self.user), "groc")
+        self.assertEqual(found.count(), 2)
+
+    def test_invalid_rows_are_skipped_with_line_numbers(self):
+        text = (
+            "date,type,amount,category\n"
+            "2026-01-05,expense,-5,Food\n"
+            "2026-01-05,refund,5,Food\n"
+            "not a date,expense,5,Food\n"
+            "2026-01-05,expense,5,\n"
+            "2026-01-05,expense,5,Food\n"
+        )
+        result = self.run_import(text)
+
+        self.assertEqual((result.imported, result.skipped), (1, 4))
+        self.assertEqual(result.errors, [
+            (2, "Amount must be greater than 0."),
+            (3, "Invalid transaction type."),
+            (4, "Please enter a valid date."),
+            (5, "Please fill all required fields."),
+        ])
+
+    def test_bank_statement_debit_credit_columns(self):
+        text = (
+            "Txn Date,Narration,Withdrawal Amt,Deposit Amt\n"
+            "05/01/2026,ATM cash,500.00,\n"
+            "06/01/2026,Salary credit,,45000.00\n"
+        )
+        result = self.run_import(text, default_category="Uncategorized", default_payment="Net Banking")
+
+        self.assertEqual(result.imported, 2)
+        rows = list(Expense.objects.order_by("date").values_list(
+            "date", "transaction_type", "amount", "category__name", "payment_mode"))
+        self.assertEqual(rows, [
+            (date(2026, 1, 5), "expense", Decimal("500.00"), "Uncategorized", "Net Banking"),
+            (date(2026, 1, 6), "income", Decimal("45000.00"), "Uncategorized", "Net Banking"),
+        ])
+
+    def test_zero_filled_debit_credit_column_is_ignored(self):
+        text = (
+            "date,description,debit,credit,category\n"
+            "2026-01-05,Salary,0.00,50000,Salary\n"
+            "2026-01-06,Rent,\"12,000.00\",0.00,Rent\n"
+            "2026-01-07,Nothing,0.00,0,Misc\n"
+        )
+        result = self.run_import(text)
+
+        self.assertEqual((result.imported, result.skipped), (2, 1))
+        self.assertEqual(list(Expense.objects.order_by("date").values_list("transaction_type", "amount")), [
+            ("income", Decimal("50000.00")), ("expense", Decimal("12000.00")),
+        ])
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.run_import("description,category\nLunch,Food\n")
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile(
+            "statement.csv", b"\xef\xbb\xbfdate,amount,category\n2026-03-01,99,Food\n2026-03-02,0,Food\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(reverse("transactions:import_transactions"), {"file": upload},
+                                    follow=True)
+
+        self.assertRedirects(response, reverse("transactions:transactions"))
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+        notes = [str(m) for m in response.context["messages"]]
+        self.assertIn("Imported 1 transactions.", notes)
+        self.assertIn("Skipped 1 rows (line 3: Amount must be greater than 0.).", notes)
+
+    def test_unparseable_line_stops_the_import_and_is_reported(self):
+        self.client.force_login(self.user)
+        oversized = "x" * (csv.field_size_limit() + 1)
+        upload = SimpleUploadedFile(
+            "statement.csv",
+            f"date,amount,category,description\n2026-03-01,99,Food,ok\n2026-03-02,5,Food,{oversized}\n"
+            "2026-03-03,7,Food,after\n".encode(),
+            content_type="text/csv",
+        )
+        with override_settings(TRANSACTIONS_IMPORT_BATCH_SIZE=1):
+            response = self.client.post(reverse("transactions:import_transactions"), {"file": upload},
+                                        follow=True)
+
+        self.assertRedirects(response, reverse("transactions:import_transactions"))
+        self.assertEqual(list(Expense.objects.filter(user=self.user).values_list("description", flat=True)),
+                         ["ok"])
+        [note] = [str(m) for m in response.context["messages"]]
+        self.assertRegex(note, r"^Could not read line 3 \(field larger than field limit .*\); "
+                               r"imported 1 transactions before it\.$")
+
+
+class BatchApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="heidi", password="pw")
+        self.client.force_login(self.user)
+        self.url = reverse("transactions:batch_api")
+
+    def post(self, operations):
+        return self.client.post(self.url, json.dumps({"operations": operations}),
+                                content_type="application/json")
+
+    def create_op(self, ref, **data):
+        base = {"type": "expense", "amount": "10", "category": "Food", "date": "2026-05-01"}
+        return {"op": "create", "ref": ref, "data": {**base, **data}}
+
+    def test_mixed_batch_applies_valid_operations_and_reports_each(self):
+        keep = Expense.objects.create(user=self.user, amount="40", category=get_category(self.user),
+                                      date=date(2026, 4, 1))
+        doomed = Expense.objects.create(user=self.user, amount="60", category=get_category(self.user, "Rent"),
+                                        date=date(2026, 4, 2))
+        ivan = User.objects.create_user(username="ivan")
+        foreign = Expense.objects.create(user=ivan, amount="1", category=get_category(ivan), date=date(2026, 4, 3))
+        rollups.rebuild([self.user.id])
+        MongoOutbox.objects.all().delete()
+
+        response = self.post([
+            self.create_op("a"),
+            self.create_op("b", type="income", category="Salary", amount="1,000"),
+            {"op": "update", "id": keep.pk, "data": {"amount": "45", "description": "Groceries"}},
+            {"op": "delete", "id": doomed.pk},
+            self.create_op("c", amount="-3"),
+            {"op": "delete", "id": foreign.pk},
+            {"op": "update", "id": doomed.pk, "data": {"amount": "1"}},
+            {"op": "rename"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results],
+                         ["created", "created", "updated", "deleted", "error", "error", "error", "error"])
+        self.assertEqual([r.get("ref") for r in results[:3]], ["a", "b", None])
+        self.assertEqual(results[4]["error"], "Amount must be greater than 0.")
+        self.assertEqual(results[5]["error"], "Transaction not found.")
+        self.assertEqual(results[6]["error"], "Only one operation per transaction is allowed in a batch.")
+
+        keep.refresh_from_db()
+        self.assertEqual((keep.amount, keep.description, keep.category.name), (Decimal("45"), "Groceries", "Food"))
+        self.assertFalse(Expense.objects.filter(pk=doomed.pk).exists())
+        self.assertEqual(Expense.objects.get(pk=results[1]["id"]).amount, Decimal("1000"))
+        self.assertTrue(Expense.objects.filter(pk=foreign.pk).exists())
+
+        incremental = rollup_snapshot(self.user)
+        rollups.rebuild([self.user.id])
+        self.assertEqual(incremental, rollup_snapshot(self.user))
+
+        # Everything reaches Mongo in one bulk_write
+        collection = FakeCollection()
+        collection.docs[doomed.pk] = {"_id": doomed.pk}
+        with mock.patch.object(collection, "bulk_write", wraps=collection.bulk_write) as bulk_write:
+            self.assertEqual(outbox.drain_batch(collection), 2)
+        self.assertEqual(bulk_write.call_count, 1)
+        self.assertEqual(sorted(collection.docs), sorted([keep.pk, results[0]["id"], results[1]["id"]]))
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def queries_for(n):
+            with CaptureQueriesContext(connection) as ctx:
+                self.post([self.create_op(str(i)) for i in range(n)])
+            return len(ctx.captured_queries)
+
+        queries_for(1)  # first write creates the user's DataVersion row
+        self.assertEqual(queries_for(3), queries_for(60))
+
+    def test_malformed_requests_are_rejected(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        bad_json = self.client.post(self.url, "{", content_type="application/json")
+        self.assertEqual(bad_json.status_code, 400)
+        self.assertEqual(self.post({"op": "create"}).status_code, 400)
+        too_many = self.post([self.create_op(str(i)) for i in range(batch.MAX_OPERATIONS + 1)])
+        self.assertEqual(too_many.status_code, 400)
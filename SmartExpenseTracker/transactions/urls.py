@@ -5,11 +5,21 @@ app_name = 'transactions'
 
 urlpatterns = [
     path('add-transaction/', views.add_expense, name='add_transaction'),
+    path('import/', views.import_transactions, name='import_transactions'),
     path('transactions_history/', views.transactions_view, name='transactions'),
+    path('api/history/', views.history_api, name='history_api'),
+    path('api/batch/', views.batch_api, name='batch_api'),
+    path('export/', views.export_transactions, name='export_transactions'),
     path('edit/<int:pk>/', views.edit_expense, name='edit_transaction'),
     path('delete/<int:pk>/', views.delete_expense, name='delete_transaction'),
     path('categories/', views.categories_view, name='categories'),
     path('categories/edit/<int:pk>/', views.edit_category, name='edit_category'),
     path('categories/delete/<int:pk>/', views.delete_category, name='delete_category'),
+    path('budgets/', views.budgets_view, name='budgets'),
+    path('budgets/edit/<int:pk>/', views.edit_budget, name='edit_budget'),
+    path('budgets/delete/<int:pk>/', views.delete_budget, name='delete_budget'),
     path('reports/', views.reports_view, name='reports'),
+    path('metrics/cache/', views.cache_metrics, name='cache_metrics'),
+    path('metrics/mongo/', views.mongo_metrics, name='mongo_metrics'),
+    path('metrics/requests/', views.request_metrics, name='request_metrics'),
 ]
@@ -0,0 +1,73 @@
+"""Validation rules shared by the add/edit forms and the CSV importer."""
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+
+from . import fx
+
+TRANSACTION_TYPES = ("income", "expense")
+
+# ISO first (what the date picker sends), then common bank-statement layouts
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y")
+
+# The largest amount the old DecimalField(max_digits=10, decimal_places=2) held
+MAX_AMOUNT = Decimal("99999999.99")
+
+
+def parse_transaction_date(value):
+    value = (value or "").strip()
+    try:
+        # Fast path for ISO dates, the common case by far
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS[1:]:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValidationError("Please enter a valid date.")
+
+
+def parse_amount(value):
+    try:
+        amount = Decimal(str(value).replace(",", "").strip())
+    except (InvalidOperation, TypeError):
+        raise ValidationError("Please enter a valid amount.")
+    if not amount.is_finite():
+        raise ValidationError("Please enter a valid amount.")
+    if amount <= 0:
+        raise ValidationError("Amount must be greater than 0.")
+    amount = amount.quantize(Decimal("0.01"))
+    if amount > MAX_AMOUNT:
+        raise ValidationError("Amount is too large.")
+    return amount
+
+
+def clean_transaction(data):
+    """Validate the add-transaction fields in ``data`` (a dict or QueryDict).
+
+    Returns keyword arguments for Expense; raises ValidationError with a
+    user-facing message on the first problem found.
+    """
+    transaction_type = (data.get("type") or "").strip().lower()
+    amount = data.get("amount")
+    category = (data.get("category") or "").strip()
+    expense_date = data.get("date")
+
+    if not amount or not category or not expense_date:
+        raise ValidationError("Please fill all required fields.")
+
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValidationError("Invalid transaction type.")
+
+    return {
+        "transaction_type": transaction_type,
+        "amount": parse_amount(amount),
+        "category": category[:50],
+        "description": (data.get("description") or "").strip()[:255],
+        "date": parse_transaction_date(expense_date),
+        "payment_mode": (data.get("payment") or "").strip()[:20] or "Cash",
+        "currency": fx.clean_currency(data.get("currency")),
+    }
@@ -1,123 +1,310 @@
+import asyncio
+import hashlib
+import io
 import json
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect, get_object_or_404
-from .models import Expense, Category
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+from .models import Budget, Expense, Category
 from django.contrib import messages
 from datetime import date, timedelta
-from django.db.models import Sum, Count, Q
-from django.db.models.functions import TruncMonth, TruncDate
-from .mongo import get_transactions_collection
+from django.db import transaction
+from django.db.models import ProtectedError
+from . import (
+    analytics, batch, budgets, categories, export, fx, importer, instrumentation, mongo, outbox, pagination,
+    reports, rollups, validation,
+)
+from .caching import get_payload_cache, prometheus_metrics
+from .search import SEARCH_ORDERING, get_search_backend
+
+
+async def _arender(request, template_name, context):
+    # Rendering may touch request.user (context processors), which is sync-only
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _category_lists(user):
+    """Income and expense categories for the add/edit forms, fetched together."""
+    async def of_type(kind):
+        return [c async for c in Category.objects.filter(user=user, type=kind)]
+    return await asyncio.gather(of_type("income"), of_type("expense"))
+
+
+async def _form_choices(user):
+    """Categories and currencies for the add/edit forms, fetched together."""
+    (income, expense), currencies = await asyncio.gather(
+        _category_lists(user), sync_to_async(fx.currencies)(),
+    )
+    return {"income_categories": income, "expense_categories": expense, "currencies": currencies}
 
 
 # ──────────────────────────────────────────────────
 #  ADD TRANSACTION
 # ──────────────────────────────────────────────────
+@sync_to_async
+def _create_expense(user, cleaned):
+    with transaction.atomic():
+        categories.bind(user, [cleaned])
+        expense = Expense.objects.create(user=user, **cleaned)
+        rollups.record(expense)
+        # Mirrored to MongoDB by the drain_mongo_outbox worker
+        outbox.enqueue_upsert(expense)
+    return expense
+
+
 @login_required
-def add_expense(request):
+async def add_expense(request):
+    user = await request.auser()
     if request.method == "POST":
-        transaction_type = request.POST.get("type")
-        amount = request.POST.get("amount")
-        category = request.POST.get("category")
-        description = request.POST.get("description")
-        expense_date = request.POST.get("date")
-        payment_mode = request.POST.get("payment")
-
-        if not amount or not category or not expense_date:
-            messages.error(request, "Please fill all required fields.")
-            return redirect("transactions:add_transaction")
-
         try:
-            amount_val = float(amount)
-            if amount_val <= 0:
-                messages.error(request, "Amount must be greater than 0.")
-                return redirect("transactions:add_transaction")
-        except (ValueError, TypeError):
-            messages.error(request, "Please enter a valid amount.")
+            # A foreign currency may be looked up in the rate table
+            cleaned = await sync_to_async(validation.clean_transaction)(request.POST)
+        except ValidationError as exc:
+            messages.error(request, exc.message)
             return redirect("transactions:add_transaction")
 
-        expense = Expense.objects.create(
-            user=request.user,
-            amount=amount,
-            category=category,
-            description=description,
-            date=expense_date,
-            transaction_type=transaction_type,
-            payment_mode=payment_mode,
-        )
-
-        # Save to MongoDB as well
-        collection = get_transactions_collection()
-        collection.insert_one({
-            "user_id": request.user.id,
-            "username": request.user.username,
-            "amount": float(amount),
-            "category": category,
-            "description": description,
-            "date": expense_date,
-            "transaction_type": transaction_type,
-            "payment_mode": payment_mode,
-            "created_at": expense.created_at.isoformat(),
-        })
+        await _create_expense(user, cleaned)
 
         messages.success(request, "Transaction added successfully!")
         return redirect("transactions:transactions")
 
     # GET – load dynamic categories
-    income_categories = Category.objects.filter(user=request.user, type="income")
-    expense_categories = Category.objects.filter(user=request.user, type="expense")
     context = {
         "active_page": "add_transaction",
-        "income_categories": income_categories,
-        "expense_categories": expense_categories,
+        **await _form_choices(user),
     }
-    return render(request, "transactions/add-transaction.html", context)
+    return await _arender(request, "transactions/add-transaction.html", context)
 
 
 # ──────────────────────────────────────────────────
-#  TRANSACTIONS LIST + FILTERS
+#  IMPORT TRANSACTIONS
 # ──────────────────────────────────────────────────
+PAYMENT_MODES = ["Cash", "UPI", "Debit Card", "Credit Card", "Net Banking"]
+
+
 @login_required
-def transactions_view(request):
-    user = request.user
-    qs = Expense.objects.filter(user=user).order_by("-date", "-created_at")
+def import_transactions(request):
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if not upload:
+            messages.error(request, "Please choose a CSV file to import.")
+            return redirect("transactions:import_transactions")
+
+        # Read the upload as a text stream instead of loading it into memory
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = importer.import_csv(
+                request.user,
+                stream,
+                default_type=request.POST.get("default_type", "expense"),
+                default_category=request.POST.get("default_category", ""),
+                default_payment=request.POST.get("default_payment", ""),
+            )
+        except ValidationError as exc:
+            messages.error(request, exc.message)
+            return redirect("transactions:import_transactions")
+        except UnicodeDecodeError:
+            messages.error(request, "The file must be a UTF-8 encoded CSV.")
+            return redirect("transactions:import_transactions")
+
+        if result.aborted:
+            line, error = result.aborted
+            messages.error(request, f"Could not read line {line} ({error}); "
+                                    f"imported {result.imported} transactions before it.")
+        else:
+            messages.success(request, f"Imported {result.imported} transactions.")
+        if result.skipped:
+            details = "; ".join(f"line {line}: {error}" for line, error in result.errors)
+            messages.warning(request, f"Skipped {result.skipped} rows ({details}).")
+        if result.aborted:
+            return redirect("transactions:import_transactions")
+        return redirect("transactions:transactions")
+
+    context = {
+        "active_page": "transactions",
+        "payment_modes": PAYMENT_MODES,
+    }
+    return render(request, "transactions/import-transactions.html", context)
 
-    # --- Filters ---
-    search_query = request.GET.get("q", "").strip()
-    filter_category = request.GET.get("category", "")
-    filter_type = request.GET.get("type", "")
-    filter_from = request.GET.get("from", "")
-    filter_to = request.GET.get("to", "")
 
-    if search_query:
-        qs = qs.filter(
-            Q(description__icontains=search_query) |
-            Q(category__icontains=search_query) |
-            Q(payment_mode__icontains=search_query)
+# ──────────────────────────────────────────────────
+#  TRANSACTIONS LIST + FILTERS
+# ──────────────────────────────────────────────────
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+SEARCH_COUNT_CACHE_TTL = 60  # seconds
+
+
+def _history_filters(request):
+    return {
+        "q": request.GET.get("q", "").strip(),
+        "category": request.GET.get("category", ""),
+        "type": request.GET.get("type", "").lower(),
+        "from": request.GET.get("from", ""),
+        "to": request.GET.get("to", ""),
+    }
+
+
+def _filtered_transactions(user, filters):
+    qs = Expense.objects.filter(user=user).select_related("category")
+    date_from = rollups.parse_filter_date(filters["from"])
+    date_to = rollups.parse_filter_date(filters["to"])
+
+    if filters["q"]:
+        qs = get_search_backend().search(qs, filters["q"], user)
+    if filters["category"]:
+        qs = qs.filter(category__name=filters["category"])
+    if filters["type"]:
+        qs = qs.filter(transaction_type=filters["type"])
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
+def _history_count(user, filters, qs):
+    """Result count without a second full scan of the filtered queryset.
+
+    Category/type/date filters are answered exactly from the monthly
+    rollup; free-text searches fall back to a briefly cached COUNT.
+    """
+    if not filters["q"]:
+        rows = rollups.summary_rows(
+            user,
+            rollups.parse_filter_date(filters["from"]),
+            rollups.parse_filter_date(filters["to"]),
+            filters["category"],
+        )
+        return sum(
+            r["count"] for r in rows
+            if not filters["type"] or r["transaction_type"] == filters["type"]
         )
-    if filter_category:
-        qs = qs.filter(category=filter_category)
-    if filter_type:
-        qs = qs.filter(transaction_type__iexact=filter_type)
-    if filter_from:
-        qs = qs.filter(date__gte=filter_from)
-    if filter_to:
-        qs = qs.filter(date__lte=filter_to)
-
-    # Load user categories for the filter dropdown
-    all_categories = Category.objects.filter(user=user).values_list("name", flat=True).distinct()
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return cache.get_or_set(f"txn-count:{user.pk}:{digest}", qs.count, SEARCH_COUNT_CACHE_TTL)
+
+
+async def _all_category_names(user):
+    qs = Category.objects.filter(user=user).values_list("name", flat=True).distinct()
+    return [name async for name in qs]
+
+
+def _history_ordering(filters):
+    # Searches are ordered by relevance first, plain history by recency
+    return SEARCH_ORDERING if filters["q"] else pagination.HISTORY_ORDERING
+
+
+@login_required
+async def transactions_view(request):
+    user = await request.auser()
+    filters = _history_filters(request)
+    # A search looks up the user's categories while building its query
+    qs = await sync_to_async(_filtered_transactions)(user, filters)
+
+    # The page, the count and the dropdown are independent queries
+    (transactions, next_cursor), result_count, all_categories = await asyncio.gather(
+        sync_to_async(pagination.keyset_page)(
+            qs, request.GET.get("cursor"), HISTORY_PAGE_SIZE, _history_ordering(filters),
+        ),
+        sync_to_async(_history_count)(user, filters, qs),
+        # Load user categories for the filter dropdown
+        _all_category_names(user),
+    )
 
     context = {
         "active_page": "transactions",
-        "transactions": qs,
-        "result_count": qs.count(),
-        "search_query": search_query,
-        "filter_category": filter_category,
-        "filter_type": filter_type,
-        "filter_from": filter_from,
-        "filter_to": filter_to,
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "result_count": result_count,
+        "search_query": filters["q"],
+        "filter_category": filters["category"],
+        "filter_type": filters["type"],
+        "filter_from": filters["from"],
+        "filter_to": filters["to"],
         "all_categories": all_categories,
     }
-    return render(request, "transactions/transactions.html", context)
+    return await _arender(request, "transactions/transactions.html", context)
+
+
+@login_required
+def history_api(request):
+    """Fixed-size JSON pages of the transactions history for infinite scroll."""
+    filters = _history_filters(request)
+    qs = _filtered_transactions(request.user, filters)
+
+    try:
+        page_size = int(request.GET.get("limit", HISTORY_PAGE_SIZE))
+    except ValueError:
+        page_size = HISTORY_PAGE_SIZE
+    page_size = max(1, min(page_size, HISTORY_MAX_PAGE_SIZE))
+
+    transactions, next_cursor = pagination.keyset_page(
+        qs, request.GET.get("cursor"), page_size, _history_ordering(filters),
+    )
+    results = [
+        {
+            "id": txn.pk,
+            "date": txn.date.isoformat(),
+            "description": txn.description,
+            "category": txn.category.name,
+            "amount": str(txn.amount),
+            "currency": txn.currency,
+            "transaction_type": txn.transaction_type,
+            "payment_mode": txn.payment_mode,
+            "edit_url": reverse("transactions:edit_transaction", args=[txn.pk]),
+            "delete_url": reverse("transactions:delete_transaction", args=[txn.pk]),
+        }
+        for txn in transactions
+    ]
+    return JsonResponse({"results": results, "next_cursor": next_cursor})
+
+
+@login_required
+def export_transactions(request):
+    """Stream the filtered history as CSV or JSON Lines, optionally gzipped."""
+    filters = _history_filters(request)
+    fmt = request.GET.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest("Unsupported export format.")
+    compress = request.GET.get("compress") == "gzip"
+
+    qs = _filtered_transactions(request.user, filters).order_by(*_history_ordering(filters))
+    content_type, extension = export.FORMATS[fmt]
+    filename = f"transactions-{date.today().isoformat()}.{extension}"
+    if compress:
+        content_type, filename = "application/gzip", filename + ".gz"
+
+    response = StreamingHttpResponse(export.stream(qs, fmt, compress), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ──────────────────────────────────────────────────
+#  BATCH API
+# ──────────────────────────────────────────────────
+@login_required
+@require_POST
+def batch_api(request):
+    """Apply a JSON array of create/update/delete operations in one transaction."""
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list):
+        return JsonResponse({"error": "operations must be a list."}, status=400)
+    if len(operations) > batch.MAX_OPERATIONS:
+        return JsonResponse(
+            {"error": f"At most {batch.MAX_OPERATIONS} operations per request."}, status=400,
+        )
+    return JsonResponse({"results": batch.apply_batch(request.user, operations)})
 
 
 # ──────────────────────────────────────────────────
@@ -125,79 +312,72 @@ def transactions_view(request):
 # ──────────────────────────────────────────────────
 @login_required
 def delete_expense(request, pk):
-    try:
-        expense = Expense.objects.get(pk=pk, user=request.user)
-        expense.delete()
-        messages.success(request, "Transaction deleted successfully!")
-    except Expense.DoesNotExist:
+    with transaction.atomic():
+        # Locked and read inside the transaction, so a repeated or concurrent
+        # delete finds nothing instead of reversing the totals twice
+        expense = Expense.objects.select_for_update().filter(pk=pk, user=request.user).first()
+        if expense is not None:
+            rollups.record(expense, -1)
+            outbox.enqueue_delete(expense)
+            expense.delete()
+    if expense is None:
         messages.error(request, "Transaction not found.")
+    else:
+        messages.success(request, "Transaction deleted successfully!")
     return redirect("transactions:transactions")
 
 
 # ──────────────────────────────────────────────────
 #  EDIT TRANSACTION
 # ──────────────────────────────────────────────────
+@sync_to_async
+def _update_expense(expense, cleaned):
+    """Apply ``cleaned`` to ``expense``; False if it was deleted meanwhile."""
+    with transaction.atomic():
+        # Reverse what is stored now, not the copy read before the lock
+        expense = (
+            Expense.objects.select_for_update().select_related("user", "category")
+            .filter(pk=expense.pk).first()
+        )
+        if expense is None:
+            return False
+        categories.bind(expense.user, [cleaned])
+        rollups.record(expense, -1)
+        for field, value in cleaned.items():
+            setattr(expense, field, value)
+        expense.save()
+        rollups.record(expense)
+        outbox.enqueue_upsert(expense)
+    return True
+
+
 @login_required
-def edit_expense(request, pk):
-    expense = get_object_or_404(Expense, pk=pk, user=request.user)
+async def edit_expense(request, pk):
+    user = await request.auser()
+    expense = await aget_object_or_404(Expense.objects.select_related("user", "category"), pk=pk, user=user)
 
     if request.method == "POST":
-        transaction_type = request.POST.get("type")
-        amount = request.POST.get("amount")
-        category = request.POST.get("category")
-        description = request.POST.get("description")
-        expense_date = request.POST.get("date")
-        payment_mode = request.POST.get("payment")
-
-        if not amount or not category or not expense_date:
-            messages.error(request, "Please fill all required fields.")
-            return redirect("transactions:edit_transaction", pk=pk)
-
         try:
-            amount_val = float(amount)
-            if amount_val <= 0:
-                messages.error(request, "Amount must be greater than 0.")
-                return redirect("transactions:edit_transaction", pk=pk)
-        except (ValueError, TypeError):
-            messages.error(request, "Please enter a valid amount.")
+            # A foreign currency may be looked up in the rate table
+            cleaned = await sync_to_async(validation.clean_transaction)(request.POST)
+        except ValidationError as exc:
+            messages.error(request, exc.message)
             return redirect("transactions:edit_transaction", pk=pk)
 
-        old_created_at = expense.created_at.isoformat()
-
-        expense.transaction_type = transaction_type
-        expense.amount = amount
-        expense.category = category
-        expense.description = description
-        expense.date = expense_date
-        expense.payment_mode = payment_mode
-        expense.save()
-
-        collection = get_transactions_collection()
-        collection.update_one(
-            {"user_id": request.user.id, "created_at": old_created_at},
-            {"$set": {
-                "amount": float(amount),
-                "category": category,
-                "description": description,
-                "date": expense_date,
-                "transaction_type": transaction_type,
-                "payment_mode": payment_mode,
-            }}
-        )
+        if not await _update_expense(expense, cleaned):
+            messages.error(request, "Transaction not found.")
+            return redirect("transactions:transactions")
 
         messages.success(request, "Transaction updated successfully!")
         return redirect("transactions:transactions")
 
     # GET – load dynamic categories
-    income_categories = Category.objects.filter(user=request.user, type="income")
-    expense_categories = Category.objects.filter(user=request.user, type="expense")
     context = {
         "active_page": "add_transaction",
         "expense": expense,
-        "income_categories": income_categories,
-        "expense_categories": expense_categories,
+        **await _form_choices(user),
     }
-    return render(request, "transactions/edit-transaction.html", context)
+    return await _arender(request, "transactions/edit-transaction.html", context)
 
 
 # ──────────────────────────────────────────────────
@@ -255,11 +435,11 @@ def edit_category(request, pk):
             return redirect("transactions:categories")
 
         old_name = category.name
-        category.name = name
-        category.save()
-
-        # Update existing transactions that used the old category name
-        Expense.objects.filter(user=request.user, category=old_name).update(category=name)
+        with transaction.atomic():
+            # Transactions, rollups and budgets point at the row, so this is the whole rename
+            category.name = name
+            category.save()
+            outbox.enqueue_rename(request.user, category.type, old_name, name)
 
         messages.success(request, f'Category renamed to "{name}"!')
         return redirect("transactions:categories")
@@ -272,7 +452,7 @@ def delete_category(request, pk):
     category = get_object_or_404(Category, pk=pk, user=request.user)
 
     # Check if any transactions use this category
-    txn_count = Expense.objects.filter(user=request.user, category=category.name).count()
+    txn_count = category.expenses.count()
     if txn_count > 0:
         messages.error(
             request,
@@ -282,146 +462,209 @@ def delete_category(request, pk):
         return redirect("transactions:categories")
 
     name = category.name
-    category.delete()
+    try:
+        category.delete()
+    except ProtectedError:
+        messages.error(request, f'Cannot delete "{name}" — a recurring transaction uses it.')
+        return redirect("transactions:categories")
     messages.success(request, f'Category "{name}" deleted!')
     return redirect("transactions:categories")
 
 
 # ──────────────────────────────────────────────────
-#  REPORTS & ANALYTICS
+#  BUDGETS
 # ──────────────────────────────────────────────────
 @login_required
-def reports_view(request):
+def budgets_view(request):
+    """List budgets with their progress + handle add new budget."""
     user = request.user
 
-    # ── Filters ──
-    filter_from = request.GET.get("from", "")
-    filter_to = request.GET.get("to", "")
-    filter_category = request.GET.get("category", "")
+    if request.method == "POST":
+        name = request.POST.get("category", "").strip()
+        period = request.POST.get("period", "")
 
-    qs = Expense.objects.filter(user=user)
-
-    if filter_from:
-        qs = qs.filter(date__gte=filter_from)
-    if filter_to:
-        qs = qs.filter(date__lte=filter_to)
-    if filter_category:
-        qs = qs.filter(category=filter_category)
-
-    # ── Summary totals ──
-    total_income = qs.filter(transaction_type__iexact="income").aggregate(t=Sum("amount"))["t"] or 0
-    total_expense = qs.filter(transaction_type__iexact="expense").aggregate(t=Sum("amount"))["t"] or 0
-    net_savings = float(total_income) - float(total_expense)
-    txn_count = qs.count()
-
-    # ── Pie: Category-wise expense breakdown ──
-    cat_data = (
-        qs.filter(transaction_type__iexact="expense")
-        .values("category")
-        .annotate(total=Sum("amount"))
-        .order_by("-total")
-    )
-    pie_labels = [d["category"] for d in cat_data]
-    pie_values = [float(d["total"]) for d in cat_data]
-
-    # ── Bar: Monthly income vs expense ──
-    monthly_income = (
-        qs.filter(transaction_type__iexact="income")
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total=Sum("amount"))
-        .order_by("month")
-    )
-    monthly_expense = (
-        qs.filter(transaction_type__iexact="expense")
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total=Sum("amount"))
-        .order_by("month")
-    )
+        category = Category.objects.filter(user=user, name=name, type="expense").first()
+        if category is None:
+            messages.error(request, "Please choose a category.")
+            return redirect("transactions:budgets")
 
-    all_months: set = set()
-    inc_map: dict = {}
-    exp_map: dict = {}
-
-    for item in monthly_income:
-        label = item["month"].strftime("%b %Y")
-        inc_map[label] = float(item["total"])
-        all_months.add(item["month"])
-
-    for item in monthly_expense:
-        label = item["month"].strftime("%b %Y")
-        exp_map[label] = float(item["total"])
-        all_months.add(item["month"])
-
-    sorted_all = sorted(all_months)
-    sorted_months = sorted_all[-12:] if len(sorted_all) > 12 else sorted_all
-    bar_labels = [m.strftime("%b %Y") for m in sorted_months]
-    bar_income = [inc_map.get(l, 0) for l in bar_labels]
-    bar_expense = [exp_map.get(l, 0) for l in bar_labels]
-
-    # ── Line: Daily spending trend (last 30 days) ──
-    thirty_days_ago = date.today() - timedelta(days=30)
-    daily_data = (
-        qs.filter(transaction_type__iexact="expense", date__gte=thirty_days_ago)
-        .values("date")
-        .annotate(total=Sum("amount"))
-        .order_by("date")
-    )
-    daily_labels = [d["date"].strftime("%d %b") for d in daily_data]
-    daily_values = [float(d["total"]) for d in daily_data]
-
-    # ── Top 5 spending categories ──
-    top_categories = (
-        qs.filter(transaction_type__iexact="expense")
-        .values("category")
-        .annotate(total=Sum("amount"), count=Count("id"))
-        .order_by("-total")[:5]
-    )
-    top_cats = [
-        {"name": d["category"], "total": float(d["total"]), "count": d["count"]}
-        for d in top_categories
-    ]
+        if period not in dict(Budget.PERIOD_CHOICES):
+            messages.error(request, "Invalid budget period.")
+            return redirect("transactions:budgets")
 
-    # ── Payment mode breakdown ──
-    payment_data = (
-        qs.filter(transaction_type__iexact="expense")
-        .values("payment_mode")
-        .annotate(total=Sum("amount"))
-        .order_by("-total")
-    )
-    pay_labels = [d["payment_mode"] for d in payment_data]
-    pay_values = [float(d["total"]) for d in payment_data]
+        try:
+            limit = validation.parse_amount(request.POST.get("limit"))
+        except ValidationError as exc:
+            messages.error(request, exc.message)
+            return redirect("transactions:budgets")
+
+        if Budget.objects.filter(user=user, category=category, period=period).exists():
+            messages.error(request, f'A {period} budget for "{name}" already exists.')
+            return redirect("transactions:budgets")
 
-    # ── All categories for filter dropdown ──
-    all_categories = Category.objects.filter(user=user).values_list("name", flat=True).distinct()
+        budgets.create(user, category, period, limit)
+        messages.success(request, f'Budget for "{name}" added successfully!')
+        return redirect("transactions:budgets")
 
     context = {
-        "active_page": "reports",
-        # Filters
-        "filter_from": filter_from,
-        "filter_to": filter_to,
-        "filter_category": filter_category,
+        "active_page": "budgets",
+        "budgets": budgets.status(user),
+        "expense_categories": Category.objects.filter(user=user, type="expense"),
+        "period_choices": Budget.PERIOD_CHOICES,
+    }
+    return render(request, "transactions/budgets.html", context)
+
+
+@login_required
+def edit_budget(request, pk):
+    budget = get_object_or_404(Budget.objects.select_related("category"), pk=pk, user=request.user)
+
+    if request.method == "POST":
+        try:
+            budget.limit = validation.parse_amount(request.POST.get("limit"))
+        except ValidationError as exc:
+            messages.error(request, exc.message)
+            return redirect("transactions:budgets")
+
+        budget.save(update_fields=["limit"])
+        messages.success(request, f'Budget for "{budget.category.name}" updated!')
+
+    return redirect("transactions:budgets")
+
+
+@login_required
+def delete_budget(request, pk):
+    budget = get_object_or_404(Budget.objects.select_related("category"), pk=pk, user=request.user)
+    category = budget.category.name
+    budget.delete()
+    messages.success(request, f'Budget for "{category}" deleted!')
+    return redirect("transactions:budgets")
+
+
+# ──────────────────────────────────────────────────
+#  REPORTS & ANALYTICS
+# ──────────────────────────────────────────────────
+TREND_WINDOWS = (7, 30, 90, 365)
+DEFAULT_TREND_DAYS = 30
+
+
+def _trend_days(value):
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_TREND_DAYS
+    return days if days in TREND_WINDOWS else DEFAULT_TREND_DAYS
+
+
+async def _reports_payload(user, date_from, date_to, filter_category, today, trend_days):
+    # Every total and series comes out of one report pass, which runs
+    # alongside the insights and the category list for the filter dropdown.
+    # Insights are always "as of today"; only the category filter applies.
+    report, insights, all_categories = await asyncio.gather(
+        sync_to_async(reports.build_report)(
+            user, date_from, date_to, filter_category,
+            daily_window=(today - timedelta(days=trend_days - 1), today),
+        ),
+        sync_to_async(analytics.insights)(user, today, filter_category),
+        _all_category_names(user),
+    )
+
+    # ── Bar: Monthly income vs expense (last 12 months) ──
+    months = report.months[-12:]
+
+    return {
         "all_categories": all_categories,
         # Summary
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "net_savings": net_savings,
-        "txn_count": txn_count,
+        "total_income": report.total_income,
+        "total_expense": report.total_expense,
+        "net_savings": float(report.net),
+        "txn_count": report.txn_count,
         # Pie chart
-        "pie_labels": json.dumps(pie_labels),
-        "pie_values": json.dumps(pie_values),
+        "pie_labels": json.dumps([c.name for c in report.categories]),
+        "pie_values": json.dumps([float(c.total) for c in report.categories]),
         # Bar chart
-        "bar_labels": json.dumps(bar_labels),
-        "bar_income": json.dumps(bar_income),
-        "bar_expense": json.dumps(bar_expense),
+        "bar_labels": json.dumps([m.month.strftime("%b %Y") for m in months]),
+        "bar_income": json.dumps([float(m.income) for m in months]),
+        "bar_expense": json.dumps([float(m.expense) for m in months]),
         # Line chart (daily)
-        "daily_labels": json.dumps(daily_labels),
-        "daily_values": json.dumps(daily_values),
+        "daily_labels": json.dumps([day.strftime("%d %b") for day, _ in report.daily]),
+        "daily_values": json.dumps([float(total) for _, total in report.daily]),
         # Payment mode
-        "pay_labels": json.dumps(pay_labels),
-        "pay_values": json.dumps(pay_values),
+        "pay_labels": json.dumps([mode for mode, _ in report.payment_modes]),
+        "pay_values": json.dumps([float(total) for _, total in report.payment_modes]),
         # Top categories
-        "top_cats": top_cats,
+        "top_cats": [
+            {"name": c.name, "total": float(c.total), "count": c.count}
+            for c in report.categories[:5]
+        ],
+        # Insights
+        "insights": insights,
     }
-    return render(request, "transactions/reports.html", context)
\ No newline at end of file
+
+
+@login_required
+async def reports_view(request):
+    user = await request.auser()
+
+    # ── Filters ──
+    filter_from = request.GET.get("from", "")
+    filter_to = request.GET.get("to", "")
+    filter_category = request.GET.get("category", "")
+    trend_days = _trend_days(request.GET.get("trend"))
+
+    date_from = rollups.parse_filter_date(filter_from)
+    date_to = rollups.parse_filter_date(filter_to)
+    # The daily trend window moves with the calendar, so today is part of the key
+    today = date.today()
+
+    params = {"from": date_from, "to": date_to, "category": filter_category, "today": today,
+              "trend": trend_days}
+    payload = await get_payload_cache().aget_or_compute(
+        "reports", user.pk, params,
+        lambda: _reports_payload(user, date_from, date_to, filter_category, today, trend_days),
+    )
+
+    context = {
+        "active_page": "reports",
+        # Filters
+        "trend_days": trend_days,
+        "trend_windows": TREND_WINDOWS,
+        "filter_from": filter_from,
+        "filter_to": filter_to,
+        "filter_category": filter_category,
+        **payload,
+    }
+    return await _arender(request, "transactions/reports.html", context)
+
+
+# ──────────────────────────────────────────────────
+#  METRICS
+# ──────────────────────────────────────────────────
+@login_required
+def cache_metrics(request):
+    """Payload-cache hit/miss counters in Prometheus text format (staff only)."""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(prometheus_metrics(), content_type="text/plain; version=0.0.4")
+
+
+@login_required
+def mongo_metrics(request):
+    """Mongo connection-pool counters of this worker in Prometheus text format (staff only)."""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(mongo.prometheus_metrics(), content_type="text/plain; version=0.0.4")
+
+
+@login_required
+def request_metrics(request):
+    """Per-view request timings of this worker (staff only).
+
+    Prometheus text by default; ``?format=json`` gives a summary per view
+    with bucket-bound latency percentiles and mean SQL/Mongo/template cost.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    if request.GET.get("format") == "json":
+        return JsonResponse(instrumentation.stats.summary())
+    return HttpResponse(instrumentation.stats.prometheus_metrics(), content_type="text/plain; version=0.0.4")